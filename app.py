@@ -1,51 +1,51 @@
-"""Field Notes - Main Application.
+"""Field Notes - Command Line Interface.
+
+Commands:
+    publish   Publish staged markdown files
+    build     Build the site, running only what changed
+    index     Regenerate the index and archive pages
+    serve     Serve the current build (no build step)
+    deploy    Bundle the docs/ files changed since the last deploy
+    all       publish, build, then serve (default)
+
+Run: python app.py                  # Same as `python app.py all`
+     python app.py serve            # Preview the existing build
+     python app.py build --force    # Rebuild everything
+     python app.py all --watch      # Rebuild changed notes and live-reload
+     python app.py deploy           # Delta archive for the next push
+     python app.py build --trace build-trace.json --profile
+
+Helper modules and Flask are imported by the commands that use them, so
+`serve` starts without loading the build pipeline's entry points and
+`build` never imports Flask. Each command ends with a one-line timing
+summary and exits with 0 on success, 1 if any note or build task failed
+and 2 on invalid arguments.
+"""
 
-Workflow:
-    1. Publish all staged markdown files
-    2. Rebuild website from all published markdown
-    3. Start Flask development server
+import argparse
+import sys
+import time
 
-Run: python app.py
-"""
 
-from flask import Flask, render_template
-
-from helper_scripts.convert_markdown import convert_markdown_files
-from helper_scripts.generate_index import main as generate_index
-from helper_scripts.publish_note import (
-    find_markdown_files,
-    find_image_references,
-    parse_yaml_front_matter,
-    publish_note
-)
-
-# Initialize the Flask application
-app = Flask(
-    __name__,
-    template_folder='docs',
-    static_folder='docs/static',
-    static_url_path='/static'
-)
-
-
-def main():
-    """Execute main publishing workflow.
-
-    Steps:
-        1. Find and publish staged markdown files
-        2. Rebuild entire website from all published markdown
-        3. Start Flask development server for local preview
-    """
-    print("\n" + "=" * 70)
-    print("Field Notes - Publishing and Development Server")
-    print("=" * 70)
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_INTERRUPTED = 130
 
-    # Step 1: Find and publish staged files
-    print("\n" + "━" * 70)
-    print("Step 1: Publishing staged markdown files")
-    print("━" * 70 + "\n")
+
+def publish_staged_files(dry_run=False):
+    """Publish all staged markdown files and print a summary.
+
+    Args:
+        dry_run: If True, only print what would be published.
+
+    Returns:
+        Number of notes that failed to publish.
+    """
+    from helper_scripts.notes import load_note
+    from helper_scripts.publish_note import find_markdown_files, publish_notes
 
     staged_files = find_markdown_files("working/pages_markdown_staged")
+    failed_count = 0
 
     if not staged_files:
         print("No files found in working/pages_markdown_staged/")
@@ -55,18 +55,18 @@ def main():
 
         # Show what will be published
         for file_path in staged_files:
-            yaml_data = parse_yaml_front_matter(file_path)
-            title = yaml_data.get('title', '[No title]')
-            date = yaml_data.get('date', '[No date]')
-
             try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                image_refs = find_image_references(content)
-                image_count = len(image_refs)
-            except Exception:
+                note = load_note(file_path)
+                yaml_data = note.front_matter
+                image_count = len(note.image_references)
+            except Exception as e:
+                print(f"Warning: Could not read {file_path}: {e}")
+                yaml_data = {}
                 image_count = 0
 
+            title = yaml_data.get('title', '[No title]')
+            date = yaml_data.get('date', '[No date]')
+
             print(f"  • {file_path.name}")
             print(f"    Title: {title}")
             print(f"    Date: {date}")
@@ -80,10 +80,11 @@ def main():
         total_images_copied = 0
         all_warnings = []
 
-        for file_path in staged_files:
-            print(f"Publishing: {file_path.name}...")
+        # Plan and write every note as one transaction
+        results = publish_notes(staged_files, dry_run=dry_run)
 
-            result = publish_note(file_path)
+        for file_path, result in zip(staged_files, results):
+            print(f"Publishing: {file_path.name}...")
 
             if result['success']:
                 published_files.append(result['destination_path'])
@@ -114,6 +115,7 @@ def main():
 
                 print()
             else:
+                failed_count += 1
                 print(f"  ✗ Error: {result['error']}\n")
 
         # Publish summary
@@ -128,58 +130,293 @@ def main():
                 print(f"Warnings: {len(all_warnings)}")
             print()
 
-    # Step 2: Rebuild website
+    return failed_count
+
+
+def run_publish(args):
+    """Publish staged notes.
+
+    Returns:
+        Exit code.
+    """
+    print("\n" + "━" * 70)
+    print("Publishing staged markdown files")
+    print("━" * 70 + "\n")
+
+    from helper_scripts.tracing import stage
+
+    with stage("publish"):
+        failed_count = publish_staged_files(dry_run=args.dry_run)
+
+    return EXIT_FAILED if failed_count else EXIT_OK
+
+
+def run_build_command(args):
+    """Build the site through the build graph.
+
+    Returns:
+        Exit code.
+    """
     print("━" * 70)
-    print("Step 2: Rebuilding website")
+    print("Building website")
     print("━" * 70 + "\n")
 
-    print("Converting all markdown files to HTML...")
-    converted_count = convert_markdown_files()
-    print(f"✓ Converted {converted_count} file(s)\n")
+    from helper_scripts.build_graph import run_build
+    from helper_scripts.tracing import span
 
-    print("Generating index.html...")
-    generate_index()
-    print()
+    # Tasks run on worker threads, so run_tasks() profiles each one
+    with span("build", category="stage"):
+        summary = run_build(
+            force=args.force, workers=args.workers, renderer=args.renderer
+        )
+    print(f"✓ Converted {summary['converted']} file(s)\n")
 
-    # Step 3: Start development server
+    return EXIT_FAILED if summary['failed'] else EXIT_OK
+
+
+def run_index(args):
+    """Regenerate the index and archive pages.
+
+    Runs through the build graph, so the pages are fingerprinted,
+    minified and compressed like any build's, and a new release is cut
+    for the server.
+
+    Returns:
+        Exit code.
+    """
+    from helper_scripts.build_graph import run_build
+    from helper_scripts.generate_index import INDEX_PAGE_SIZE
+    from helper_scripts.tracing import span
+
+    with span("index", category="stage"):
+        summary = run_build(
+            rerun={'index'},
+            index_page_size=args.page_size or INDEX_PAGE_SIZE
+        )
+
+    return EXIT_FAILED if summary['failed'] else EXIT_OK
+
+
+def run_serve(args):
+    """Serve the current build.
+
+    Returns:
+        Exit code.
+    """
     print("━" * 70)
-    print("Step 3: Starting Flask development server")
+    print("Starting Flask development server")
     print("━" * 70 + "\n")
-    print("Server starting at http://127.0.0.1:5000/")
-    print("Press CTRL+C to stop the server\n")
-    print("=" * 70 + "\n")
+
+    from server import run_server
+
+    run_server(host=args.host, port=args.port, watch=args.watch)
+    return EXIT_OK
+
+
+def run_deploy(args):
+    """Create a deploy bundle, or mark one as deployed.
+
+    Returns:
+        Exit code.
+    """
+    from helper_scripts.deploy import (
+        create_deploy_bundle,
+        mark_deployed,
+        print_bundle_summary
+    )
+
+    if args.mark_deployed is None:
+        print_bundle_summary(create_deploy_bundle())
+        return EXIT_OK
 
     try:
-        app.run(debug=True, use_reloader=False)
-    except KeyboardInterrupt:
-        print("\n\n" + "=" * 70)
-        print("Server stopped")
-        print("=" * 70 + "\n")
+        bundle_id = mark_deployed(args.mark_deployed or None)
+    except ValueError as e:
+        print(f"✗ {e}")
+        return EXIT_FAILED
+
+    print(f"✓ Marked bundle {bundle_id} as deployed")
+    return EXIT_OK
+
 
+def run_all(args):
+    """Publish, build, then serve.
 
-@app.route("/")
-def home():
-    """Serve the homepage/index page.
+    A note that fails to publish or build does not stop the rest of the
+    site from being built and served.
 
     Returns:
-        Rendered index.html template.
+        Exit code of the first failing step once serving stops, or of
+        serving.
     """
-    return render_template('index.html')
+    print("\n" + "=" * 70)
+    print("Field Notes - Publishing and Development Server")
+    print("=" * 70)
 
+    exit_code = EXIT_OK
+    for step in (run_publish, run_build_command):
+        step_exit_code = step(args)
+        if exit_code == EXIT_OK:
+            exit_code = step_exit_code
+
+    _write_profiling_output(args)
+    if exit_code != EXIT_OK:
+        print("⚠ Some notes failed; serving the rest of the site\n")
+
+    serve_exit_code = run_serve(args)
+    return exit_code if exit_code != EXIT_OK else serve_exit_code
+
+
+def _write_profiling_output(args):
+    """Write the trace and report profiles requested for the build."""
+    from helper_scripts.tracing import write_trace
+
+    if args.trace:
+        event_count = write_trace(args.trace)
+        print(f"✓ Wrote {event_count} trace event(s) to {args.trace}\n")
+        args.trace = None
+    if args.profile:
+        print(f"✓ Wrote profiles to {args.profile}/\n")
+        args.profile = None
+
+
+def _add_build_arguments(parser):
+    """Add the options shared by `build` and `all`."""
+    parser.add_argument(
+        "--force", action="store_true",
+        help="rebuild every note regardless of the build manifest"
+    )
+    parser.add_argument(
+        "--workers", type=int, help="maximum concurrent build tasks"
+    )
+    parser.add_argument(
+        "--renderer", help="markdown renderer (pandoc, pandoc-batch, python)"
+    )
+    parser.add_argument(
+        "--trace",
+        metavar="FILE",
+        help="write a Chrome trace JSON of the build to FILE"
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="DIR",
+        nargs="?",
+        const=".build/profile",
+        help="write cProfile stats per stage and build task category "
+             "to DIR (default: .build/profile)"
+    )
+
+
+def _add_serve_arguments(parser):
+    """Add the options shared by `serve` and `all`."""
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="rebuild changed notes and live-reload pages while serving"
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="listen address")
+    parser.add_argument("--port", type=int, default=5000, help="listen port")
+
+
+def create_parser():
+    """Create the argument parser with one subparser per command.
 
-@app.route("/<path:year>/<path:filename>")
-def serve_note(year, filename):
-    """Serve individual field note HTML files.
+    Returns:
+        argparse.ArgumentParser.
+    """
+    parser = argparse.ArgumentParser(description="Field Notes")
+    commands = parser.add_subparsers(dest="command", metavar="command")
+
+    publish_parser = commands.add_parser(
+        "publish", help="publish staged markdown files"
+    )
+    publish_parser.add_argument(
+        "--dry-run", action="store_true",
+        help="show what would be published without changing files"
+    )
+    publish_parser.set_defaults(handler=run_publish)
+
+    build_parser = commands.add_parser(
+        "build", help="build the site, running only what changed"
+    )
+    _add_build_arguments(build_parser)
+    build_parser.set_defaults(handler=run_build_command)
+
+    index_parser = commands.add_parser(
+        "index", help="regenerate the index and archive pages"
+    )
+    index_parser.add_argument(
+        "--page-size", type=int, help="notes per listing page"
+    )
+    index_parser.set_defaults(handler=run_index)
+
+    serve_parser = commands.add_parser(
+        "serve", help="serve the current build without building"
+    )
+    _add_serve_arguments(serve_parser)
+    serve_parser.set_defaults(handler=run_serve)
+
+    deploy_parser = commands.add_parser(
+        "deploy", help="bundle the docs/ files changed since the last deploy"
+    )
+    deploy_parser.add_argument(
+        "--mark-deployed", metavar="ID", nargs="?", const="",
+        help="record a bundle (default: the newest) as deployed"
+    )
+    deploy_parser.set_defaults(handler=run_deploy)
+
+    all_parser = commands.add_parser(
+        "all", help="publish, build, then serve (default)"
+    )
+    _add_build_arguments(all_parser)
+    _add_serve_arguments(all_parser)
+    all_parser.set_defaults(handler=run_all, dry_run=False)
+
+    return parser
+
+
+def main(argv=None):
+    """Run a command and print its timing summary.
 
     Args:
-        year: Directory path (e.g., 'pages').
-        filename: HTML filename to serve.
+        argv: Command line arguments (default: sys.argv[1:]). Without a
+              command, `all` is run, so `python app.py --watch` still
+              works.
 
     Returns:
-        Rendered HTML template for the requested note.
+        Exit code.
     """
-    return render_template(f'{year}/{filename}')
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or (argv[0].startswith('-')
+                    and argv[0] not in ('-h', '--help')):
+        argv = ['all'] + argv
+
+    args = create_parser().parse_args(argv)
+
+    if getattr(args, 'trace', None) or getattr(args, 'profile', None):
+        from helper_scripts.tracing import enable_profiling, enable_tracing
+
+        if args.trace:
+            enable_tracing()
+        if args.profile:
+            enable_profiling(args.profile)
+
+    start_time = time.perf_counter()
+    try:
+        exit_code = args.handler(args)
+    except KeyboardInterrupt:
+        exit_code = EXIT_INTERRUPTED
+
+    if args.command == 'build':
+        _write_profiling_output(args)
+
+    elapsed = time.perf_counter() - start_time
+    status = "✓" if exit_code == EXIT_OK else "✗"
+    outcome = "finished" if exit_code == EXIT_OK else "failed"
+    print(f"{status} {args.command} {outcome} in {elapsed:.2f}s")
+
+    return exit_code
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,5 @@
+"""Benchmarks for the Field Notes build pipeline.
+
+Generates synthetic note corpora and times publishing, conversion, index
+generation and serving. Run: python -m benchmarks.run_benchmarks --help
+"""
@@ -0,0 +1,180 @@
+"""Synthetic Corpus Generator.
+
+Builds a throwaway working/ and docs/ tree with N notes, M images and a
+configurable share of images referenced by more than one note, laid out
+the way the helper scripts expect so they can run against it unchanged.
+"""
+
+import random
+import shutil
+import struct
+import zlib
+from datetime import date, timedelta
+from pathlib import Path
+
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+TEMPLATE_FILES = ("static/template.html", "static/styles.css")
+
+WORDS = (
+    "energy data center grid power cooling demand load tinkering denning "
+    "outdoorsing satisfaction scale model forecast note field project plan "
+    "capacity transmission storage battery solar wind water heat pump "
+    "dog walk trail park weekend workshop tool bench build repair"
+).split()
+TAGS = (
+    "Energy", "Data Centers", "Tinkering", "Outdoorsing", "Denning",
+    "Satisfaction", "Pups", "Projects", "Reading", "Tools"
+)
+
+
+def make_png(width=4, height=4, padding=0):
+    """Return the bytes of a small valid PNG image.
+
+    Args:
+        width: Image width in pixels.
+        height: Image height in pixels.
+        padding: Extra bytes stored in a private chunk to reach a
+                 realistic file size without real pixel data.
+
+    Returns:
+        PNG file contents as bytes.
+    """
+    def chunk(kind, data):
+        body = kind + data
+        return (struct.pack('>I', len(data)) + body
+                + struct.pack('>I', zlib.crc32(body) & 0xffffffff))
+
+    header = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    pixels = zlib.compress(b''.join(
+        b'\x00' + b'\x80\x80\x80' * width for _ in range(height)
+    ))
+
+    png = b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header)
+    if padding:
+        png += chunk(b'prVt', b'\x00' * padding)
+    return png + chunk(b'IDAT', pixels) + chunk(b'IEND', b'')
+
+
+def make_paragraph(rng, sentences=4):
+    """Return a paragraph of filler sentences."""
+    return ' '.join(
+        ' '.join(rng.choices(WORDS, k=rng.randint(8, 16))).capitalize() + '.'
+        for _ in range(sentences)
+    )
+
+
+def make_note(rng, index, note_date, image_names, image_prefix):
+    """Return markdown text for one synthetic note.
+
+    Args:
+        rng: random.Random instance.
+        index: Note number, used in the title.
+        note_date: datetime.date for the front matter.
+        image_names: Image filenames the note references.
+        image_prefix: Path prefix for image references (e.g. "./media/").
+
+    Returns:
+        Markdown string with YAML front matter.
+    """
+    title = f"Note {index}: {' '.join(rng.sample(WORDS, 3)).title()}"
+    tags = ', '.join(f'"{tag}"' for tag in rng.sample(TAGS, 3))
+
+    lines = [
+        "---",
+        f'title: "{title}"',
+        f'date: "{note_date.isoformat()}"',
+        f"tags: [{tags}]",
+        f'description: "{make_paragraph(rng, 1)}"',
+        "---",
+        "",
+        f"# {title}",
+        ""
+    ]
+
+    for section in range(rng.randint(2, 5)):
+        lines += [f"## Section {section + 1}", "", make_paragraph(rng), ""]
+        lines += [f"- {make_paragraph(rng, 1)}" for _ in range(3)] + [""]
+
+    for name in image_names:
+        lines += [f"![{name}]({image_prefix}{name})", ""]
+
+    lines += ["```python", "print('![not an image](code.png)')", "```", ""]
+
+    return '\n'.join(lines)
+
+
+def generate_corpus(root, notes=100, published=100, drafts=50, images=50,
+                    shared_ratio=0.2, images_per_note=2, image_bytes=4096,
+                    seed=0):
+    """Create a synthetic field notes tree under root.
+
+    Args:
+        root: Directory to create the tree in (must not exist or be empty).
+        notes: Number of staged notes in working/pages_markdown_staged.
+        published: Number of notes already in docs/pages_markdown.
+        drafts: Number of draft notes in working/pages_markdown.
+        images: Number of images in working/static/media.
+        shared_ratio: Fraction of images referenced by a draft note too,
+                      so publishing copies rather than moves them.
+        images_per_note: Image references per staged note.
+        image_bytes: Approximate size of each generated image.
+        seed: Random seed so runs are comparable.
+
+    Returns:
+        Dict describing the generated corpus.
+    """
+    rng = random.Random(seed)
+    root = Path(root)
+
+    staged_dir = root / "working/pages_markdown_staged"
+    drafts_dir = root / "working/pages_markdown"
+    media_dir = root / "working/static/media"
+    markdown_dir = root / "docs/pages_markdown"
+
+    for directory in (staged_dir, drafts_dir, media_dir, markdown_dir,
+                      root / "docs/pages", root / "docs/static/media"):
+        directory.mkdir(parents=True, exist_ok=True)
+
+    for relative_path in TEMPLATE_FILES:
+        shutil.copy2(REPO_ROOT / "docs" / relative_path,
+                     root / "docs" / relative_path)
+
+    image_names = [f"image_{i:05d}.png" for i in range(images)]
+    for name in image_names:
+        (media_dir / name).write_bytes(make_png(padding=image_bytes))
+
+    shared_images = image_names[:int(len(image_names) * shared_ratio)]
+    start_date = date(2024, 1, 1)
+
+    for i in range(notes):
+        refs = rng.sample(image_names, min(images_per_note, len(image_names)))
+        note_date = start_date + timedelta(days=rng.randint(0, 900))
+        (staged_dir / f"staged-note-{i:05d}.md").write_text(
+            make_note(rng, i, note_date, refs, "./media/"), encoding='utf-8'
+        )
+
+    for i in range(drafts):
+        refs = [shared_images[i % len(shared_images)]] if shared_images else []
+        note_date = start_date + timedelta(days=rng.randint(0, 900))
+        (drafts_dir / f"draft-note-{i:05d}.md").write_text(
+            make_note(rng, i, note_date, refs, "../media/"), encoding='utf-8'
+        )
+
+    for i in range(published):
+        note_date = start_date + timedelta(days=rng.randint(0, 900))
+        (markdown_dir / f"{note_date.isoformat()}-note-{i:05d}.md").write_text(
+            make_note(rng, i, note_date, [], "../static/media/"),
+            encoding='utf-8'
+        )
+
+    return {
+        'notes': notes,
+        'published': published,
+        'drafts': drafts,
+        'images': images,
+        'shared_ratio': shared_ratio,
+        'images_per_note': images_per_note,
+        'image_bytes': image_bytes,
+        'seed': seed
+    }
@@ -0,0 +1,496 @@
+"""Build Output Equivalence Harness.
+
+A faster build path is only trustworthy if it produces the same site as
+a clean serial build. This harness generates a synthetic corpus (see
+corpus.py), copies it once per mode, builds each copy and diffs the
+resulting docs/ trees byte for byte against a reference:
+
+    serial              publish_note, convert_markdown_files(workers=1,
+                        force=True), generate_index.main (the reference)
+    parallel-<N>        the same with N conversion workers
+    incremental         a clean build, then the changes (edits, renames,
+                        deletes, new notes and a template edit) rebuilt
+                        without force
+    graph-serial        run_build(workers=1, force=True), the reference
+                        for the build graph modes (whose extra stages
+                        fingerprint and minify pages)
+    graph-parallel-<N>  run_build with N workers
+    graph-incremental   a clean run_build, then the same changes rebuilt
+
+Every mode ends with the same sources: the changes are applied before
+the build in clean modes and between the two builds in incremental ones.
+The wall time of each mode's final build is recorded next to its
+divergences, so speedups and correctness are checked together.
+
+Search index shards are the one exception to the byte-for-byte diff.
+An incremental build keeps each page's doc id, so its shards can number
+pages differently from a clean build's; they are compared by what they
+answer instead: each term's pages (by URL) and weights, and each page's
+URL, title and date.
+
+Incremental modes take every shortcut a real rebuild would: skipping
+current notes, re-wrapping notes whose template alone changed and
+restoring pages from the render cache. Set FIELD_NOTES_RENDER_CACHE to
+keep the corpus out of the shared cache.
+
+Run: python -m benchmarks.equivalence --published 200 --workers 2 4 8
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+from benchmarks.corpus import generate_corpus, make_note, make_paragraph
+from benchmarks.run_benchmarks import (
+    DEFAULT_OUTPUT_DIR,
+    time_call,
+    working_directory
+)
+from helper_scripts import notes, publish_note
+from helper_scripts.build_graph import run_build
+from helper_scripts.convert_markdown import (
+    HTML_TEMPLATE_FILE,
+    MARKDOWN_DIR,
+    convert_markdown_files
+)
+from helper_scripts.file_utils import hash_file
+from helper_scripts.generate_index import main as generate_index
+from helper_scripts.renderers import RENDERERS, get_renderer_version
+
+
+SITE_DIR = "docs"
+SEARCH_SHARD_DIRS = ("static/search/terms/", "static/search/docs/")
+DEFAULT_WORKER_COUNTS = (2, 4)
+
+# Divergent paths printed per mode; the JSON report lists all of them
+MAX_PRINTED_DIVERGENCES = 10
+
+
+def change_corpus(seed=0, edits=10, renames=3, deletes=3, additions=5,
+                  template=True):
+    """Edit, rename, delete and add published notes in the current tree.
+
+    The same seed picks the same notes in every copy of a corpus.
+
+    Args:
+        seed: Random seed.
+        edits: Notes to append a section to.
+        renames: Notes to move to a new file name.
+        deletes: Notes to delete.
+        additions: New notes to write.
+        template: If True, also edit the HTML template.
+
+    Returns:
+        Dict of the edited, renamed, deleted and added path lists.
+    """
+    rng = random.Random(seed)
+    markdown_files = sorted(Path(MARKDOWN_DIR).rglob('*.md'))
+    picked = rng.sample(
+        markdown_files, min(len(markdown_files), edits + renames + deletes)
+    )
+    changes = {'edited': [], 'renamed': [], 'deleted': [], 'added': []}
+
+    for path in picked[:edits]:
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(f"\n## Update\n\n{make_paragraph(rng)}\n")
+        changes['edited'].append(str(path))
+
+    for path in picked[edits:edits + renames]:
+        path.rename(path.with_name(f"{path.stem}-renamed.md"))
+        changes['renamed'].append(str(path))
+
+    for path in picked[edits + renames:]:
+        path.unlink()
+        changes['deleted'].append(str(path))
+
+    for i in range(additions):
+        note_date = date(2024, 1, 1) + timedelta(days=rng.randint(0, 900))
+        path = Path(MARKDOWN_DIR) / (
+            f"{note_date.isoformat()}-added-{i:05d}.md"
+        )
+        path.write_text(
+            make_note(rng, 90000 + i, note_date, [], "../static/media/"),
+            encoding='utf-8'
+        )
+        changes['added'].append(str(path))
+
+    if template:
+        with open(HTML_TEMPLATE_FILE, 'a', encoding='utf-8') as f:
+            f.write("<!-- Revised template -->\n")
+
+    return changes
+
+
+def publish_staged_notes():
+    """Publish every staged note one at a time, as a clean build would."""
+    image_index = publish_note.build_image_usage_index()
+    for path in publish_note.find_markdown_files():
+        publish_note.publish_note(path, image_index=image_index)
+
+
+def build_pipeline(workers, force, renderer):
+    """Convert the published notes and generate the listing pages."""
+    convert_markdown_files(force=force, workers=workers, renderer=renderer)
+    generate_index()
+
+
+def build_graph(workers, force, renderer):
+    """Run the build graph."""
+    run_build(force=force, workers=workers, renderer=renderer)
+
+
+def get_modes(worker_counts):
+    """Return the build modes to compare.
+
+    Args:
+        worker_counts: Worker counts for the parallel modes.
+
+    Returns:
+        Dict mapping mode name to a dict with its reference mode, build
+        function, worker count and whether it builds incrementally.
+        Reference modes come first.
+    """
+    modes = {}
+
+    for prefix, build in (('', build_pipeline), ('graph-', build_graph)):
+        reference = f"{prefix}serial"
+        modes[reference] = {
+            'reference': reference, 'build': build, 'workers': 1,
+            'incremental': False
+        }
+        for workers in worker_counts:
+            modes[f"{prefix}parallel-{workers}"] = {
+                'reference': reference, 'build': build, 'workers': workers,
+                'incremental': False
+            }
+        modes[f"{prefix}incremental"] = {
+            'reference': reference, 'build': build,
+            'workers': max(worker_counts, default=1), 'incremental': True
+        }
+
+    return modes
+
+
+def run_mode(mode, corpus_dir, tree_dir, change_options, renderer):
+    """Copy the corpus and build it in one mode.
+
+    Args:
+        mode: Mode dict from get_modes().
+        corpus_dir: Directory of the generated corpus.
+        tree_dir: Directory to copy the corpus to and build in.
+        change_options: Keyword arguments for change_corpus().
+        renderer: Renderer backend name.
+
+    Returns:
+        Dict of wall times in seconds for publishing, the initial build
+        (incremental modes only) and the final build.
+    """
+    shutil.copytree(corpus_dir, tree_dir, symlinks=True)
+    timings = {}
+
+    with working_directory(tree_dir):
+        notes.clear_note_cache()
+        timings['publish'], _ = time_call(publish_staged_notes)
+
+        if mode['incremental']:
+            timings['initial_build'], _ = time_call(
+                mode['build'], mode['workers'], False, renderer
+            )
+            notes.clear_note_cache()
+            change_corpus(**change_options)
+            timings['build'], _ = time_call(
+                mode['build'], mode['workers'], False, renderer
+            )
+        else:
+            change_corpus(**change_options)
+            timings['build'], _ = time_call(
+                mode['build'], mode['workers'], True, renderer
+            )
+
+    return {
+        name: timing['seconds'] for name, timing in timings.items()
+    }
+
+
+def hash_tree(site_dir):
+    """Hash every file of a built site.
+
+    Args:
+        site_dir: Root of the site.
+
+    Returns:
+        Dict mapping path (relative to site_dir, with / separators) to
+        content hash.
+    """
+    hashes = {}
+
+    for root, dirs, files in os.walk(site_dir):
+        for name in files:
+            path = os.path.join(root, name)
+            relative_path = Path(os.path.relpath(path, site_dir)).as_posix()
+            hashes[relative_path] = hash_file(path)
+
+    return hashes
+
+
+def get_first_difference(path_a, path_b):
+    """Return the 1-based number of the first line two files differ on."""
+    lines_a = Path(path_a).read_bytes().splitlines()
+    lines_b = Path(path_b).read_bytes().splitlines()
+
+    for number, (line_a, line_b) in enumerate(zip(lines_a, lines_b), 1):
+        if line_a != line_b:
+            return number
+    return min(len(lines_a), len(lines_b)) + 1
+
+
+def load_search_contents(site_dir):
+    """Load a site's search index with doc ids replaced by page URLs.
+
+    Args:
+        site_dir: Root of the site.
+
+    Returns:
+        Dict mapping 'term:<term>' to sorted [url, weight] pairs and
+        'page:<url>' to the page's [title, date].
+    """
+    search_dir = Path(site_dir) / "static" / "search"
+    records = {}
+    for path in (search_dir / "docs").glob('*.json'):
+        records.update(json.loads(path.read_text(encoding='utf-8')))
+
+    contents = {
+        f"page:{url}": [title, date]
+        for url, title, date in records.values()
+    }
+    for path in (search_dir / "terms").glob('*.json'):
+        postings = json.loads(path.read_text(encoding='utf-8'))
+        for term, (doc_ids, weights) in postings.items():
+            contents[f"term:{term}"] = sorted(
+                [records[str(doc_id)][0], weight]
+                for doc_id, weight in zip(doc_ids, weights)
+            )
+
+    return contents
+
+
+def compare_trees(reference_dir, site_dir):
+    """Diff a built site against the reference build.
+
+    Files are compared byte for byte, except search index shards, which
+    are compared through load_search_contents().
+
+    Args:
+        reference_dir: Root of the reference site.
+        site_dir: Root of the site to check.
+
+    Returns:
+        Dict of sorted 'missing' and 'extra' path lists, a 'different'
+        list of {path, line} dicts giving the first differing line and a
+        sorted 'search' list of terms and pages the indexes disagree on.
+    """
+    reference = {
+        path: digest for path, digest in hash_tree(reference_dir).items()
+        if not path.startswith(SEARCH_SHARD_DIRS)
+    }
+    site = {
+        path: digest for path, digest in hash_tree(site_dir).items()
+        if not path.startswith(SEARCH_SHARD_DIRS)
+    }
+    reference_search = load_search_contents(reference_dir)
+    site_search = load_search_contents(site_dir)
+
+    return {
+        'missing': sorted(path for path in reference if path not in site),
+        'extra': sorted(path for path in site if path not in reference),
+        'different': [
+            {
+                'path': path,
+                'line': get_first_difference(
+                    os.path.join(reference_dir, path),
+                    os.path.join(site_dir, path)
+                )
+            }
+            for path in sorted(reference)
+            if path in site and site[path] != reference[path]
+        ],
+        'search': sorted(
+            key for key in reference_search.keys() | site_search.keys()
+            if reference_search.get(key) != site_search.get(key)
+        )
+    }
+
+
+def run_equivalence(corpus_options, change_options, worker_counts,
+                    renderer=None, keep_dir=None):
+    """Build a corpus in every mode and compare the sites.
+
+    Args:
+        corpus_options: Keyword arguments for generate_corpus().
+        change_options: Keyword arguments for change_corpus().
+        worker_counts: Worker counts for the parallel modes.
+        renderer: Renderer backend name. Defaults to the default renderer.
+        keep_dir: Optional directory to build in and keep afterwards;
+                  otherwise a temporary directory is used and removed.
+
+    Returns:
+        Dict of environment info, corpus and changes description and a
+        result per mode: timings, speedup over its reference build,
+        file count, divergences and whether it matches the reference.
+    """
+    modes = get_modes(worker_counts)
+    results = {}
+
+    with tempfile.TemporaryDirectory(prefix="field-notes-equiv-") as temp:
+        root = Path(keep_dir or temp)
+        corpus_dir = root / "corpus"
+        corpus = generate_corpus(corpus_dir, **corpus_options)
+
+        for name, mode in modes.items():
+            timings = run_mode(
+                mode, corpus_dir, root / name, change_options, renderer
+            )
+            reference_site = root / mode['reference'] / SITE_DIR
+            site = root / name / SITE_DIR
+            divergence = compare_trees(reference_site, site)
+            reference_build = results.get(
+                mode['reference'], {'seconds': timings}
+            )['seconds']['build']
+
+            results[name] = {
+                'reference': mode['reference'],
+                'workers': mode['workers'],
+                'seconds': timings,
+                'speedup': (
+                    round(reference_build / timings['build'], 2)
+                    if timings['build'] else None
+                ),
+                'files': len(hash_tree(site)),
+                'equivalent': not any(divergence.values()),
+                'divergence': divergence
+            }
+
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'renderer': renderer,
+        'renderer_versions': {
+            name: get_renderer_version(name) for name in RENDERERS
+        },
+        'corpus': corpus,
+        'changes': change_options,
+        'modes': results
+    }
+
+
+def print_report(report):
+    """Print one line per mode and the divergences of failing modes.
+
+    Args:
+        report: Dict from run_equivalence().
+    """
+    for name, result in report['modes'].items():
+        status = "✓" if result['equivalent'] else "✗"
+        reference = (
+            "reference" if result['reference'] == name
+            else f"vs {result['reference']}, {result['speedup']}x"
+        )
+        print(
+            f"{status} {name:<20} {result['seconds']['build']:>8.3f}s "
+            f"({reference}, {result['files']} file(s))"
+        )
+
+        divergence = result['divergence']
+        entries = (
+            [f"missing {path}" for path in divergence['missing']]
+            + [f"extra   {path}" for path in divergence['extra']]
+            + [
+                f"differs {entry['path']} (line {entry['line']})"
+                for entry in divergence['different']
+            ]
+            + [f"search  {key}" for key in divergence['search']]
+        )
+        for entry in entries[:MAX_PRINTED_DIVERGENCES]:
+            print(f"    {entry}")
+        if len(entries) > MAX_PRINTED_DIVERGENCES:
+            print(f"    ... {len(entries) - MAX_PRINTED_DIVERGENCES} more")
+
+
+def main():
+    """Parse arguments, compare the build modes and write the report."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--notes", type=int, default=20,
+                        help="staged notes to publish")
+    parser.add_argument("--published", type=int, default=60,
+                        help="notes already in docs/pages_markdown")
+    parser.add_argument("--drafts", type=int, default=10,
+                        help="draft notes in working/pages_markdown")
+    parser.add_argument("--images", type=int, default=20,
+                        help="images in working/static/media")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--edits", type=int, default=10,
+                        help="published notes edited between builds")
+    parser.add_argument("--renames", type=int, default=3,
+                        help="published notes renamed between builds")
+    parser.add_argument("--deletes", type=int, default=3,
+                        help="published notes deleted between builds")
+    parser.add_argument("--additions", type=int, default=5,
+                        help="notes added between builds")
+    parser.add_argument("--keep-template", action="store_true",
+                        help="leave the template unchanged between builds")
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=list(DEFAULT_WORKER_COUNTS),
+                        help="worker counts for the parallel modes")
+    parser.add_argument("--renderer", choices=RENDERERS,
+                        help="renderer backend to build with")
+    parser.add_argument("--keep", metavar="DIR",
+                        help="build in DIR and keep the trees for diffing")
+    parser.add_argument("--output", help="JSON report path")
+    args = parser.parse_args()
+
+    report = run_equivalence(
+        {
+            'notes': args.notes,
+            'published': args.published,
+            'drafts': args.drafts,
+            'images': args.images,
+            'seed': args.seed
+        },
+        {
+            'seed': args.seed,
+            'edits': args.edits,
+            'renames': args.renames,
+            'deletes': args.deletes,
+            'additions': args.additions,
+            'template': not args.keep_template
+        },
+        args.workers,
+        renderer=args.renderer,
+        keep_dir=args.keep
+    )
+
+    output = Path(args.output) if args.output else (
+        Path(DEFAULT_OUTPUT_DIR)
+        / f"equivalence-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding='utf-8')
+
+    print_report(report)
+    print(f"\n✓ Wrote {output}")
+
+    if not all(result['equivalent'] for result in report['modes'].values()):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""Field Notes Pipeline Benchmarks.
+
+Generates a synthetic corpus in a temporary directory and times each
+pipeline stage against it: publish_note, convert_markdown_files (per
+renderer, full and no-op incremental), generate_index and the Flask
+routes. Results are written as JSON so runs can be compared.
+
+Run: python -m benchmarks.run_benchmarks --notes 200 --output bench.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from benchmarks.corpus import generate_corpus
+from helper_scripts import notes, publish_note
+from helper_scripts.convert_markdown import convert_markdown_files
+from helper_scripts.generate_index import main as generate_index
+from helper_scripts.renderers import (
+    RENDERER_PYTHON,
+    RENDERERS,
+    get_renderer_version
+)
+
+
+DEFAULT_OUTPUT_DIR = ".build/benchmarks"
+
+
+@contextlib.contextmanager
+def working_directory(path):
+    """Temporarily change the current working directory."""
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def time_call(func, *args, operations=1, **kwargs):
+    """Time a call with its console output suppressed.
+
+    Args:
+        func: Callable to time.
+        *args: Positional arguments for func.
+        operations: Number of operations the call performs, used for the
+                    throughput figure.
+        **kwargs: Keyword arguments for func.
+
+    Returns:
+        Tuple of (result dict with seconds/operations/ops_per_second,
+        return value of func).
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        start_time = time.perf_counter()
+        value = func(*args, **kwargs)
+        elapsed = time.perf_counter() - start_time
+
+    return {
+        'seconds': round(elapsed, 6),
+        'operations': operations,
+        'ops_per_second': round(operations / elapsed, 2) if elapsed else None
+    }, value
+
+
+def skipped(reason):
+    """Return a result entry for a benchmark that did not run."""
+    return {'skipped': reason}
+
+
+def bench_publish(staged_files):
+    """Time publishing every staged note with one shared image index."""
+    def publish_all():
+        image_index = publish_note.build_image_usage_index()
+        return [
+            publish_note.publish_note(path, image_index=image_index)
+            for path in staged_files
+        ]
+
+    result, outcomes = time_call(publish_all, operations=len(staged_files))
+    result['failed'] = sum(not outcome['success'] for outcome in outcomes)
+    return result
+
+
+def bench_convert(renderer, workers):
+    """Time a full forced conversion and a no-op incremental rerun."""
+    if get_renderer_version(renderer) is None:
+        missing = (
+            "markdown package" if renderer == RENDERER_PYTHON else "pandoc"
+        )
+        return skipped(f"{missing} not available")
+
+    markdown_count = len(list(Path("docs/pages_markdown").rglob('*.md')))
+
+    full, converted = time_call(
+        convert_markdown_files, force=True, workers=workers,
+        renderer=renderer, operations=markdown_count
+    )
+    full['converted'] = converted
+
+    incremental, _ = time_call(
+        convert_markdown_files, workers=workers, renderer=renderer,
+        operations=markdown_count
+    )
+
+    return {'full': full, 'incremental_noop': incremental}
+
+
+def bench_index():
+    """Time index generation."""
+    page_count = len(list(Path("docs/pages").glob('*.html')))
+    result, _ = time_call(generate_index, operations=page_count)
+    return result
+
+
+def bench_serve(requests):
+    """Time repeated requests to the Flask routes with the test client."""
+    try:
+        import server
+    except ImportError as e:
+        return skipped(f"Flask not available: {e}")
+
+    client = server.app.test_client()
+    pages = sorted(Path("docs/pages").glob('*.html'))
+    urls = ['/'] + [f"/pages/{page.name}" for page in pages]
+    urls = (urls * (requests // len(urls) + 1))[:requests]
+
+    def get_all(etags=None):
+        statuses = [
+            client.get(
+                url,
+                headers={'If-None-Match': etags[url]} if etags else None
+            ).status_code
+            for url in urls
+        ]
+        return sum(status >= 400 for status in statuses)
+
+    cold, errors = time_call(get_all, operations=len(urls))
+    cold['errors'] = errors
+
+    warm, _ = time_call(get_all, operations=len(urls))
+
+    etags = {url: client.get(url).headers.get('ETag', '') for url in set(urls)}
+    conditional, _ = time_call(get_all, etags, operations=len(urls))
+
+    return {'first_pass': cold, 'cached': warm, 'conditional': conditional}
+
+
+def run_benchmarks(corpus_options, renderers=RENDERERS, workers=None,
+                   requests=500):
+    """Generate a corpus and run every benchmark against it.
+
+    Args:
+        corpus_options: Keyword arguments for generate_corpus().
+        renderers: Renderer backends to benchmark conversion with.
+        workers: Worker count passed to convert_markdown_files().
+        requests: Number of HTTP requests for the serve benchmark.
+
+    Returns:
+        Dict of environment info, corpus description and results.
+    """
+    results = {}
+
+    with tempfile.TemporaryDirectory(prefix="field-notes-bench-") as root:
+        corpus = generate_corpus(root, **corpus_options)
+
+        with working_directory(root):
+            notes.clear_note_cache()
+            staged_files = publish_note.find_markdown_files()
+            results['publish'] = bench_publish(staged_files)
+
+            results['convert'] = {
+                renderer: bench_convert(renderer, workers)
+                for renderer in renderers
+            }
+            if not any(Path("docs/pages").glob('*.html')):
+                results['index'] = skipped("no converted pages")
+                results['serve'] = skipped("no converted pages")
+            else:
+                results['index'] = bench_index()
+                results['serve'] = bench_serve(requests)
+
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'renderer_versions': {
+            renderer: get_renderer_version(renderer)
+            for renderer in renderers
+        },
+        'corpus': corpus,
+        'results': results
+    }
+
+
+def main():
+    """Parse arguments, run the benchmarks and write the JSON report."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--notes", type=int, default=100,
+                        help="staged notes to publish")
+    parser.add_argument("--published", type=int, default=100,
+                        help="notes already in docs/pages_markdown")
+    parser.add_argument("--drafts", type=int, default=50,
+                        help="draft notes in working/pages_markdown")
+    parser.add_argument("--images", type=int, default=50,
+                        help="images in working/static/media")
+    parser.add_argument("--shared-ratio", type=float, default=0.2,
+                        help="fraction of images also used by drafts")
+    parser.add_argument("--image-bytes", type=int, default=4096,
+                        help="approximate size of each image")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--renderer", action="append", choices=RENDERERS,
+                        help="renderer to benchmark (repeatable)")
+    parser.add_argument("--workers", type=int,
+                        help="concurrent conversions (default: CPU count)")
+    parser.add_argument("--requests", type=int, default=500,
+                        help="HTTP requests for the serve benchmark")
+    parser.add_argument("--output", help="JSON report path")
+    args = parser.parse_args()
+
+    report = run_benchmarks(
+        {
+            'notes': args.notes,
+            'published': args.published,
+            'drafts': args.drafts,
+            'images': args.images,
+            'shared_ratio': args.shared_ratio,
+            'image_bytes': args.image_bytes,
+            'seed': args.seed
+        },
+        renderers=args.renderer or RENDERERS,
+        workers=args.workers,
+        requests=args.requests
+    )
+
+    output = Path(args.output) if args.output else (
+        Path(DEFAULT_OUTPUT_DIR)
+        / f"{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding='utf-8')
+
+    print(json.dumps(report['results'], indent=2))
+    print(f"\n✓ Wrote {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+/* Client-side search over the static index in static/search/.
+ *
+ * Mirrors helper_scripts/search_index.py: queries are tokenized and
+ * stemmed with the settings published in meta.json, then only the term
+ * and document shards the query needs are fetched (and cached).
+ */
+(function () {
+    const scriptUrl = document.currentScript.src;
+    const searchUrl = new URL('search/', scriptUrl);
+    const siteUrl = new URL('../', scriptUrl);
+    const shardCache = new Map();
+    let metaPromise = null;
+
+    function fetchJson(path) {
+        if (!shardCache.has(path)) {
+            shardCache.set(path, fetch(new URL(path, searchUrl))
+                .then((response) => (response.ok ? response.json() : {}))
+                .catch(() => ({})));
+        }
+        return shardCache.get(path);
+    }
+
+    function loadMeta() {
+        metaPromise = metaPromise || fetchJson('meta.json');
+        return metaPromise;
+    }
+
+    function stem(token, meta) {
+        for (const rules of meta.stem_steps) {
+            for (const [suffix, replacement] of rules) {
+                if (token.endsWith(suffix)) {
+                    const candidate =
+                        token.slice(0, -suffix.length) + replacement;
+                    if (candidate.length >= meta.min_stem_length) {
+                        token = candidate;
+                    }
+                    break;
+                }
+            }
+        }
+        return token;
+    }
+
+    function getTerms(text, meta) {
+        const stopWords = new Set(meta.stop_words);
+        const tokens =
+            text.normalize('NFKC').toLowerCase().match(/[\p{L}\p{N}]+/gu) ||
+            [];
+        return [...new Set(tokens
+            .filter((token) => [...token].length >= meta.min_token_length &&
+                               !stopWords.has(token))
+            .map((token) => stem(token, meta)))].sort();
+    }
+
+    function getTermShard(term, shardCount) {
+        let value = 0x811c9dc5;
+        for (const byte of new TextEncoder().encode(term)) {
+            value = Math.imul(value ^ byte, 0x01000193) >>> 0;
+        }
+        return value % shardCount;
+    }
+
+    function shardName(shard) {
+        return 'terms/' + shard.toString(16).padStart(2, '0') + '.json';
+    }
+
+    async function search(query, limit = 20) {
+        const meta = await loadMeta();
+        if (!meta.version) {
+            return [];
+        }
+
+        const terms = getTerms(query, meta);
+        if (!terms.length) {
+            return [];
+        }
+
+        const shards = await Promise.all(terms.map((term) =>
+            fetchJson(shardName(getTermShard(term, meta.term_shard_count)))));
+        const postingLists = terms.map((term, i) => shards[i][term] ||
+                                                     [[], []]);
+        postingLists.sort((a, b) => a[0].length - b[0].length);
+
+        let scores = null;
+        for (const [docIds, weights] of postingLists) {
+            const idf = Math.log(1 + (meta.document_count - docIds.length +
+                                      0.5) / (docIds.length + 0.5));
+            const next = new Map();
+            docIds.forEach((docId, i) => {
+                if (scores === null || scores.has(docId)) {
+                    const weight = weights[i];
+                    next.set(docId, (scores ? scores.get(docId) : 0) +
+                        idf * weight * (meta.k1 + 1) / (weight + meta.k1));
+                }
+            });
+            scores = next;
+            if (!scores.size) {
+                return [];
+            }
+        }
+
+        const top = [...scores].sort((a, b) => b[1] - a[1]).slice(0, limit);
+        const records = await Promise.all(top.map(([docId]) => fetchJson(
+            'docs/' + Math.floor(docId / meta.document_shard_size) + '.json')));
+
+        return top.map(([docId, score], i) => {
+            const record = records[i][docId];
+            return record && {
+                url: new URL(record[0], siteUrl).href,
+                title: record[1],
+                date: record[2],
+                score: score
+            };
+        }).filter(Boolean);
+    }
+
+    function renderResults(results, list, query) {
+        list.replaceChildren(...results.map((result) => {
+            const item = document.createElement('li');
+            const link = document.createElement('a');
+            link.href = result.url;
+            link.textContent = result.title;
+            item.append(link, ' - ' + result.date);
+            return item;
+        }));
+
+        if (query && !results.length) {
+            const item = document.createElement('li');
+            item.textContent = 'No matching notes';
+            list.append(item);
+        }
+    }
+
+    window.fieldNotesSearch = search;
+
+    const input = document.getElementById('search-input');
+    const list = document.getElementById('search-results');
+    if (!input || !list) {
+        return;
+    }
+
+    let pending = 0;
+    input.addEventListener('input', () => {
+        const query = input.value.trim();
+        const request = ++pending;
+        search(query).then((results) => {
+            if (request === pending) {
+                renderResults(results, list, query);
+            }
+        });
+    });
+})();
@@ -0,0 +1,425 @@
+"""Asset Fingerprinting and Minification.
+
+Pages link stylesheets, scripts and images by fixed names, so browsers
+must revalidate them on every visit. This post-build stage gives each
+asset a name derived from its content and points the pages at it:
+
+    static/styles.css           → static/styles.<12 hex digits>.css
+    static/search.js            → static/search.<12 hex digits>.js
+    static/media/pups.jpg       → static/media/<16 hex digits>.jpg
+
+CSS is minified before hashing; scripts are copied as they are. Images
+get the same content-addressed name publishing uses (see
+publish_note.get_media_store_name()), as a reflink or copy of the
+original (never a hard link, so editing the original in place cannot
+change the immutable name). Fingerprinted names never change content,
+so the server sends them with a year-long immutable Cache-Control.
+
+References in href, src and srcset attributes of every page are
+rewritten, including references to older fingerprints. Generated pages
+(converted notes, listing and gallery pages) are also minified;
+hand-written pages only have their references updated. The stage is
+incremental: a page is processed only if it changed since the last run
+or references an asset whose fingerprint changed.
+
+docs/static/asset-manifest.json maps each asset to its fingerprinted
+name.
+"""
+
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+
+from helper_scripts.asset_names import (
+    ASSET_HASH_LENGTH,
+    FINGERPRINTED_NAME_PATTERN,
+    MEDIA_HASH_LENGTH,
+    is_content_addressed_media,
+    is_derivative_file,
+    is_fingerprinted_asset
+)
+from helper_scripts.convert_markdown import load_build_manifest
+from helper_scripts.file_utils import hash_file, link_or_copy
+from helper_scripts.galleries import load_gallery_index
+from helper_scripts.generate_index import load_listing_hashes
+from helper_scripts.image_derivatives import find_source_images
+from helper_scripts.static_cache import get_file_signature
+from helper_scripts.tracing import span
+
+
+DOCS_DIR = "docs"
+STATIC_DIR = "docs/static"
+ASSET_MANIFEST_FILE = "docs/static/asset-manifest.json"
+ASSET_STATE_FILE = ".build/assets.json"
+FINGERPRINTED_SUFFIXES = ('.css', '.js')
+
+# Attribute values that can hold asset URLs
+URL_ATTRIBUTE_PATTERN = re.compile(
+    r'(\b(?:href|src|srcset)\s*=\s*)("[^"]*"|\'[^\']*\')', re.IGNORECASE
+)
+STATIC_URL_PATTERN = re.compile(
+    r'(?<=["\'\s,])((?:\.\./)*|/)static/([\w./-]+)'
+)
+
+# Page parts whose whitespace is significant or that are not HTML
+HTML_PRESERVE_PATTERN = re.compile(
+    r'(<(pre|textarea|script|style)\b.*?</\2\s*>)',
+    re.IGNORECASE | re.DOTALL
+)
+HTML_COMMENT_PATTERN = re.compile(r'<!--(?!\[if).*?-->', re.DOTALL)
+LINE_BREAK_SPACE_PATTERN = re.compile(r'\s*\n\s*')
+SPACE_RUN_PATTERN = re.compile(r'[ \t]{2,}')
+
+# CSS strings are kept as they are; comments and spacing are dropped
+CSS_TOKEN_PATTERN = re.compile(
+    r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')'
+    r'|(/\*.*?\*/)'
+    r'|(\s*[{};,>]\s*)'
+    r'|(\s+)',
+    re.DOTALL
+)
+
+
+def minify_css(css):
+    """Remove comments and unneeded whitespace from a stylesheet.
+
+    Args:
+        css: Stylesheet text.
+
+    Returns:
+        Minified stylesheet text.
+    """
+    def replace(match):
+        string, comment, punctuation, _ = match.groups()
+        if string is not None:
+            return string
+        if comment is not None:
+            return ''
+        if punctuation is not None:
+            return punctuation.strip()
+        return ' '
+
+    return CSS_TOKEN_PATTERN.sub(replace, css).replace(';}', '}').strip()
+
+
+def minify_html(page):
+    """Remove comments and collapse whitespace in an HTML page.
+
+    Whitespace runs are collapsed rather than removed, so the rendered
+    page is unchanged. <pre>, <textarea>, <script> and <style> elements
+    are left as they are.
+
+    Args:
+        page: HTML text.
+
+    Returns:
+        Minified HTML text.
+    """
+    pieces = []
+
+    for index, piece in enumerate(HTML_PRESERVE_PATTERN.split(page)):
+        # split() yields text, element, tag name, text, ...
+        if index % 3 == 1:
+            pieces.append(piece)
+        elif index % 3 == 0:
+            piece = HTML_COMMENT_PATTERN.sub('', piece)
+            piece = LINE_BREAK_SPACE_PATTERN.sub('\n', piece)
+            pieces.append(SPACE_RUN_PATTERN.sub(' ', piece))
+
+    return ''.join(pieces).strip() + '\n'
+
+
+def load_asset_state(state_file=ASSET_STATE_FILE):
+    """Load the fingerprints and page records of the last run.
+
+    Args:
+        state_file: Path to the state JSON file.
+
+    Returns:
+        Dict with 'assets' (asset path → signature and fingerprint) and
+        'pages' (page path → signature and referenced assets).
+    """
+    try:
+        with open(state_file, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        state = {}
+
+    state.setdefault('assets', {})
+    state.setdefault('pages', {})
+    return state
+
+
+def _write_json(path, data):
+    """Atomically write data as JSON to path."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    temp_path = path.with_suffix(path.suffix + '.tmp')
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=1, sort_keys=True)
+    os.replace(temp_path, path)
+
+
+def find_assets(static_dir=STATIC_DIR):
+    """Find the assets that are fingerprinted.
+
+    Args:
+        static_dir: Directory of static assets.
+
+    Returns:
+        Sorted list of asset paths relative to static_dir (e.g.
+        "styles.css", "media/pups.jpg").
+    """
+    static_path = Path(static_dir)
+    if not static_path.exists():
+        return []
+
+    assets = [
+        path.name for path in static_path.iterdir()
+        if path.is_file()
+        and path.suffix in FINGERPRINTED_SUFFIXES
+        and not is_fingerprinted_asset(path.name)
+    ]
+    assets.extend(
+        f"media/{path.name}"
+        for path in find_source_images(static_path / "media")
+        if not is_content_addressed_media(path.name)
+        and not is_derivative_file(path.name)
+    )
+
+    return sorted(assets)
+
+
+def fingerprint_asset(asset, static_dir=STATIC_DIR):
+    """Write the fingerprinted copy of an asset.
+
+    Args:
+        asset: Asset path relative to static_dir.
+        static_dir: Directory of static assets.
+
+    Returns:
+        Fingerprinted path relative to static_dir.
+    """
+    source = Path(static_dir) / asset
+
+    if asset.startswith('media/'):
+        digest = hash_file(source)[:MEDIA_HASH_LENGTH]
+        fingerprinted = f"media/{digest}{source.suffix.lower()}"
+        destination = Path(static_dir) / fingerprinted
+        if not destination.exists():
+            link_or_copy(source, destination, hardlink=False)
+        return fingerprinted
+
+    data = source.read_bytes()
+    if source.suffix == '.css':
+        data = minify_css(data.decode('utf-8')).encode('utf-8')
+
+    digest = hashlib.sha256(data).hexdigest()[:ASSET_HASH_LENGTH]
+    fingerprinted = str(
+        Path(asset).with_name(f"{source.stem}.{digest}{source.suffix}")
+    )
+    destination = Path(static_dir) / fingerprinted
+
+    if not destination.exists():
+        temp_path = destination.with_name(destination.name + '.tmp')
+        temp_path.write_bytes(data)
+        os.replace(temp_path, destination)
+
+    return fingerprinted
+
+
+def rewrite_asset_urls(page, fingerprints, previous_names):
+    """Point a page's asset references at their fingerprinted names.
+
+    Args:
+        page: HTML text.
+        fingerprints: Dict mapping asset path to fingerprinted path.
+        previous_names: Dict mapping older fingerprinted paths back to
+                        their asset path.
+
+    Returns:
+        Tuple of (updated HTML, set of asset paths the page references).
+    """
+    referenced = set()
+
+    def replace_url(match):
+        prefix, path = match.groups()
+        asset = previous_names.get(path, path)
+
+        fingerprinted_name = FINGERPRINTED_NAME_PATTERN.match(
+            Path(asset).name
+        )
+        if fingerprinted_name:
+            asset = str(Path(asset).with_name(
+                fingerprinted_name.group(1) + fingerprinted_name.group(2)
+            ))
+
+        if asset not in fingerprints:
+            return match.group(0)
+
+        referenced.add(asset)
+        return f"{prefix}static/{fingerprints[asset]}"
+
+    def replace_attribute(match):
+        name, value = match.groups()
+        return name + STATIC_URL_PATTERN.sub(replace_url, value)
+
+    return URL_ATTRIBUTE_PATTERN.sub(replace_attribute, page), referenced
+
+
+def find_pages(docs_dir=DOCS_DIR):
+    """Find the HTML pages of the built site.
+
+    Args:
+        docs_dir: Root of the built site.
+
+    Returns:
+        Sorted list of page path strings (docs/static is skipped).
+    """
+    static_path = Path(docs_dir) / "static"
+
+    return sorted(
+        str(path) for path in Path(docs_dir).rglob('*.html')
+        if static_path not in path.parents
+    )
+
+
+def get_generated_pages():
+    """Return the pages the build writes (notes, listings, galleries).
+
+    Returns:
+        Set of page path strings.
+    """
+    return (
+        set(load_build_manifest()['outputs'])
+        | set(load_listing_hashes())
+        | set(load_gallery_index()['pages'])
+    )
+
+
+def fingerprint_assets(docs_dir=DOCS_DIR, static_dir=STATIC_DIR,
+                       minify=True):
+    """Fingerprint assets and rewrite the pages that reference them.
+
+    Args:
+        docs_dir: Root of the built site.
+        static_dir: Directory of static assets.
+        minify: If True, minify generated pages.
+
+    Returns:
+        Dict with fingerprinted asset and rewritten page counts.
+    """
+    state = load_asset_state()
+    previous_assets = state['assets']
+    assets = {}
+    changed_assets = set()
+
+    with span("fingerprint assets") as args:
+        for asset in find_assets(static_dir):
+            signature = list(get_file_signature(Path(static_dir) / asset))
+            record = previous_assets.get(asset)
+
+            if (record is not None
+                    and record['signature'] == signature
+                    and (Path(static_dir) / record['fingerprint']).exists()):
+                assets[asset] = record
+                continue
+
+            assets[asset] = {
+                'signature': signature,
+                'fingerprint': fingerprint_asset(asset, static_dir)
+            }
+            if (record is None
+                    or record['fingerprint'] != assets[asset]['fingerprint']):
+                changed_assets.add(asset)
+
+        changed_assets |= previous_assets.keys() - assets.keys()
+        args['changed'] = len(changed_assets)
+
+    fingerprints = {
+        asset: record['fingerprint'] for asset, record in assets.items()
+    }
+    previous_names = {
+        record['fingerprint']: asset
+        for asset, record in previous_assets.items()
+    }
+
+    generated_pages = get_generated_pages() if minify else set()
+    pages = {}
+    rewritten_count = 0
+
+    with span("rewrite asset references") as args:
+        for page_path in find_pages(docs_dir):
+            record = state['pages'].get(page_path)
+            signature = list(get_file_signature(page_path))
+
+            if (record is not None
+                    and record['signature'] == signature
+                    and not changed_assets & set(record['assets'])):
+                pages[page_path] = record
+                continue
+
+            with open(page_path, 'r', encoding='utf-8') as f:
+                page = f.read()
+
+            updated, referenced = rewrite_asset_urls(
+                page, fingerprints, previous_names
+            )
+            if page_path in generated_pages:
+                updated = minify_html(updated)
+
+            if updated != page:
+                temp_path = page_path + '.tmp'
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    f.write(updated)
+                os.replace(temp_path, page_path)
+                rewritten_count += 1
+
+            pages[page_path] = {
+                'signature': list(get_file_signature(page_path)),
+                'assets': sorted(referenced)
+            }
+
+        args['rewritten'] = rewritten_count
+
+    _prune_fingerprints(previous_assets, fingerprints, static_dir)
+
+    manifest = dict(sorted(fingerprints.items()))
+    try:
+        with open(ASSET_MANIFEST_FILE, 'r', encoding='utf-8') as f:
+            manifest_changed = json.load(f) != manifest
+    except (OSError, ValueError):
+        manifest_changed = True
+    if manifest_changed:
+        _write_json(ASSET_MANIFEST_FILE, manifest)
+
+    _write_json(ASSET_STATE_FILE, {'assets': assets, 'pages': pages})
+
+    print(
+        f"✓ Fingerprinted {len(changed_assets)} changed asset(s), "
+        f"rewrote {rewritten_count} page(s)"
+    )
+
+    return {'assets': len(changed_assets), 'pages': rewritten_count}
+
+
+def _prune_fingerprints(previous_assets, fingerprints, static_dir):
+    """Delete stylesheet and script fingerprints no longer in use.
+
+    Image fingerprints are content-addressed names that published notes
+    may also use, so they are kept.
+    """
+    current = set(fingerprints.values())
+
+    for record in previous_assets.values():
+        fingerprinted = record['fingerprint']
+        if fingerprinted in current or fingerprinted.startswith('media/'):
+            continue
+        (Path(static_dir) / fingerprinted).unlink(missing_ok=True)
+
+
+if __name__ == "__main__":
+    fingerprint_assets()
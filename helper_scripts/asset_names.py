@@ -0,0 +1,66 @@
+"""Content-Addressed File Names.
+
+Name schemes of the files the build writes under a content hash, and the
+predicates that recognize them. Kept free of build-pipeline imports so
+the development server can choose cache headers without loading the
+pipeline.
+
+    static/media/<16 hex digits>.<ext>               published image
+    static/media/derived/<16 hex digits>-<w>w.<ext>  image derivative
+    static/<name>.<12 hex digits>.css|.js            fingerprinted asset
+"""
+
+import re
+
+
+# Published images are named <first MEDIA_HASH_LENGTH hex digits><suffix>
+MEDIA_HASH_LENGTH = 16
+DERIVATIVE_HASH_LENGTH = 16
+ASSET_HASH_LENGTH = 12
+
+CONTENT_ADDRESSED_NAME_PATTERN = re.compile(
+    rf'^[0-9a-f]{{{MEDIA_HASH_LENGTH}}}\.[A-Za-z0-9]+$'
+)
+DERIVATIVE_NAME_PATTERN = re.compile(
+    rf'^[0-9a-f]{{{DERIVATIVE_HASH_LENGTH}}}-\d+w\.[a-z]+$'
+)
+# styles.3f2a9c1b7d4e.css → groups ('styles', '.css')
+FINGERPRINTED_NAME_PATTERN = re.compile(
+    rf'^(.+)\.[0-9a-f]{{{ASSET_HASH_LENGTH}}}(\.(?:css|js))$'
+)
+
+
+def is_content_addressed_media(filename):
+    """Return True if a filename is a content-addressed media name.
+
+    Args:
+        filename: Filename (not a path).
+
+    Returns:
+        Boolean.
+    """
+    return bool(CONTENT_ADDRESSED_NAME_PATTERN.match(filename))
+
+
+def is_derivative_file(filename):
+    """Return True if a filename is a generated derivative name.
+
+    Args:
+        filename: Filename (not a path).
+
+    Returns:
+        Boolean.
+    """
+    return bool(DERIVATIVE_NAME_PATTERN.match(filename))
+
+
+def is_fingerprinted_asset(filename):
+    """Return True if a filename is a fingerprinted stylesheet or script.
+
+    Args:
+        filename: Filename (not a path).
+
+    Returns:
+        Boolean.
+    """
+    return bool(FINGERPRINTED_NAME_PATTERN.match(filename))
@@ -0,0 +1,825 @@
+"""Build Dependency Graph and Scheduler.
+
+Models the site build as a graph of tasks, each with the files it reads,
+the files it writes and the tasks it depends on:
+
+    convert:<note>  note markdown + template    → current, re-wrapped or
+                                                  restored page, or a
+                                                  queued render job
+    render          all convert tasks           → queued pages, rendered
+                                                  in one batch
+    save-manifest   render                      → build manifest, notes index
+    galleries       gallery manifests, photos   → gallery pages
+    images          published media, all pages  → derivatives, <img> tags
+    index           notes metadata, other pages → index and archive pages
+    assets          images, index, CSS/JS/media → fingerprinted assets,
+                                                  minified pages
+    search          assets                      → search shards
+    compress        all of the above, assets    → pre-compressed variants
+    release         compress                    → served site snapshot
+
+The (mtime, size) of every task's inputs is saved in .build/graph.json.
+On the next build, a task is dirty if it is new, an input changed or
+was added or removed, its config (e.g. the Pillow version the images
+task ran with) changed, an output is missing, or a task it depends on is
+dirty. Only dirty tasks run, on a thread pool that starts each task as
+soon as its dependencies finish. Outputs of tasks that no longer exist
+(e.g. the HTML of a deleted note) are removed, and the build reports its
+critical path: the chain of dependent tasks that bounded the wall time.
+A convert task whose note only needs the new template re-wraps its
+saved fragment, and one whose page is in the render cache
+(render_cache.py) restores it, instead of running the renderer. Notes
+that do need rendering are handed to render_files() together, so the
+pandoc-batch backend converts them in a few Pandoc processes.
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from helper_scripts.asset_fingerprints import (
+    ASSET_MANIFEST_FILE,
+    fingerprint_assets
+)
+from helper_scripts.asset_names import is_fingerprinted_asset
+from helper_scripts.convert_markdown import (
+    BUILD_MANIFEST_FILE,
+    HTML_TEMPLATE_FILE,
+    MARKDOWN_DIR,
+    get_build_inputs,
+    get_default_worker_count,
+    get_html_output_path,
+    is_output_current,
+    load_build_manifest,
+    prune_orphaned_outputs,
+    record_conversion,
+    rewrap_page,
+    save_build_manifest
+)
+from helper_scripts.file_utils import hash_file
+from helper_scripts.galleries import (
+    build_galleries,
+    find_gallery_manifests,
+    get_gallery_inputs,
+    get_gallery_output_path
+)
+from helper_scripts.generate_index import (
+    INDEX_FILE,
+    INDEX_PAGE_SIZE,
+    main as generate_index
+)
+from helper_scripts.image_derivatives import (
+    apply_responsive_images,
+    build_image_derivatives,
+    find_source_images,
+    get_pillow_version
+)
+from helper_scripts.notes_index import (
+    NOTES_INDEX_FILE,
+    load_notes_index,
+    save_notes_index,
+    update_note_entry
+)
+from helper_scripts.releases import CURRENT_RELEASE_LINK, create_release
+from helper_scripts.render_cache import (
+    format_cache_stats,
+    get_render_key,
+    restore_rendered_page,
+    store_rendered_page,
+    trim_render_cache
+)
+from helper_scripts.renderers import (
+    get_fragment_path,
+    get_renderer_options,
+    render_files,
+    resolve_renderer
+)
+from helper_scripts.search_index import SEARCH_DIR, build_search_index
+from helper_scripts.static_cache import (
+    COMPRESSIBLE_SUFFIXES,
+    compress_static_files
+)
+from helper_scripts.tracing import profile, span
+
+
+BUILD_GRAPH_FILE = ".build/graph.json"
+PAGES_DIR = "docs/pages"
+STATIC_DIR = "docs/static"
+
+
+@dataclass
+class BuildTask:
+    """A unit of build work.
+
+    Attributes:
+        name: Unique task name (e.g. "convert:my-note").
+        action: Callable run with no arguments when the task is dirty.
+        inputs: Files whose changes make the task dirty.
+        outputs: Files the task writes; a missing output makes it dirty.
+        deps: Names of tasks that must finish first.
+        config: JSON value for non-file inputs (e.g. a tool version);
+                a change makes the task dirty.
+    """
+
+    name: str
+    action: object
+    inputs: list = field(default_factory=list)
+    outputs: list = field(default_factory=list)
+    deps: list = field(default_factory=list)
+    config: object = None
+
+
+def load_graph_state(graph_file=BUILD_GRAPH_FILE):
+    """Load the task records saved by the last build.
+
+    Args:
+        graph_file: Path to the graph JSON file.
+
+    Returns:
+        Dict with a 'tasks' mapping of task name to inputs (path →
+        [mtime_ns, size]), outputs and duration.
+    """
+    try:
+        with open(graph_file, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return {'tasks': {}}
+
+    state.setdefault('tasks', {})
+    return state
+
+
+def save_graph_state(state, graph_file=BUILD_GRAPH_FILE):
+    """Atomically write the task records to disk.
+
+    Args:
+        state: Dict as returned by load_graph_state().
+        graph_file: Path to the graph JSON file.
+    """
+    graph_path = Path(graph_file)
+    graph_path.parent.mkdir(parents=True, exist_ok=True)
+
+    temp_path = graph_path.with_suffix(graph_path.suffix + '.tmp')
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=1, sort_keys=True)
+    os.replace(temp_path, graph_path)
+
+
+def get_input_signatures(paths):
+    """Return the [mtime_ns, size] of each path, or None if missing.
+
+    Args:
+        paths: Iterable of file paths.
+
+    Returns:
+        Dict mapping path string to signature list or None.
+    """
+    signatures = {}
+
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            signatures[str(path)] = None
+            continue
+        signatures[str(path)] = [stat.st_mtime_ns, stat.st_size]
+
+    return signatures
+
+
+def get_topological_order(tasks):
+    """Order tasks so every task comes after its dependencies.
+
+    Args:
+        tasks: Dict mapping task name to BuildTask.
+
+    Returns:
+        List of task names.
+
+    Raises:
+        ValueError: If a dependency is unknown or the graph has a cycle.
+    """
+    remaining = {}
+    dependents = {name: [] for name in tasks}
+
+    for name, task in tasks.items():
+        for dep in task.deps:
+            if dep not in tasks:
+                raise ValueError(f"Task {name} depends on unknown task {dep}")
+            dependents[dep].append(name)
+        remaining[name] = len(task.deps)
+
+    ready = sorted(name for name, count in remaining.items() if count == 0)
+    order = []
+
+    while ready:
+        name = ready.pop()
+        order.append(name)
+        for dependent in dependents[name]:
+            remaining[dependent] -= 1
+            if remaining[dependent] == 0:
+                ready.append(dependent)
+
+    if len(order) != len(tasks):
+        cycle = sorted(name for name, count in remaining.items() if count)
+        raise ValueError(f"Build graph has a cycle through: {cycle}")
+
+    return order
+
+
+def get_dirty_tasks(tasks, state, changed_paths=None, rerun=()):
+    """Return the tasks that need to run.
+
+    Args:
+        tasks: Dict mapping task name to BuildTask.
+        state: Dict from load_graph_state().
+        changed_paths: Optional set of paths known to have changed; tasks
+                       reading them are dirty even if their signatures
+                       look unchanged.
+        rerun: Names of tasks to run even if they are up to date.
+
+    Returns:
+        Set of dirty task names.
+    """
+    changed_paths = {str(path) for path in changed_paths or ()}
+    dirty = set()
+
+    for name in get_topological_order(tasks):
+        task = tasks[name]
+        record = state['tasks'].get(name)
+        signatures = get_input_signatures(task.inputs)
+
+        if (record is None
+                or name in rerun
+                or record.get('inputs') != signatures
+                or record.get('config') != task.config
+                or changed_paths & signatures.keys()
+                or any(dep in dirty for dep in task.deps)
+                or not all(Path(output).exists()
+                           for output in task.outputs)):
+            dirty.add(name)
+
+    return dirty
+
+
+def run_tasks(tasks, dirty, workers):
+    """Run dirty tasks in parallel, each once its dependencies finish.
+
+    A failed task's dependents are skipped.
+
+    Args:
+        tasks: Dict mapping task name to BuildTask.
+        dirty: Set of task names to run.
+        workers: Maximum number of tasks running at once.
+
+    Returns:
+        Dict mapping task name to a dict with status ('done', 'failed' or
+        'skipped'), duration in seconds and error.
+    """
+    results = {}
+    waiting = {
+        name: {dep for dep in tasks[name].deps if dep in dirty}
+        for name in dirty
+    }
+
+    def run(name):
+        start_time = time.perf_counter()
+        # Profiled on the worker thread, per category ("convert", ...)
+        with profile(name.split(':')[0]), span(name, "task"):
+            tasks[name].action()
+        return time.perf_counter() - start_time
+
+    def skip_dependents(name):
+        for other, deps in list(waiting.items()):
+            # A dependent reached through another path is already skipped
+            if name in deps and other in waiting:
+                del waiting[other]
+                results[other] = {
+                    'status': 'skipped', 'duration': 0.0,
+                    'error': f"{name} failed"
+                }
+                skip_dependents(other)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        running = {}
+
+        while waiting or running:
+            for name in sorted(name for name, deps in waiting.items()
+                               if not deps):
+                del waiting[name]
+                running[executor.submit(run, name)] = name
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                name = running.pop(future)
+                try:
+                    results[name] = {
+                        'status': 'done', 'duration': future.result(),
+                        'error': None
+                    }
+                except Exception as e:
+                    print(f"✗ {name} failed: {e}")
+                    results[name] = {
+                        'status': 'failed', 'duration': 0.0, 'error': str(e)
+                    }
+                    skip_dependents(name)
+                    continue
+
+                for deps in waiting.values():
+                    deps.discard(name)
+
+    return results
+
+
+def get_critical_path(tasks, results):
+    """Find the chain of dependent tasks with the longest total duration.
+
+    Args:
+        tasks: Dict mapping task name to BuildTask.
+        results: Dict from run_tasks().
+
+    Returns:
+        Tuple of (list of task names in run order, total seconds).
+    """
+    finish = {}
+    previous = {}
+
+    for name in get_topological_order(tasks):
+        if name not in results:
+            continue
+
+        ran_deps = [dep for dep in tasks[name].deps if dep in finish]
+        slowest = max(ran_deps, key=finish.get, default=None)
+        previous[name] = slowest
+        finish[name] = (
+            results[name]['duration'] + (finish[slowest] if slowest else 0.0)
+        )
+
+    if not finish:
+        return [], 0.0
+
+    name = max(finish, key=finish.get)
+    total = finish[name]
+    path = []
+    while name is not None:
+        path.append(name)
+        name = previous[name]
+
+    return list(reversed(path)), total
+
+
+def create_build_graph(context):
+    """Create the site's build tasks.
+
+    Args:
+        context: Dict shared by the task actions (see run_build()).
+
+    Returns:
+        Dict mapping task name to BuildTask.
+    """
+    tasks = {}
+    convert_names = []
+    converted_outputs = set()
+
+    for markdown_file in sorted(Path(MARKDOWN_DIR).rglob('*.md')):
+        html_output_path = get_html_output_path(markdown_file)
+        name = f"convert:{markdown_file.stem}"
+
+        tasks[name] = BuildTask(
+            name=name,
+            action=lambda name=name, md=markdown_file, out=html_output_path:
+                _convert_note(context, name, md, out),
+            inputs=[str(markdown_file), HTML_TEMPLATE_FILE],
+            outputs=[str(html_output_path)]
+        )
+        convert_names.append(name)
+        converted_outputs.add(str(html_output_path))
+
+    gallery_manifests = find_gallery_manifests()
+    gallery_outputs = [
+        str(get_gallery_output_path(path)) for path in gallery_manifests
+    ]
+
+    other_pages = sorted(
+        str(path) for path in Path(PAGES_DIR).rglob('*.html')
+        if str(path) not in converted_outputs
+        and str(path) not in gallery_outputs
+    ) if Path(PAGES_DIR).exists() else []
+
+    static_assets = sorted(
+        str(path) for path in Path(STATIC_DIR).glob('*')
+        if path.is_file() and path.suffix in COMPRESSIBLE_SUFFIXES
+    ) if Path(STATIC_DIR).exists() else []
+
+    tasks['render'] = BuildTask(
+        name='render',
+        action=lambda: _render_notes(context),
+        deps=convert_names
+    )
+    tasks['save-manifest'] = BuildTask(
+        name='save-manifest',
+        action=lambda: _save_manifest(context),
+        outputs=[BUILD_MANIFEST_FILE, NOTES_INDEX_FILE],
+        deps=['render']
+    )
+    tasks['galleries'] = BuildTask(
+        name='galleries',
+        action=build_galleries,
+        inputs=[
+            path for manifest_path in gallery_manifests
+            for path in get_gallery_inputs(manifest_path)
+        ],
+        outputs=gallery_outputs
+    )
+    tasks['images'] = BuildTask(
+        name='images',
+        action=lambda: (build_image_derivatives(), apply_responsive_images()),
+        inputs=[str(path) for path in find_source_images()] + other_pages,
+        deps=['save-manifest', 'galleries'],
+        # Installing Pillow later must produce the skipped derivatives
+        config={'pillow': get_pillow_version()}
+    )
+    tasks['index'] = BuildTask(
+        name='index',
+        action=lambda: generate_index(page_size=context['index_page_size']),
+        inputs=other_pages,
+        outputs=[INDEX_FILE],
+        deps=['save-manifest', 'galleries']
+    )
+    tasks['assets'] = BuildTask(
+        name='assets',
+        action=fingerprint_assets,
+        inputs=[
+            path for path in static_assets
+            if not is_fingerprinted_asset(Path(path).name)
+            and path != ASSET_MANIFEST_FILE
+        ] + tasks['images'].inputs,
+        outputs=[ASSET_MANIFEST_FILE],
+        deps=['images', 'index']
+    )
+    tasks['search'] = BuildTask(
+        name='search',
+        action=build_search_index,
+        outputs=[str(Path(SEARCH_DIR) / "meta.json")],
+        deps=['assets']
+    )
+    tasks['compress'] = BuildTask(
+        name='compress',
+        action=compress_static_files,
+        inputs=static_assets,
+        deps=['images', 'index', 'assets', 'search']
+    )
+    tasks['release'] = BuildTask(
+        name='release',
+        action=_release,
+        outputs=[CURRENT_RELEASE_LINK],
+        deps=['compress']
+    )
+
+    return tasks
+
+
+def _convert_note(context, name, markdown_file, html_output_path):
+    """Bring one note's page up to date, or queue it for rendering.
+
+    Pages the build manifest says are current are left alone, pages
+    whose template alone changed are re-wrapped and pages in the render
+    cache are restored. Other notes are queued for the render task.
+    """
+    build_inputs = get_build_inputs(
+        markdown_file, context['template_hash'], context['renderer_version']
+    )
+
+    with context['lock']:
+        entry = context['manifest']['outputs'].get(str(html_output_path))
+
+    if not context['force'] and is_output_current(
+        entry, build_inputs, html_output_path
+    ):
+        with context['lock']:
+            context['notes_index_changed'] |= update_note_entry(
+                context['notes_index'], markdown_file, html_output_path,
+                build_inputs['source_hash']
+            )
+        return
+
+    html_output_path.parent.mkdir(parents=True, exist_ok=True)
+    render_key = get_render_key(build_inputs, context['renderer_options'])
+    rewrapped = restored = False
+
+    if not context['force']:
+        rewrapped = rewrap_page(
+            html_output_path, entry, build_inputs,
+            context['renderer_options'], context['template_text']
+        )
+        restored = not rewrapped and restore_rendered_page(
+            render_key, html_output_path, get_fragment_path(html_output_path)
+        )
+
+    if rewrapped:
+        print(f"Re-wrapped {html_output_path} in the new template")
+        store_rendered_page(
+            render_key, html_output_path, get_fragment_path(html_output_path)
+        )
+    elif restored:
+        print(f"Restored {html_output_path} from the render cache")
+    else:
+        with context['lock']:
+            context['render_queue'].append(
+                (name, markdown_file, html_output_path, build_inputs,
+                 render_key)
+            )
+        return
+
+    with context['lock']:
+        context['notes_index_changed'] |= record_conversion(
+            context['manifest'], context['notes_index'], markdown_file,
+            html_output_path, build_inputs
+        )
+        context['converted_count'] += 1
+        if rewrapped:
+            context['rewrapped_count'] += 1
+        else:
+            context['cache_hits'] += 1
+
+
+def _render_notes(context):
+    """Render every note the convert tasks queued in one batch.
+
+    Notes that fail to render are recorded in context['failed_converts']
+    so their convert tasks are not saved as done.
+
+    Raises:
+        RuntimeError: If any note failed to render.
+    """
+    queued = {
+        str(item[2]): item
+        for item in sorted(context['render_queue'], key=lambda item: item[0])
+    }
+    jobs = [(item[1], item[2]) for item in queued.values()]
+    failed = []
+
+    for markdown_file, html_output_path, success in render_files(
+        jobs, context['renderer'], HTML_TEMPLATE_FILE, context['workers']
+    ):
+        name, _, _, build_inputs, render_key = queued[str(html_output_path)]
+
+        if not success:
+            failed.append(name)
+            continue
+
+        print(f"Converted {markdown_file} to {html_output_path}")
+        store_rendered_page(
+            render_key, html_output_path, get_fragment_path(html_output_path)
+        )
+
+        with context['lock']:
+            context['notes_index_changed'] |= record_conversion(
+                context['manifest'], context['notes_index'], markdown_file,
+                html_output_path, build_inputs
+            )
+            context['converted_count'] += 1
+            context['cache_misses'] += 1
+
+    if failed:
+        context['failed_converts'].update(failed)
+        raise RuntimeError(f"Could not convert {len(failed)} note(s)")
+
+
+def _save_manifest(context):
+    """Write the build manifest and, if it changed, the notes index."""
+    save_build_manifest(context['manifest'])
+    if context['notes_index_changed']:
+        save_notes_index(context['notes_index'])
+
+
+def _release():
+    """Snapshot the finished build and swap it in for serving."""
+    result = create_release()
+    print(
+        f"✓ Serving release {result['release']} ({result['linked']} "
+        f"file(s) shared with the previous release, "
+        f"{result['copied']} copied)"
+    )
+
+
+def prune_stale_outputs(tasks, state, context):
+    """Delete outputs of tasks that no longer exist.
+
+    Covers HTML whose markdown was removed or renamed, both from the
+    previous graph and from the build manifest.
+
+    Args:
+        tasks: Current tasks.
+        state: Dict from load_graph_state().
+        context: Build context holding the manifest and notes index.
+
+    Returns:
+        List of removed output paths.
+    """
+    current_outputs = {
+        output for task in tasks.values() for output in task.outputs
+    }
+    removed = prune_orphaned_outputs(
+        context['manifest'], context['notes_index']
+    )
+
+    for name, record in state['tasks'].items():
+        if name in tasks:
+            continue
+        for output in record.get('outputs', ()):
+            if output in current_outputs or output in removed:
+                continue
+            if Path(output).exists():
+                Path(output).unlink()
+                removed.append(output)
+            if name.startswith('convert:'):
+                get_fragment_path(output).unlink(missing_ok=True)
+            context['notes_index'].pop(output, None)
+
+    if removed:
+        context['notes_index_changed'] = True
+
+    return removed
+
+
+def run_build(changed_paths=None, force=False, workers=None, renderer=None,
+              dry_run=False, rerun=(), index_page_size=INDEX_PAGE_SIZE):
+    """Build the site, running only the tasks affected by changes.
+
+    Args:
+        changed_paths: Optional set of paths known to have changed.
+        force: If True, run every task and reconvert every note,
+               bypassing the render cache.
+        workers: Maximum concurrent tasks. Defaults to the CPU count.
+        renderer: Renderer backend name (see renderers.RENDERERS).
+        dry_run: If True, print the dirty tasks without running them.
+        rerun: Names of tasks to run even if they are up to date; their
+               dependents run too (e.g. {'index'} also refingerprints,
+               recompresses and releases the site).
+        index_page_size: Notes per listing page for the index task.
+
+    Returns:
+        Dict with tasks (total), ran, failed, skipped, converted,
+        rewrapped, cache_hits, cache_misses and removed counts, the
+        critical path and the elapsed seconds. Converted counts notes
+        re-wrapped or restored from the render cache as well as
+        rendered ones.
+    """
+    renderer, renderer_version = resolve_renderer(renderer)
+    if workers is None:
+        workers = get_default_worker_count()
+
+    context = {
+        'renderer': renderer,
+        'renderer_version': renderer_version,
+        'renderer_options': get_renderer_options(renderer),
+        'template_hash': hash_file(HTML_TEMPLATE_FILE),
+        'template_text': Path(HTML_TEMPLATE_FILE).read_text(
+            encoding='utf-8'
+        ),
+        'force': force,
+        'manifest': load_build_manifest(),
+        'notes_index': load_notes_index(),
+        'notes_index_changed': False,
+        'converted_count': 0,
+        'rewrapped_count': 0,
+        'cache_hits': 0,
+        'cache_misses': 0,
+        'render_queue': [],
+        'failed_converts': set(),
+        'workers': workers,
+        'index_page_size': index_page_size,
+        'lock': threading.Lock()
+    }
+
+    with span("plan build") as args:
+        state = load_graph_state()
+        tasks = create_build_graph(context)
+        dirty = get_dirty_tasks(tasks, state, changed_paths, rerun)
+        if force:
+            dirty = set(tasks)
+        args['tasks'] = len(tasks)
+        args['dirty'] = len(dirty)
+
+    print(f"Build plan: {len(dirty)} of {len(tasks)} task(s) to run")
+
+    if dry_run:
+        for name in get_topological_order(tasks):
+            if name in dirty:
+                print(f"  - {name}")
+        return {'tasks': len(tasks), 'ran': 0, 'failed': 0, 'skipped': 0,
+                'converted': 0, 'rewrapped': 0, 'cache_hits': 0,
+                'cache_misses': 0, 'removed': 0, 'critical_path': [],
+                'elapsed': 0.0}
+
+    removed = prune_stale_outputs(tasks, state, context)
+    for output in removed:
+        print(f"Removed {output} (no longer produced by the build)")
+    if removed:
+        dirty |= {
+            'save-manifest', 'images', 'index', 'assets', 'search',
+            'compress', 'release'
+        }
+
+    start_time = time.perf_counter()
+    results = run_tasks(tasks, dirty, workers)
+    elapsed = time.perf_counter() - start_time
+
+    for name in context['failed_converts']:
+        results[name] = {
+            'status': 'failed', 'duration': results[name]['duration'],
+            'error': "render failed"
+        }
+
+    # Conversions only reach the build manifest through save-manifest
+    manifest_saved = results.get(
+        'save-manifest', {'status': 'done'}
+    )['status'] == 'done'
+
+    for name, result in results.items():
+        if result['status'] == 'done' and (
+                manifest_saved or not name.startswith('convert:')):
+            # Re-read signatures so inputs a later task rewrote (e.g. pages
+            # given responsive <img> tags) do not look changed next time.
+            state['tasks'][name] = {
+                'inputs': get_input_signatures(tasks[name].inputs),
+                'config': tasks[name].config,
+                'outputs': tasks[name].outputs,
+                'duration': round(result['duration'], 6)
+            }
+        else:
+            state['tasks'].pop(name, None)
+
+    for name in list(state['tasks']):
+        if name not in tasks:
+            del state['tasks'][name]
+
+    save_graph_state(state)
+
+    statuses = [result['status'] for result in results.values()]
+    critical_path, critical_seconds = get_critical_path(tasks, results)
+
+    summary = {
+        'tasks': len(tasks),
+        'ran': statuses.count('done'),
+        'failed': statuses.count('failed'),
+        'skipped': statuses.count('skipped'),
+        'converted': context['converted_count'],
+        'rewrapped': context['rewrapped_count'],
+        'cache_hits': context['cache_hits'],
+        'cache_misses': context['cache_misses'],
+        'removed': len(removed),
+        'critical_path': critical_path,
+        'elapsed': elapsed
+    }
+
+    line = f"✓ Ran {summary['ran']} task(s) in {elapsed:.2f}s"
+    if summary['failed'] or summary['skipped']:
+        line += (
+            f", {summary['failed']} failed, {summary['skipped']} skipped"
+        )
+    print(f"{line} ({workers} worker(s))")
+
+    if summary['rewrapped']:
+        print(
+            f"Re-wrapped {summary['rewrapped']} page(s) in the new template "
+            f"without rendering"
+        )
+
+    if summary['cache_hits'] or summary['cache_misses']:
+        trim = trim_render_cache() if summary['cache_misses'] else None
+        print(format_cache_stats(
+            summary['cache_hits'], summary['cache_misses'], trim
+        ))
+
+    if critical_path:
+        print(
+            f"Critical path ({critical_seconds:.2f}s): "
+            + " → ".join(critical_path)
+        )
+
+    return summary
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build the site")
+    parser.add_argument(
+        "--workers", type=int, help="maximum concurrent tasks"
+    )
+    parser.add_argument(
+        "--force", action="store_true", help="run every task"
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true", help="only list the dirty tasks"
+    )
+    args = parser.parse_args()
+
+    run_build(force=args.force, workers=args.workers, dry_run=args.dry_run)
@@ -2,16 +2,232 @@
 
 Converts markdown files to HTML using Pandoc with custom templating.
 Supports both batch conversion of all files and selective file conversion.
+
+A build manifest records the inputs each HTML page was built from, so
+notes whose markdown, template and renderer version are unchanged are
+skipped on the next run. Pending files are rendered with up to N
+concurrent Pandoc processes, or by another backend from renderers.py.
+Each converted note's front matter is recorded in the notes metadata
+index used by generate_index.py. A full conversion also deletes HTML
+pages whose markdown source was removed or renamed.
+
+Rendered pages are also kept in the persistent render cache (see
+render_cache.py), so a note that was rendered before, in this checkout
+or another, is restored with a file copy instead of a renderer run,
+together with its fragment.
+When only the template changed, pages are re-wrapped in-process from
+the body fragment and front matter variables saved with each note.
 """
 
-import subprocess
+import json
+import os
+import time
 from pathlib import Path
 
+from helper_scripts.file_utils import hash_file
+from helper_scripts.notes_index import (
+    load_notes_index,
+    save_notes_index,
+    update_note_entry
+)
+from helper_scripts.render_cache import (
+    format_cache_stats,
+    get_render_key,
+    restore_rendered_page,
+    store_rendered_page,
+    trim_render_cache
+)
+from helper_scripts.renderers import (
+    RENDERERS,
+    can_wrap_fragment,
+    get_fragment_path,
+    get_renderer_options,
+    load_fragment,
+    render_files,
+    render_with_pandoc,
+    resolve_renderer,
+    write_page
+)
+from helper_scripts.tracing import span
+
 
 # Define the base directories used for conversion
 MARKDOWN_DIR = "docs/pages_markdown"
 DOCS_DIR = "docs"
 HTML_TEMPLATE_FILE = "docs/static/template.html"
+BUILD_MANIFEST_FILE = ".build/manifest.json"
+
+
+def load_build_manifest(manifest_file=BUILD_MANIFEST_FILE):
+    """Load the build manifest from disk.
+
+    Args:
+        manifest_file: Path to the manifest JSON file.
+
+    Returns:
+        Dict with an 'outputs' mapping of HTML path to build inputs. An
+        empty manifest is returned if the file is missing or unreadable.
+    """
+    manifest_path = Path(manifest_file)
+
+    if not manifest_path.exists():
+        return {'outputs': {}}
+
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Warning: Could not read build manifest {manifest_file}: {e}")
+        return {'outputs': {}}
+
+    manifest.setdefault('outputs', {})
+    return manifest
+
+
+def save_build_manifest(manifest, manifest_file=BUILD_MANIFEST_FILE):
+    """Write the build manifest to disk atomically.
+
+    Args:
+        manifest: Manifest dict as returned by load_build_manifest().
+        manifest_file: Path to the manifest JSON file.
+    """
+    manifest_path = Path(manifest_file)
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+
+    temp_path = manifest_path.with_suffix(manifest_path.suffix + '.tmp')
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(temp_path, manifest_path)
+
+
+def get_html_output_path(markdown_file):
+    """Return the HTML output path for a markdown file.
+
+    Args:
+        markdown_file: Path to the markdown file.
+
+    Returns:
+        Path to the HTML file under docs/pages/.
+    """
+    output_dir = Path(DOCS_DIR) / "pages"
+    return (output_dir / Path(markdown_file).stem).with_suffix('.html')
+
+
+def is_output_current(entry, build_inputs, html_output_path):
+    """Check whether an output is up to date with its build inputs.
+
+    Args:
+        entry: Manifest entry for the output, or None.
+        build_inputs: Dict of source_hash, template_hash and
+                      renderer_version.
+        html_output_path: Path to the HTML output.
+
+    Returns:
+        True if the output exists and was built from the same inputs.
+    """
+    if entry is None or not Path(html_output_path).exists():
+        return False
+
+    return all(entry.get(key) == value for key, value in build_inputs.items())
+
+
+def get_build_inputs(markdown_file, template_hash, renderer_version):
+    """Return the inputs an HTML page is built from.
+
+    Args:
+        markdown_file: Path to the markdown file.
+        template_hash: Content hash of the HTML template.
+        renderer_version: Version string of the renderer backend.
+
+    Returns:
+        Dict of source_hash, template_hash and renderer_version.
+    """
+    return {
+        'source_hash': hash_file(markdown_file),
+        'template_hash': template_hash,
+        'renderer_version': renderer_version
+    }
+
+
+def record_conversion(manifest, notes_index, markdown_file, html_output_path,
+                      build_inputs):
+    """Record a successful conversion in the manifest and notes index.
+
+    Args:
+        manifest: Build manifest dict, updated in place.
+        notes_index: Notes index dict, updated in place.
+        markdown_file: Path to the markdown file.
+        html_output_path: Path to the HTML output.
+        build_inputs: Dict from get_build_inputs().
+
+    Returns:
+        True if the notes index changed.
+    """
+    manifest['outputs'][str(html_output_path)] = {
+        'source': str(markdown_file),
+        **build_inputs
+    }
+    return update_note_entry(
+        notes_index, markdown_file, html_output_path,
+        build_inputs['source_hash']
+    )
+
+
+def rewrap_page(html_output_path, entry, build_inputs, renderer_options,
+                template_text):
+    """Refill a page's template from its fragment if only it changed.
+
+    Args:
+        html_output_path: Path to the HTML output.
+        entry: Manifest entry for the output, or None.
+        build_inputs: Dict from get_build_inputs().
+        renderer_options: String from renderers.get_renderer_options().
+        template_text: Contents of the HTML template.
+
+    Returns:
+        True if the page was re-wrapped, False if it must be rendered.
+    """
+    if entry is None or any(
+        entry.get(key) != build_inputs[key]
+        for key in ('source_hash', 'renderer_version')
+    ):
+        return False
+
+    fragment = load_fragment(html_output_path)
+
+    if (fragment is None
+            or fragment.get('source_hash') != build_inputs['source_hash']
+            or fragment.get('renderer_options') != renderer_options
+            or not can_wrap_fragment(fragment, template_text)):
+        return False
+
+    write_page(html_output_path, template_text, fragment)
+    return True
+
+
+def prune_orphaned_outputs(manifest, notes_index):
+    """Delete HTML pages whose markdown source no longer exists.
+
+    Args:
+        manifest: Build manifest dict, updated in place.
+        notes_index: Notes index dict, updated in place.
+
+    Returns:
+        List of removed HTML output paths.
+    """
+    removed = []
+
+    for output, entry in list(manifest['outputs'].items()):
+        if Path(entry.get('source', '')).exists():
+            continue
+
+        Path(output).unlink(missing_ok=True)
+        get_fragment_path(output).unlink(missing_ok=True)
+        del manifest['outputs'][output]
+        notes_index.pop(output, None)
+        removed.append(output)
+
+    return removed
 
 
 def convert_markdown_to_html_with_pandoc(markdown_file, html_output_file):
@@ -20,32 +236,53 @@ def convert_markdown_to_html_with_pandoc(markdown_file, html_output_file):
     Args:
         markdown_file: Path to the input markdown file.
         html_output_file: Path where the output HTML file will be saved.
-    """
-    command = [
-        "pandoc",
-        markdown_file,
-        f"--template={HTML_TEMPLATE_FILE}",
-        f"--output={html_output_file}",
-        "--standalone"
-    ]
 
-    try:
-        subprocess.run(command, check=True)
+    Returns:
+        True if the conversion succeeded, False otherwise.
+    """
+    success = render_with_pandoc(
+        markdown_file, html_output_file, HTML_TEMPLATE_FILE
+    )
+    if success:
         print(f"Converted {markdown_file} to {html_output_file}")
-    except subprocess.CalledProcessError as e:
-        print(f"Error: Pandoc command failed with error: {e}")
+    return success
+
 
+def get_default_worker_count():
+    """Return the default number of concurrent Pandoc processes.
 
-def convert_markdown_files(file_list=None):
+    Returns:
+        The CPU count, or 1 if it cannot be determined.
+    """
+    return os.cpu_count() or 1
+
+
+def convert_markdown_files(file_list=None, force=False, workers=None,
+                           renderer=None):
     """Convert markdown files to HTML.
 
+    Files whose source markdown, template and renderer version match the
+    build manifest are skipped unless force is True. Files whose template
+    alone changed are re-wrapped from their saved fragments, files found
+    in the render cache are restored from it, and the remaining files are
+    converted with up to `workers` Pandoc processes running at once.
+    Forcing a rebuild renders every file and refreshes the cache.
+    When converting all files, HTML pages whose markdown source no longer
+    exists are deleted.
+
     Args:
         file_list: Optional list of markdown file paths (str or Path).
                    If None, converts all files in MARKDOWN_DIR.
                    If provided, converts only the specified files.
+        force: If True, rebuild every file regardless of the manifest
+               and the render cache.
+        workers: Maximum number of concurrent Pandoc processes. Defaults
+                 to the CPU count; 1 converts files one at a time.
+        renderer: Renderer backend name (see renderers.RENDERERS). Defaults
+                  to renderers.DEFAULT_RENDERER.
 
     Returns:
-        Number of files successfully converted.
+        Number of files successfully converted, re-wrapped or restored.
     """
     if file_list is None:
         markdown_dir = Path(MARKDOWN_DIR)
@@ -54,29 +291,14 @@ def convert_markdown_files(file_list=None):
             print(f"Markdown directory not found: {MARKDOWN_DIR}")
             return 0
 
-        converted_count = 0
-
-        for markdown_file in markdown_dir.rglob('*.md'):
-            output_dir = Path(DOCS_DIR) / "pages"
-            output_dir.mkdir(parents=True, exist_ok=True)
-
-            html_output_path = output_dir / markdown_file.stem
-            html_output_path = html_output_path.with_suffix('.html')
-
-            convert_markdown_to_html_with_pandoc(
-                str(markdown_file),
-                str(html_output_path)
-            )
-            converted_count += 1
-
-        return converted_count
+        markdown_files = sorted(markdown_dir.rglob('*.md'))
 
     else:
         if not file_list:
             print("No files to convert")
             return 0
 
-        converted_count = 0
+        markdown_files = []
 
         for markdown_file in file_list:
             markdown_file = Path(markdown_file)
@@ -92,20 +314,155 @@ def convert_markdown_files(file_list=None):
                 )
                 continue
 
-            output_dir = Path(DOCS_DIR) / "pages"
-            output_dir.mkdir(parents=True, exist_ok=True)
+            markdown_files.append(markdown_file)
+
+    renderer, renderer_version = resolve_renderer(renderer)
+    renderer_options = get_renderer_options(renderer)
 
-            html_output_path = output_dir / markdown_file.stem
-            html_output_path = html_output_path.with_suffix('.html')
+    manifest = load_build_manifest()
+    notes_index = load_notes_index()
+    notes_index_changed = False
+    template_hash = hash_file(HTML_TEMPLATE_FILE)
+    with open(HTML_TEMPLATE_FILE, 'r', encoding='utf-8') as f:
+        template_text = f.read()
 
-            convert_markdown_to_html_with_pandoc(
-                str(markdown_file),
-                str(html_output_path)
+    pending = []
+    build_inputs_by_output = {}
+    render_keys_by_output = {}
+    skipped_count = 0
+    rewrapped_count = 0
+    restored_count = 0
+
+    with span("plan conversions", files=len(markdown_files)):
+        for markdown_file in markdown_files:
+            html_output_path = get_html_output_path(markdown_file)
+            html_output_path.parent.mkdir(parents=True, exist_ok=True)
+
+            build_inputs = get_build_inputs(
+                markdown_file, template_hash, renderer_version
+            )
+            entry = manifest['outputs'].get(str(html_output_path))
+
+            if not force and is_output_current(
+                entry, build_inputs, html_output_path
+            ):
+                notes_index_changed |= update_note_entry(
+                    notes_index, markdown_file, html_output_path,
+                    build_inputs['source_hash']
+                )
+                skipped_count += 1
+                continue
+
+            render_key = get_render_key(build_inputs, renderer_options)
+
+            if not force and rewrap_page(
+                html_output_path, entry, build_inputs, renderer_options,
+                template_text
+            ):
+                print(f"Re-wrapped {html_output_path} in the new template")
+                notes_index_changed |= record_conversion(
+                    manifest, notes_index, markdown_file, html_output_path,
+                    build_inputs
+                )
+                store_rendered_page(
+                    render_key, html_output_path,
+                    get_fragment_path(html_output_path)
+                )
+                rewrapped_count += 1
+                continue
+
+            if not force and restore_rendered_page(
+                render_key, html_output_path,
+                get_fragment_path(html_output_path)
+            ):
+                print(f"Restored {html_output_path} from the render cache")
+                notes_index_changed |= record_conversion(
+                    manifest, notes_index, markdown_file, html_output_path,
+                    build_inputs
+                )
+                restored_count += 1
+                continue
+
+            pending.append((markdown_file, html_output_path))
+            build_inputs_by_output[str(html_output_path)] = build_inputs
+            render_keys_by_output[str(html_output_path)] = render_key
+
+    if workers is None:
+        workers = get_default_worker_count()
+    workers = max(1, min(workers, len(pending) or 1))
+
+    converted_count = 0
+    failed_count = 0
+    start_time = time.perf_counter()
+
+    for markdown_file, html_output_path, success in render_files(
+        pending, renderer, HTML_TEMPLATE_FILE, workers
+    ):
+        if success:
+            print(f"Converted {markdown_file} to {html_output_path}")
+            notes_index_changed |= record_conversion(
+                manifest, notes_index, markdown_file, html_output_path,
+                build_inputs_by_output[str(html_output_path)]
+            )
+            store_rendered_page(
+                render_keys_by_output[str(html_output_path)],
+                html_output_path, get_fragment_path(html_output_path)
             )
             converted_count += 1
+        else:
+            failed_count += 1
+
+    elapsed = time.perf_counter() - start_time
+
+    if file_list is None:
+        for output in prune_orphaned_outputs(manifest, notes_index):
+            print(f"Removed {output} (source markdown no longer exists)")
+            notes_index_changed = True
+
+    with span("save manifest", "io"):
+        save_build_manifest(manifest)
+        if notes_index_changed:
+            save_notes_index(notes_index)
+
+    summary = f"Built {converted_count} file(s), "
+    if rewrapped_count:
+        summary += f"re-wrapped {rewrapped_count} in the new template, "
+    if restored_count:
+        summary += f"restored {restored_count} from the render cache, "
+    summary += f"skipped {skipped_count} unchanged file(s)"
+    if failed_count:
+        summary += f", {failed_count} failed"
+    print(f"{summary} ({workers} worker(s))")
+
+    if pending or restored_count:
+        trim = trim_render_cache() if converted_count else None
+        print(format_cache_stats(restored_count, len(pending), trim))
 
-        return converted_count
+    if pending:
+        rate = len(pending) / elapsed if elapsed > 0 else float('inf')
+        print(
+            f"Renderer '{renderer}': {len(pending)} file(s) in "
+            f"{elapsed:.2f}s ({rate:.1f} files/s)"
+        )
+
+    return converted_count + rewrapped_count + restored_count
 
 
 if __name__ == "__main__":
-    convert_markdown_files()
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Convert markdown to HTML")
+    parser.add_argument(
+        "--renderer", choices=RENDERERS, help="renderer backend to use"
+    )
+    parser.add_argument(
+        "--workers", type=int, help="number of concurrent Pandoc processes"
+    )
+    parser.add_argument(
+        "--force", action="store_true", help="rebuild unchanged files too"
+    )
+    args = parser.parse_args()
+
+    convert_markdown_files(
+        force=args.force, workers=args.workers, renderer=args.renderer
+    )
@@ -0,0 +1,279 @@
+"""Minimal-Delta Deploy Bundles.
+
+GitHub Pages serves the docs/ tree, so a deploy only needs the files
+that differ from what was deployed last. The last deployed state is a
+manifest of every file under docs/ with its content hash:
+
+    .build/deploy/deployed.json         {path: {hash, size, mtime_ns}}
+    .build/deploy/<id>/delta.tar.gz     added and changed files
+    .build/deploy/<id>/files.txt        one "A|M|D <path>" line per file
+    .build/deploy/<id>/manifest.json    docs/ as of this bundle
+
+Files are compared by content hash, so a page the build rewrote with
+identical bytes (new mtime) is not a change. A file whose size and
+mtime match the deployed manifest reuses its recorded hash instead of
+being read again. Once a bundle has been pushed, marking it deployed
+makes its manifest the baseline for the next bundle.
+"""
+
+import json
+import os
+import shutil
+import tarfile
+from datetime import datetime, timezone
+from pathlib import Path
+
+from helper_scripts.file_utils import hash_file
+from helper_scripts.static_cache import DOCS_DIR
+from helper_scripts.tracing import span
+
+
+DEPLOY_DIR = ".build/deploy"
+DEPLOYED_MANIFEST_FILE = ".build/deploy/deployed.json"
+DEPLOY_BUNDLES_TO_KEEP = 5
+
+# Partial files left by an interrupted build step
+TEMPORARY_SUFFIXES = ('.tmp', '.parts')
+
+
+def load_deploy_manifest(manifest_file=DEPLOYED_MANIFEST_FILE):
+    """Load a deploy manifest.
+
+    Args:
+        manifest_file: Path to the manifest JSON file.
+
+    Returns:
+        Dict mapping path (relative to docs/) to its hash, size and
+        mtime_ns. Empty if nothing was deployed yet.
+    """
+    try:
+        with open(manifest_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        print(
+            f"Warning: Could not read deploy manifest {manifest_file}: {e}"
+        )
+        return {}
+
+
+def save_deploy_manifest(manifest, manifest_file=DEPLOYED_MANIFEST_FILE):
+    """Write a deploy manifest to disk atomically.
+
+    Args:
+        manifest: Dict from get_site_manifest().
+        manifest_file: Path to the manifest JSON file.
+    """
+    manifest_path = Path(manifest_file)
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+
+    temp_path = manifest_path.with_suffix(manifest_path.suffix + '.tmp')
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(temp_path, manifest_path)
+
+
+def get_site_manifest(site_dir=DOCS_DIR, previous=None):
+    """Hash every file of the site.
+
+    Args:
+        site_dir: Directory that is deployed.
+        previous: Optional manifest whose hashes are reused for files
+                  with the same size and mtime.
+
+    Returns:
+        Dict mapping path (relative to site_dir, with / separators) to
+        a dict of hash, size and mtime_ns.
+    """
+    previous = previous or {}
+    manifest = {}
+
+    for root, dirs, files in os.walk(site_dir):
+        dirs.sort()
+        for name in sorted(files):
+            if name.endswith(TEMPORARY_SUFFIXES):
+                continue
+
+            path = os.path.join(root, name)
+            relative_path = Path(os.path.relpath(path, site_dir)).as_posix()
+            stat = os.stat(path)
+            entry = previous.get(relative_path)
+
+            if (entry is not None and entry['size'] == stat.st_size
+                    and entry['mtime_ns'] == stat.st_mtime_ns):
+                file_hash = entry['hash']
+            else:
+                file_hash = hash_file(path)
+
+            manifest[relative_path] = {
+                'hash': file_hash,
+                'size': stat.st_size,
+                'mtime_ns': stat.st_mtime_ns
+            }
+
+    return manifest
+
+
+def compare_manifests(deployed, current):
+    """Find the files that differ between two site manifests.
+
+    Args:
+        deployed: Manifest of the last deploy.
+        current: Manifest of the site now.
+
+    Returns:
+        Dict of sorted 'added', 'changed' and 'deleted' path lists.
+    """
+    return {
+        'added': sorted(path for path in current if path not in deployed),
+        'changed': sorted(
+            path for path, entry in current.items()
+            if path in deployed and deployed[path]['hash'] != entry['hash']
+        ),
+        'deleted': sorted(path for path in deployed if path not in current)
+    }
+
+
+def list_bundles(deploy_dir=DEPLOY_DIR):
+    """Return the ids of deploy bundles, oldest first.
+
+    Args:
+        deploy_dir: Directory holding the bundles.
+
+    Returns:
+        List of bundle id strings.
+    """
+    deploy_path = Path(deploy_dir)
+    if not deploy_path.is_dir():
+        return []
+
+    return sorted(
+        path.name for path in deploy_path.iterdir() if path.is_dir()
+    )
+
+
+def create_deploy_bundle(site_dir=DOCS_DIR, deploy_dir=DEPLOY_DIR,
+                         manifest_file=DEPLOYED_MANIFEST_FILE,
+                         keep=DEPLOY_BUNDLES_TO_KEEP):
+    """Bundle the files that changed since the last deploy.
+
+    Args:
+        site_dir: Directory that is deployed.
+        deploy_dir: Directory holding the bundles.
+        manifest_file: Path to the deployed manifest.
+        keep: Number of newest bundles to keep.
+
+    Returns:
+        Dict with the bundle id (None if nothing changed), the added,
+        changed and deleted path lists and the archive size in bytes.
+    """
+    deployed = load_deploy_manifest(manifest_file)
+
+    with span("hash site") as args:
+        current = get_site_manifest(site_dir, previous=deployed)
+        args['files'] = len(current)
+
+    delta = compare_manifests(deployed, current)
+    result = {'bundle': None, **delta, 'archive_bytes': 0}
+
+    if not any(delta.values()):
+        return result
+
+    bundle_id = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%fZ')
+    bundle_path = Path(deploy_dir) / bundle_id
+    bundle_path.mkdir(parents=True)
+
+    with span("write deploy bundle", bundle=bundle_id):
+        with tarfile.open(bundle_path / "delta.tar.gz", 'w:gz') as archive:
+            for path in delta['added'] + delta['changed']:
+                archive.add(os.path.join(site_dir, path), arcname=path)
+
+        with open(bundle_path / "files.txt", 'w', encoding='utf-8') as f:
+            for status, key in (('A', 'added'), ('M', 'changed'),
+                                ('D', 'deleted')):
+                for path in delta[key]:
+                    f.write(f"{status} {path}\n")
+
+        save_deploy_manifest(current, bundle_path / "manifest.json")
+
+    for old_bundle in list_bundles(deploy_dir)[:-keep]:
+        shutil.rmtree(Path(deploy_dir) / old_bundle)
+
+    result['bundle'] = bundle_id
+    result['archive_bytes'] = (bundle_path / "delta.tar.gz").stat().st_size
+    return result
+
+
+def mark_deployed(bundle_id=None, deploy_dir=DEPLOY_DIR,
+                  manifest_file=DEPLOYED_MANIFEST_FILE):
+    """Make a bundle's manifest the baseline for the next bundle.
+
+    Args:
+        bundle_id: Bundle that was pushed. Defaults to the newest one.
+        deploy_dir: Directory holding the bundles.
+        manifest_file: Path to the deployed manifest.
+
+    Returns:
+        Id of the bundle marked deployed.
+
+    Raises:
+        ValueError: If the bundle does not exist.
+    """
+    bundles = list_bundles(deploy_dir)
+    bundle_id = bundle_id or (bundles[-1] if bundles else None)
+
+    if bundle_id not in bundles:
+        raise ValueError(f"Unknown deploy bundle: {bundle_id}")
+
+    manifest = load_deploy_manifest(
+        Path(deploy_dir) / bundle_id / "manifest.json"
+    )
+    save_deploy_manifest(manifest, manifest_file)
+    return bundle_id
+
+
+def print_bundle_summary(result):
+    """Print the result of create_deploy_bundle().
+
+    Args:
+        result: Dict from create_deploy_bundle().
+    """
+    if result['bundle'] is None:
+        print("✓ Nothing to deploy: docs/ matches the last deploy")
+        return
+
+    for status, key in (('A', 'added'), ('M', 'changed'), ('D', 'deleted')):
+        for path in result[key]:
+            print(f"  {status} {path}")
+
+    print(
+        f"✓ Deploy bundle {result['bundle']}: {len(result['added'])} "
+        f"added, {len(result['changed'])} changed, "
+        f"{len(result['deleted'])} deleted "
+        f"({result['archive_bytes'] / 1024:.1f} KB archive)"
+    )
+    print(f"  {Path(DEPLOY_DIR) / result['bundle']}/")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Bundle docs/ changes since the last deploy"
+    )
+    parser.add_argument(
+        "--mark-deployed", metavar="ID", nargs="?", const="",
+        help="record a bundle (default: the newest) as deployed"
+    )
+    args = parser.parse_args()
+
+    if args.mark_deployed is not None:
+        try:
+            bundle_id = mark_deployed(args.mark_deployed or None)
+        except ValueError as e:
+            print(f"✗ {e}")
+            raise SystemExit(1)
+        print(f"✓ Marked bundle {bundle_id} as deployed")
+    else:
+        print_bundle_summary(create_deploy_bundle())
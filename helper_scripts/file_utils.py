@@ -0,0 +1,89 @@
+"""File Helpers Shared by the Build Steps.
+
+Content hashing and cheap file placement (reflink, hard link, then byte
+copy as a last resort).
+"""
+
+import hashlib
+import os
+import shutil
+
+
+# Linux ioctl that clones a file's extents (copy-on-write reflink)
+FICLONE = 0x40049409
+
+
+def hash_file(file_path):
+    """Compute the SHA-256 hash of a file's contents.
+
+    Args:
+        file_path: Path to the file (str or Path).
+
+    Returns:
+        Hex digest string.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def reflink_file(source, destination):
+    """Create destination as a copy-on-write clone of source.
+
+    Args:
+        source: Existing file.
+        destination: New file path (must not exist).
+
+    Raises:
+        OSError: If the platform or file system does not support
+                 reflinks.
+    """
+    try:
+        import fcntl
+    except ImportError:
+        raise OSError("reflinks are not supported on this platform") from None
+
+    with open(source, 'rb') as src, open(destination, 'xb') as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        except OSError:
+            dst.close()
+            os.unlink(destination)
+            raise
+
+    shutil.copystat(source, destination)
+
+
+def link_or_copy(source, destination, hardlink=True):
+    """Place a file at destination without copying bytes when possible.
+
+    Tries a reflink (independent copy-on-write clone), then a hard link
+    (shares the inode, so in-place edits to one show in the other), and
+    falls back to a regular copy.
+
+    Args:
+        source: Existing file.
+        destination: New file path (must not exist).
+        hardlink: If False, never hard link (for sources that may later
+                  be rewritten in place).
+
+    Returns:
+        How the file was placed: 'reflink', 'hardlink' or 'copy'.
+    """
+    try:
+        reflink_file(source, destination)
+        return 'reflink'
+    except OSError:
+        pass
+
+    if hardlink:
+        try:
+            os.link(source, destination)
+            return 'hardlink'
+        except OSError:
+            pass
+
+    shutil.copy2(source, destination)
+    return 'copy'
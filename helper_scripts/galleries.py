@@ -0,0 +1,464 @@
+"""Photo Gallery Pages.
+
+Generates gallery pages (e.g. docs/pages/pup-pics.html) from small JSON
+manifests in docs/pages_galleries/:
+
+    {
+        "title": "Pup Pics - Photo Gallery",
+        "heading": "Pup Pics",
+        "intro": "Click on any photo to view the full album.",
+        "photos": [
+            {"image": "pups_sisters.jpg", "caption": "Sisters",
+             "link": "https://photos.app.goo.gl/..."}
+        ]
+    }
+
+Images are files in docs/static/media. Each tile's <img> carries the
+image's intrinsic width and height, so the grid does not shift while
+photos load, plus lazy loading and async decoding.
+
+Dimensions are read from the JPEG or PNG header (applying the EXIF
+orientation, as browsers do) without decoding any pixels. They are
+cached in .build/gallery_images.json keyed by content hash, and each
+file's (mtime, size) maps it to its hash, so unchanged photos are
+neither re-read nor re-hashed. Pages are only written when their
+content changes.
+"""
+
+import hashlib
+import json
+import os
+import struct
+from html import escape
+from pathlib import Path
+
+from helper_scripts.file_utils import hash_file
+from helper_scripts.notes import get_file_signature
+from helper_scripts.tracing import span
+
+
+GALLERIES_DIR = "docs/pages_galleries"
+PAGES_DIR = "docs/pages"
+STATIC_MEDIA_DIR = "docs/static/media"
+GALLERY_INDEX_FILE = ".build/gallery_images.json"
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# Start-of-frame markers (baseline, progressive, lossless...); C4, C8
+# and CC share the range but are tables and extensions
+JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+JPEG_APP1_MARKER = 0xE1
+JPEG_SOS_MARKER = 0xDA
+
+# Markers that stand alone, without a length field
+JPEG_STANDALONE_MARKERS = frozenset(range(0xD0, 0xDA)) | {0x01}
+
+EXIF_ORIENTATION_TAG = 0x0112
+
+# EXIF orientations that rotate the image by 90 degrees
+ROTATED_ORIENTATIONS = frozenset({5, 6, 7, 8})
+
+
+def _read_exif_orientation(data):
+    """Return the EXIF orientation from an APP1 segment, or 1."""
+    if not data.startswith(b'Exif\x00\x00'):
+        return 1
+
+    tiff = data[6:]
+    byte_order = {b'II': '<', b'MM': '>'}.get(tiff[:2])
+    if byte_order is None:
+        return 1
+
+    try:
+        ifd_offset = struct.unpack(byte_order + 'I', tiff[4:8])[0]
+        entry_count = struct.unpack(
+            byte_order + 'H', tiff[ifd_offset:ifd_offset + 2]
+        )[0]
+
+        for i in range(entry_count):
+            start = ifd_offset + 2 + 12 * i
+            tag = struct.unpack(byte_order + 'H', tiff[start:start + 2])[0]
+            if tag == EXIF_ORIENTATION_TAG:
+                return struct.unpack(
+                    byte_order + 'H', tiff[start + 8:start + 10]
+                )[0]
+    except struct.error:
+        pass
+
+    return 1
+
+
+def _read_jpeg_size(f):
+    """Return (width, height, orientation) from a JPEG's segments."""
+    orientation = 1
+
+    while True:
+        byte = f.read(1)
+        if not byte:
+            raise ValueError("no frame header before end of file")
+        if byte != b'\xff':
+            continue
+
+        marker = f.read(1)
+        while marker == b'\xff':
+            marker = f.read(1)
+        if not marker:
+            raise ValueError("no frame header before end of file")
+
+        marker = marker[0]
+        if marker in JPEG_STANDALONE_MARKERS:
+            continue
+        if marker == JPEG_SOS_MARKER:
+            raise ValueError("no frame header before image data")
+
+        length = struct.unpack('>H', f.read(2))[0]
+
+        if marker in JPEG_SOF_MARKERS:
+            _, height, width = struct.unpack('>BHH', f.read(5))
+            return width, height, orientation
+
+        if marker == JPEG_APP1_MARKER and orientation == 1:
+            orientation = _read_exif_orientation(f.read(length - 2))
+        else:
+            f.seek(length - 2, os.SEEK_CUR)
+
+
+def probe_image_size(image_path):
+    """Read an image's display dimensions from its file header.
+
+    Only the header is read; no pixels are decoded.
+
+    Args:
+        image_path: Path to a JPEG or PNG file.
+
+    Returns:
+        Tuple of (width, height), swapped for JPEGs whose EXIF
+        orientation rotates them.
+
+    Raises:
+        ValueError: If the file is not a readable JPEG or PNG.
+    """
+    with open(image_path, 'rb') as f:
+        header = f.read(24)
+
+        if header.startswith(PNG_SIGNATURE) and header[12:16] == b'IHDR':
+            return struct.unpack('>II', header[16:24])
+
+        if header.startswith(b'\xff\xd8'):
+            f.seek(2)
+            try:
+                width, height, orientation = _read_jpeg_size(f)
+            except struct.error:
+                raise ValueError("truncated JPEG header") from None
+            if orientation in ROTATED_ORIENTATIONS:
+                return height, width
+            return width, height
+
+    raise ValueError("not a JPEG or PNG file")
+
+
+def load_gallery_index(index_file=GALLERY_INDEX_FILE):
+    """Load the gallery image index from disk.
+
+    Args:
+        index_file: Path to the index JSON file.
+
+    Returns:
+        Dict with 'files' (path to mtime_ns, size and hash), 'sizes'
+        (hash to [width, height]) and 'pages' (output path to content
+        hash). Empty mappings if the file is missing or unreadable.
+    """
+    try:
+        with open(index_file, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        index = {}
+
+    for key in ('files', 'sizes', 'pages'):
+        index.setdefault(key, {})
+    return index
+
+
+def save_gallery_index(index, index_file=GALLERY_INDEX_FILE):
+    """Write the gallery image index to disk atomically.
+
+    Args:
+        index: Index dict from load_gallery_index().
+        index_file: Path to the index JSON file.
+    """
+    index_path = Path(index_file)
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+
+    temp_path = index_path.with_suffix(index_path.suffix + '.tmp')
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=1, sort_keys=True)
+    os.replace(temp_path, index_path)
+
+
+def get_image_size(image_path, index, counts):
+    """Return an image's dimensions, probing it only if it is new.
+
+    Args:
+        image_path: Path to the image.
+        index: Index dict, updated in place.
+        counts: Dict of 'hashed' and 'probed' counts, updated in place.
+
+    Returns:
+        Tuple of (width, height), or None if the image is missing or
+        not a JPEG or PNG.
+    """
+    try:
+        mtime_ns, size = get_file_signature(image_path)
+        entry = index['files'].get(str(image_path))
+
+        if (entry and entry['mtime_ns'] == mtime_ns
+                and entry['size'] == size):
+            file_hash = entry['hash']
+        else:
+            file_hash = hash_file(image_path)
+            index['files'][str(image_path)] = {
+                'mtime_ns': mtime_ns, 'size': size, 'hash': file_hash
+            }
+            counts['hashed'] += 1
+
+        if file_hash not in index['sizes']:
+            index['sizes'][file_hash] = list(probe_image_size(image_path))
+            counts['probed'] += 1
+    except (OSError, ValueError) as e:
+        print(f"⚠ No dimensions for {image_path}: {e}")
+        return None
+
+    return tuple(index['sizes'][file_hash])
+
+
+def load_gallery_manifest(manifest_path):
+    """Load and check a gallery manifest.
+
+    Args:
+        manifest_path: Path to the gallery JSON file.
+
+    Returns:
+        Gallery dict.
+
+    Raises:
+        ValueError: If the file is not valid JSON or a photo has no
+                    image.
+    """
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        gallery = json.load(f)
+
+    for photo in gallery.get('photos', []):
+        if not photo.get('image'):
+            raise ValueError(f"{manifest_path}: photo without an image")
+
+    return gallery
+
+
+def get_gallery_output_path(manifest_path):
+    """Return the page a gallery manifest is built into.
+
+    Args:
+        manifest_path: Path to the gallery JSON file.
+
+    Returns:
+        Path under docs/pages/.
+    """
+    return Path(PAGES_DIR) / f"{Path(manifest_path).stem}.html"
+
+
+def find_gallery_manifests(galleries_dir=GALLERIES_DIR):
+    """Return the gallery manifests, sorted by path.
+
+    Args:
+        galleries_dir: Directory of gallery JSON files.
+
+    Returns:
+        List of Paths.
+    """
+    if not Path(galleries_dir).is_dir():
+        return []
+    return sorted(Path(galleries_dir).glob('*.json'))
+
+
+def get_gallery_inputs(manifest_path):
+    """Return the files a gallery page is built from.
+
+    Args:
+        manifest_path: Path to the gallery JSON file.
+
+    Returns:
+        List of path strings: the manifest and its images. Only the
+        manifest if it cannot be read.
+    """
+    try:
+        gallery = load_gallery_manifest(manifest_path)
+    except (OSError, ValueError):
+        return [str(manifest_path)]
+
+    return [str(manifest_path)] + [
+        str(Path(STATIC_MEDIA_DIR) / photo['image'])
+        for photo in gallery.get('photos', [])
+    ]
+
+
+def render_gallery_page(gallery, sizes):
+    """Render a gallery page as a sequence of HTML chunks.
+
+    Args:
+        gallery: Gallery dict from load_gallery_manifest().
+        sizes: List of (width, height) or None, one per photo.
+
+    Yields:
+        Strings that concatenate to the complete HTML page.
+    """
+    heading = gallery.get('heading', '')
+    title = gallery.get('title') or heading
+
+    yield f'''<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{escape(title)}</title>
+    <link rel="stylesheet" href="../static/styles.css">
+    <link rel="stylesheet" href="../static/gallery.css">
+</head>
+<body>
+    <h1>{escape(heading)}</h1>
+
+'''
+
+    if gallery.get('intro'):
+        yield f"    <p>{escape(gallery['intro'])}</p>\n\n"
+
+    yield '    <div class="gallery-container">\n'
+
+    for photo, size in zip(gallery.get('photos', []), sizes):
+        caption = photo.get('caption', '')
+        alt = photo.get('alt', caption)
+        src = f"../static/media/{photo['image']}"
+
+        if photo.get('link'):
+            opening = (
+                f'        <a href="{escape(photo["link"])}" '
+                f'class="gallery-tile">\n'
+            )
+            closing = '        </a>\n'
+        else:
+            opening = '        <div class="gallery-tile">\n'
+            closing = '        </div>\n'
+
+        dimensions = f'width="{size[0]}" height="{size[1]}" ' if size else ''
+
+        yield (
+            f'        <!-- Photo Tile: {escape(caption)} -->\n'
+            f'{opening}'
+            f'            <img src="{escape(src)}" alt="{escape(alt)}" '
+            f'{dimensions}loading="lazy" decoding="async">\n'
+            f'            <p class="gallery-description">'
+            f'{escape(caption)}</p>\n'
+            f'{closing}'
+        )
+
+    yield '''    </div>
+</body>
+</html>
+'''
+
+
+def build_gallery(manifest_path, gallery, index, counts):
+    """Build one gallery page, writing it only if its content changed.
+
+    Args:
+        manifest_path: Path to the gallery JSON file.
+        gallery: Gallery dict from load_gallery_manifest().
+        index: Index dict, updated in place.
+        counts: Dict of 'hashed' and 'probed' counts, updated in place.
+
+    Returns:
+        Tuple of (output path, whether the page was written).
+    """
+    sizes = [
+        get_image_size(
+            Path(STATIC_MEDIA_DIR) / photo['image'], index, counts
+        )
+        for photo in gallery.get('photos', [])
+    ]
+
+    output_path = get_gallery_output_path(manifest_path)
+    page = ''.join(render_gallery_page(gallery, sizes))
+    content_hash = hashlib.sha256(page.encode('utf-8')).hexdigest()
+
+    if (index['pages'].get(str(output_path)) == content_hash
+            and output_path.exists()):
+        return output_path, False
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = output_path.with_name(f".{output_path.name}.tmp")
+    temp_path.write_text(page, encoding='utf-8')
+    os.replace(temp_path, output_path)
+    index['pages'][str(output_path)] = content_hash
+
+    return output_path, True
+
+
+def build_galleries(galleries_dir=GALLERIES_DIR):
+    """Build every gallery page and remove pages of deleted galleries.
+
+    Args:
+        galleries_dir: Directory of gallery JSON files.
+
+    Returns:
+        Dict with the number of galleries, pages written, images and
+        images probed.
+    """
+    index = load_gallery_index()
+    counts = {'hashed': 0, 'probed': 0}
+    manifests = find_gallery_manifests(galleries_dir)
+    outputs = set()
+    images = set()
+    written = 0
+
+    with span("build galleries", galleries=len(manifests)) as args:
+        for manifest_path in manifests:
+            gallery = load_gallery_manifest(manifest_path)
+            output_path, was_written = build_gallery(
+                manifest_path, gallery, index, counts
+            )
+            outputs.add(str(output_path))
+            images.update(
+                str(Path(STATIC_MEDIA_DIR) / photo['image'])
+                for photo in gallery.get('photos', [])
+            )
+            written += was_written
+
+        for output in set(index['pages']) - outputs:
+            Path(output).unlink(missing_ok=True)
+            del index['pages'][output]
+            print(f"Removed {output} (gallery manifest no longer exists)")
+
+        # Forget images no gallery shows any more
+        for path in set(index['files']) - images:
+            del index['files'][path]
+        hashes = {entry['hash'] for entry in index['files'].values()}
+        for file_hash in set(index['sizes']) - hashes:
+            del index['sizes'][file_hash]
+
+        save_gallery_index(index)
+        args.update(counts)
+
+    print(
+        f"✓ Built {len(manifests)} gallery page(s): {written} written, "
+        f"{len(images)} image(s), {counts['probed']} probed"
+    )
+
+    return {
+        'galleries': len(manifests),
+        'written': written,
+        'images': len(images),
+        'probed': counts['probed']
+    }
+
+
+if __name__ == "__main__":
+    build_galleries()
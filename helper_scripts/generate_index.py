@@ -1,15 +1,33 @@
 """Generate Index Page from Published HTML Files.
 
 This script scans the docs/ directory for published field notes and
-generates an index.html page listing all available notes.
+generates an index.html page listing all available notes. Note metadata
+comes from the notes index written during conversion, so only pages
+missing from the index (e.g. hand-written HTML) are read and parsed.
+
+Notes are listed newest first by their front matter date, INDEX_PAGE_SIZE
+per page, with further pages and per-year and per-tag archives in
+docs/archive/. Each page is rendered as a stream of chunks and only
+written if its content hash differs from the last run.
 """
 
+import hashlib
+import json
+import os
 import re
+from datetime import date
+from html import escape, unescape
 from pathlib import Path
 
+from helper_scripts.notes_index import load_notes_index, save_notes_index
+from helper_scripts.tracing import span
+
 
 DOCS_DIR = "docs"
 INDEX_FILE = "docs/index.html"
+ARCHIVE_DIR = "docs/archive"
+LISTING_HASHES_FILE = ".build/listing_pages.json"
+INDEX_PAGE_SIZE = 50
 
 
 def extract_metadata_from_html(html_file):
@@ -26,7 +44,10 @@ def extract_metadata_from_html(html_file):
             content = f.read()
 
         title_match = re.search(r'<title>(.*?)</title>', content)
-        title = title_match.group(1) if title_match else html_file.stem
+        title = (
+            unescape(title_match.group(1)) if title_match
+            else html_file.stem
+        )
 
         date_match = re.search(r'<meta name="date" content="(.*?)"', content)
         date = date_match.group(1) if date_match else 'No date'
@@ -44,11 +65,53 @@ def extract_metadata_from_html(html_file):
         }
 
 
+def get_page_entry(html_file, notes_index):
+    """Return index metadata for an HTML page, parsing it only if needed.
+
+    Converted notes are taken from the index as-is. Other pages are parsed
+    once and cached in the index until their mtime or size changes.
+
+    Args:
+        html_file: Path to HTML file.
+        notes_index: Notes index dict, updated in place.
+
+    Returns:
+        Tuple of (entry dict, whether the index was changed).
+    """
+    key = str(html_file)
+    entry = notes_index.get(key)
+
+    if entry is not None and 'source' in entry:
+        return entry, False
+
+    stat = html_file.stat()
+    signature = [stat.st_mtime_ns, stat.st_size]
+
+    if entry is not None and entry.get('signature') == signature:
+        return entry, False
+
+    metadata = extract_metadata_from_html(html_file)
+    entry = {
+        'title': metadata['title'],
+        'date': metadata['date'],
+        'tags': [],
+        'description': '',
+        'output': key,
+        'signature': signature
+    }
+    notes_index[key] = entry
+
+    return entry, True
+
+
 def find_published_notes():
-    """Find all published HTML files and extract metadata.
+    """Find all published HTML files and look up their metadata.
+
+    Listing pages (index.html and docs/archive/) are skipped.
 
     Returns:
-        List of dicts with note information (url, title, date, file).
+        List of dicts with note information (url, title, date, tags,
+        file), unsorted.
     """
     docs_dir = Path(DOCS_DIR)
 
@@ -56,74 +119,362 @@ def find_published_notes():
         print(f"Docs directory not found: {DOCS_DIR}")
         return []
 
+    notes_index = load_notes_index()
+    index_changed = False
     notes = []
 
     for html_file in sorted(docs_dir.rglob('*.html'), reverse=True):
         if html_file.name in ['index.html', 'template.html']:
             continue
+        if html_file.is_relative_to(ARCHIVE_DIR):
+            continue
 
-        metadata = extract_metadata_from_html(html_file)
+        entry, changed = get_page_entry(html_file, notes_index)
+        index_changed |= changed
 
         relative_path = html_file.relative_to(DOCS_DIR)
         url_path = '/' + str(relative_path).replace('\\', '/')
 
         notes.append({
-            'title': metadata['title'],
-            'date': metadata['date'],
+            'title': entry['title'],
+            'date': entry['date'],
+            'tags': entry.get('tags') or [],
             'url': url_path,
             'file': html_file
         })
 
+    if index_changed:
+        save_notes_index(notes_index)
+
     return notes
 
 
-def generate_index_html(notes):
-    """Generate index.html content.
+def parse_note_date(value):
+    """Parse a front matter date such as "2025-08-03".
 
     Args:
-        notes: List of note dictionaries.
+        value: Date string; only the leading YYYY-MM-DD is used.
 
     Returns:
-        String containing complete HTML.
+        datetime.date, or None if the value is not a date.
     """
-    html = '''<!DOCTYPE html>
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except ValueError:
+        return None
+
+
+def sort_notes(notes):
+    """Sort notes newest first by date, followed by undated notes by title.
+
+    Args:
+        notes: List of note dicts from find_published_notes().
+
+    Returns:
+        New sorted list. Each note gets a 'parsed_date' key.
+    """
+    for note in notes:
+        note['parsed_date'] = parse_note_date(note['date'])
+
+    dated = sorted(
+        (note for note in notes if note['parsed_date']),
+        key=lambda note: (note['parsed_date'], note['title'].lower()),
+        reverse=True
+    )
+    undated = sorted(
+        (note for note in notes if not note['parsed_date']),
+        key=lambda note: note['title'].lower()
+    )
+
+    return dated + undated
+
+
+def get_tag_slug(tag):
+    """Return the filename-safe slug for a tag (e.g. "data-centers")."""
+    return re.sub(r'[^a-z0-9]+', '-', tag.lower()).strip('-') or 'tag'
+
+
+def get_listing_path(base_name, page_number):
+    """Return the output path of a listing page.
+
+    Args:
+        base_name: None for the main index, otherwise the archive name
+                   (e.g. "2025" or "tag-energy").
+        page_number: 1-based page number.
+
+    Returns:
+        Path under DOCS_DIR.
+    """
+    if base_name is None:
+        if page_number == 1:
+            return Path(INDEX_FILE)
+        return Path(ARCHIVE_DIR) / f"page-{page_number}.html"
+
+    if page_number == 1:
+        return Path(ARCHIVE_DIR) / f"{base_name}.html"
+    return Path(ARCHIVE_DIR) / f"{base_name}-page-{page_number}.html"
+
+
+def get_listing_url(base_name, page_number, root_prefix):
+    """Return the relative URL of a listing page from another listing."""
+    relative_path = get_listing_path(base_name, page_number).relative_to(
+        DOCS_DIR
+    )
+    return root_prefix + relative_path.as_posix()
+
+
+def get_listings(notes):
+    """Group sorted notes into the main listing and year and tag archives.
+
+    Args:
+        notes: Notes sorted by sort_notes().
+
+    Returns:
+        List of dicts with name (None for the main index, otherwise the
+        archive name), kind ('index', 'year' or 'tag'), label, heading
+        and notes.
+    """
+    years = {}
+    tags = {}
+
+    for note in notes:
+        if note['parsed_date']:
+            years.setdefault(note['parsed_date'].year, []).append(note)
+        for tag in note['tags']:
+            tags.setdefault(get_tag_slug(tag), (tag, []))[1].append(note)
+
+    listings = [{
+        'name': None, 'kind': 'index', 'label': "All notes",
+        'heading': "Available notes", 'notes': notes
+    }]
+    listings.extend({
+        'name': str(year), 'kind': 'year', 'label': str(year),
+        'heading': f"Notes from {year}", 'notes': year_notes
+    } for year, year_notes in sorted(years.items(), reverse=True))
+    listings.extend({
+        'name': f"tag-{slug}", 'kind': 'tag', 'label': tag,
+        'heading': f"Notes tagged “{tag}”", 'notes': tag_notes
+    } for slug, (tag, tag_notes) in sorted(tags.items()))
+
+    return listings
+
+
+def render_listing_page(heading, notes, base_name, page_number, page_count,
+                        listings):
+    """Render one listing page as a sequence of HTML chunks.
+
+    Args:
+        heading: Heading of the note list.
+        notes: Notes shown on this page.
+        base_name: Listing name (see get_listing_path()).
+        page_number: 1-based page number.
+        page_count: Total pages in this listing.
+        listings: All listings from get_listings(), for the archive links.
+
+    Yields:
+        Strings that concatenate to the complete HTML page.
+    """
+    is_home = base_name is None and page_number == 1
+    root_prefix = '' if is_home else '../'
+    title = "Field Notes" if base_name is None else f"{heading} - Field Notes"
+    if page_number > 1:
+        title = f"{title} (page {page_number})"
+
+    yield f'''<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Field Notes</title>
-    <link rel="stylesheet" href="static/styles.css">
+    <title>{escape(title)}</title>
+    <link rel="stylesheet" href="{root_prefix}static/styles.css">
 </head>
 <body>
-    <h1>Field Notes</h1>
+'''
+
+    if is_home:
+        yield '''    <h1>Field Notes</h1>
     <p>Welcome to the field notes.</p>
 
-    <h2>Available notes</h2>
-    <ul>
+    <form class="search" role="search" onsubmit="return false">
+        <input type="search" id="search-input" placeholder="Search notes"
+               aria-label="Search notes" autocomplete="off">
+    </form>
+    <ul id="search-results"></ul>
+
 '''
+    else:
+        home_url = f"{root_prefix}index.html"
+        yield f'    <h1><a href="{home_url}">Field Notes</a></h1>\n\n'
+
+    yield f'    <h2>{escape(heading)}</h2>\n    <ul>\n'
 
     for note in notes:
         date_display = (
             note['date'] if note['date'] != 'No date' else '(Draft)'
         )
-        relative_url = note["url"].lstrip('/')
-        html += (
-            f'        <li><a href="{relative_url}">{note["title"]}</a> - '
-            f'{date_display}</li>\n'
+        relative_url = root_prefix + note["url"].lstrip('/')
+        yield (
+            f'        <li><a href="{relative_url}">'
+            f'{escape(note["title"])}</a> - '
+            f'{escape(str(date_display))}</li>\n'
         )
 
-    html += '''    </ul>
-</body>
+    yield '    </ul>\n'
+
+    if page_count > 1:
+        yield '    <nav class="pagination">\n'
+        if page_number > 1:
+            url = get_listing_url(base_name, page_number - 1, root_prefix)
+            yield f'        <a href="{url}" rel="prev">Newer notes</a>\n'
+        yield f'        <span>Page {page_number} of {page_count}</span>\n'
+        if page_number < page_count:
+            url = get_listing_url(base_name, page_number + 1, root_prefix)
+            yield f'        <a href="{url}" rel="next">Older notes</a>\n'
+        yield '    </nav>\n'
+
+    if base_name is None and len(listings) > 1:
+        yield '\n    <h2>Archives</h2>\n'
+        for kind, label in (('year', "By year"), ('tag', "By tag")):
+            links = [
+                f'<a href="{get_listing_url(listing["name"], 1, root_prefix)}"'
+                f'>{escape(listing["label"])}</a> ({len(listing["notes"])})'
+                for listing in listings if listing['kind'] == kind
+            ]
+            if links:
+                yield f'    <p>{label}: {" · ".join(links)}</p>\n'
+
+    if is_home:
+        yield '    <script src="static/search.js" defer></script>\n'
+
+    yield '''</body>
 </html>'''
 
-    return html
 
+def generate_index_html(notes):
+    """Generate a single index.html page listing the given notes.
+
+    Args:
+        notes: List of note dictionaries.
+
+    Returns:
+        String containing complete HTML.
+    """
+    return ''.join(render_listing_page(
+        "Available notes", notes, None, 1, 1, []
+    ))
+
+
+def load_listing_hashes(hashes_file=LISTING_HASHES_FILE):
+    """Load the content hashes of the listing pages written last time."""
+    try:
+        with open(hashes_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_listing_hashes(hashes, hashes_file=LISTING_HASHES_FILE):
+    """Atomically save the content hashes of the listing pages."""
+    hashes_path = Path(hashes_file)
+    hashes_path.parent.mkdir(parents=True, exist_ok=True)
+
+    temp_path = hashes_path.with_suffix(hashes_path.suffix + '.tmp')
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(hashes, f, indent=1, sort_keys=True)
+    os.replace(temp_path, hashes_path)
+
+
+def write_listing_page(path, chunks, previous_hash):
+    """Write a listing page unless its content is unchanged.
+
+    The chunks of one page (bounded by the page size) are hashed as they
+    are produced, then written in one pass if the hash differs.
+
+    Args:
+        path: Output path.
+        chunks: Iterable of HTML strings.
+        previous_hash: Hash recorded for the page by the last run, or None.
+
+    Returns:
+        Tuple of (content hash, whether the file was written).
+    """
+    digest = hashlib.sha256()
+    parts = []
+    for chunk in chunks:
+        digest.update(chunk.encode('utf-8'))
+        parts.append(chunk)
+    content_hash = digest.hexdigest()
+
+    if content_hash == previous_hash and path.exists():
+        return content_hash, False
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(f".{path.name}.tmp")
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.writelines(parts)
+    os.replace(temp_path, path)
+
+    return content_hash, True
+
+
+def generate_listing_pages(notes, page_size=INDEX_PAGE_SIZE):
+    """Write the paginated index and the year and tag archive pages.
+
+    Pages whose content is unchanged are not rewritten, and archive pages
+    no longer produced are deleted.
+
+    Args:
+        notes: Notes sorted by sort_notes().
+        page_size: Notes per page.
+
+    Returns:
+        Tuple of (pages written, total pages).
+    """
+    page_size = max(1, page_size)
+    previous_hashes = load_listing_hashes()
+    hashes = {}
+    written_count = 0
+    listings = get_listings(notes)
+
+    for listing in listings:
+        listing_notes = listing['notes']
+        page_count = max(1, -(-len(listing_notes) // page_size))
 
-def main():
-    """Generate index.html from all published notes."""
+        for page_number in range(1, page_count + 1):
+            start = (page_number - 1) * page_size
+            path = get_listing_path(listing['name'], page_number)
+
+            content_hash, written = write_listing_page(
+                path,
+                render_listing_page(
+                    listing['heading'],
+                    listing_notes[start:start + page_size],
+                    listing['name'], page_number, page_count, listings
+                ),
+                previous_hashes.get(str(path))
+            )
+            hashes[str(path)] = content_hash
+            written_count += written
+
+    for stale_path in previous_hashes.keys() - hashes.keys():
+        Path(stale_path).unlink(missing_ok=True)
+
+    save_listing_hashes(hashes)
+
+    return written_count, len(hashes)
+
+
+def main(page_size=INDEX_PAGE_SIZE):
+    """Generate index.html and the archive pages from all published notes.
+
+    Args:
+        page_size: Notes per listing page.
+    """
     print("Generating index.html...")
 
-    notes = find_published_notes()
+    with span("find published notes") as args:
+        notes = sort_notes(find_published_notes())
+        args['notes'] = len(notes)
 
     if not notes:
         print("No published notes found")
@@ -131,19 +482,28 @@ def main():
 
     print(f"Found {len(notes)} published note(s)")
 
-    html_content = generate_index_html(notes)
-
-    index_path = Path(INDEX_FILE)
-    index_path.parent.mkdir(parents=True, exist_ok=True)
+    with span("write listing pages", "io") as args:
+        written_count, page_count = generate_listing_pages(notes, page_size)
+        args['pages'] = page_count
+        args['written'] = written_count
 
-    with open(index_path, 'w', encoding='utf-8') as f:
-        f.write(html_content)
-
-    print(f"✓ Generated: {INDEX_FILE}")
+    print(
+        f"✓ Generated: {INDEX_FILE} "
+        f"({written_count} of {page_count} listing page(s) updated)"
+    )
 
     for note in notes:
         print(f"  - {note['title']} ({note['date']})")
 
 
 if __name__ == "__main__":
-    main()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate index pages")
+    parser.add_argument(
+        "--page-size", type=int, default=INDEX_PAGE_SIZE,
+        help="notes per listing page"
+    )
+    args = parser.parse_args()
+
+    main(page_size=args.page_size)
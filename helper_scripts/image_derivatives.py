@@ -0,0 +1,478 @@
+"""Responsive Image Derivatives.
+
+Generates resized copies of every image in docs/static/media, in the
+original format and as WebP, then rewrites the <img> tags of the built
+pages to offer them through srcset/sizes, with the intrinsic width and
+height and lazy loading.
+
+Derivatives are named by the source image's content hash and recorded in
+.build/image_derivatives.json together with the source's (mtime, size),
+so unchanged images are neither re-hashed nor re-encoded. Resizing is CPU
+bound, so images are processed in a process pool.
+
+Requires the optional Pillow package; without it the stage is skipped
+and pages keep their original <img> tags.
+"""
+
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from helper_scripts.asset_names import (
+    DERIVATIVE_HASH_LENGTH,
+    is_derivative_file
+)
+from helper_scripts.file_utils import hash_file
+from helper_scripts.notes import get_file_signature
+from helper_scripts.tracing import span
+
+
+STATIC_MEDIA_DIR = "docs/static/media"
+DERIVATIVES_DIR = "docs/static/media/derived"
+PAGES_DIR = "docs/pages"
+DERIVATIVES_MANIFEST_FILE = ".build/image_derivatives.json"
+
+SOURCE_IMAGE_SUFFIXES = {'.jpg', '.jpeg', '.png'}
+DERIVATIVE_WIDTHS = (480, 960, 1600)
+JPEG_QUALITY = 82
+WEBP_QUALITY = 80
+
+# Pages are at most 800px wide with 95% wide images (see styles.css)
+IMAGE_SIZES = "(max-width: 800px) 95vw, 760px"
+
+# Attributes managed by rewrite_img_tag(), replaced on every rewrite
+RESPONSIVE_ATTRIBUTES = ('srcset', 'sizes', 'width', 'height', 'loading',
+                         'decoding')
+
+IMG_TAG_PATTERN = re.compile(r'<img\b[^>]*>', re.IGNORECASE)
+ATTRIBUTE_PATTERN = re.compile(
+    r'([^\s"\'<>/=]+)(?:\s*=\s*("[^"]*"|\'[^\']*\'|[^\s"\'=<>`]+))?'
+)
+MEDIA_SRC_PATTERN = re.compile(r'^(?P<prefix>(?:\.\./)*static/media/)'
+                               r'(?P<filename>[^/?#]+)$')
+
+
+def _load_pillow():
+    """Return the PIL.Image module, or None if Pillow is not installed."""
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+
+    return Image
+
+
+def get_pillow_version():
+    """Return the installed Pillow version, or None if it is missing."""
+    try:
+        import PIL
+    except ImportError:
+        return None
+
+    return PIL.__version__
+
+
+def load_derivatives_manifest(manifest_file=DERIVATIVES_MANIFEST_FILE):
+    """Load the derivatives manifest from disk.
+
+    Args:
+        manifest_file: Path to the manifest JSON file.
+
+    Returns:
+        Dict with an 'images' mapping of source filename to entry. Empty
+        if the file does not exist or cannot be parsed.
+    """
+    try:
+        with open(manifest_file, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {'images': {}}
+
+    manifest.setdefault('images', {})
+    return manifest
+
+
+def save_derivatives_manifest(manifest,
+                              manifest_file=DERIVATIVES_MANIFEST_FILE):
+    """Atomically write the derivatives manifest to disk.
+
+    Args:
+        manifest: Manifest dict to save.
+        manifest_file: Path to the manifest JSON file.
+    """
+    manifest_path = Path(manifest_file)
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+
+    temp_path = manifest_path.with_suffix(manifest_path.suffix + '.tmp')
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(temp_path, manifest_path)
+
+
+def find_source_images(media_dir=STATIC_MEDIA_DIR):
+    """Find the images that derivatives are generated for.
+
+    Args:
+        media_dir: Directory of published images (not searched
+                   recursively, so derivatives are never picked up).
+
+    Returns:
+        Sorted list of Path objects.
+    """
+    media_path = Path(media_dir)
+
+    if not media_path.exists():
+        return []
+
+    return sorted(
+        path for path in media_path.iterdir()
+        if path.is_file() and path.suffix.lower() in SOURCE_IMAGE_SUFFIXES
+    )
+
+
+def get_derivative_widths(width):
+    """Return the derivative widths for an image, never upscaling.
+
+    Args:
+        width: Width of the source image in pixels.
+
+    Returns:
+        Sorted list of widths.
+    """
+    return sorted({min(target, width) for target in DERIVATIVE_WIDTHS})
+
+
+def render_derivatives(source_path, source_hash, output_dir):
+    """Write the resized and WebP derivatives of one image.
+
+    Runs in a worker process.
+
+    Args:
+        source_path: Path to the source image.
+        source_hash: SHA-256 hex digest of the source image.
+        output_dir: Directory the derivatives are written to.
+
+    Returns:
+        Manifest entry dict with source_hash, width, height and a list of
+        variants, each with file, width and format.
+    """
+    from PIL import ImageOps, features
+
+    Image = _load_pillow()
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    stem = source_hash[:DERIVATIVE_HASH_LENGTH]
+    suffix = Path(source_path).suffix.lower()
+    original_format = 'png' if suffix == '.png' else 'jpeg'
+    formats = [original_format]
+    if features.check('webp'):
+        formats.append('webp')
+
+    with Image.open(source_path) as image:
+        image = ImageOps.exif_transpose(image)
+        width, height = image.size
+
+        variants = []
+        for target_width in get_derivative_widths(width):
+            target_height = max(1, round(height * target_width / width))
+            resized = image.resize(
+                (target_width, target_height), Image.Resampling.LANCZOS
+            )
+
+            for image_format in formats:
+                extension = 'jpg' if image_format == 'jpeg' else image_format
+                filename = f"{stem}-{target_width}w.{extension}"
+                output_path = output_dir / filename
+                temp_path = output_dir / f".{filename}.{os.getpid()}.tmp"
+
+                if image_format == 'jpeg':
+                    resized.convert('RGB').save(
+                        temp_path, 'JPEG', quality=JPEG_QUALITY,
+                        optimize=True, progressive=True
+                    )
+                elif image_format == 'webp':
+                    resized.save(
+                        temp_path, 'WEBP', quality=WEBP_QUALITY, method=6
+                    )
+                else:
+                    resized.save(temp_path, 'PNG', optimize=True)
+                os.replace(temp_path, output_path)
+
+                variants.append({
+                    'file': filename,
+                    'width': target_width,
+                    'format': image_format
+                })
+
+    return {
+        'source_hash': source_hash,
+        'width': width,
+        'height': height,
+        'variants': variants
+    }
+
+
+def is_entry_current(entry, output_dir):
+    """Check that every derivative recorded in an entry exists.
+
+    Args:
+        entry: Manifest entry from render_derivatives().
+        output_dir: Directory the derivatives were written to.
+
+    Returns:
+        Boolean.
+    """
+    return all(
+        (Path(output_dir) / variant['file']).exists()
+        for variant in entry.get('variants', ())
+    )
+
+
+def build_image_derivatives(media_dir=STATIC_MEDIA_DIR,
+                            output_dir=DERIVATIVES_DIR, workers=None):
+    """Generate derivatives for new or changed images.
+
+    Images whose (mtime, size) or content hash match the manifest and
+    whose derivatives still exist are skipped. The rest are processed in
+    a pool of `workers` processes. Derivatives no longer belonging to any
+    image are removed.
+
+    Args:
+        media_dir: Directory of published images.
+        output_dir: Directory for the derivatives.
+        workers: Number of worker processes. Defaults to the CPU count.
+
+    Returns:
+        Number of images processed.
+    """
+    if _load_pillow() is None:
+        print("⚠ Pillow not installed, skipping responsive images")
+        return 0
+
+    manifest = load_derivatives_manifest()
+    images = manifest['images']
+    source_images = find_source_images(media_dir)
+
+    # Derivatives are named by source hash, so identical images (e.g. an
+    # image and its fingerprinted link) share one set and are rendered
+    # once per run
+    pending = {}
+    entries_by_hash = {
+        entry.get('source_hash'): entry for entry in images.values()
+        if is_entry_current(entry, output_dir)
+    }
+
+    with span("plan image derivatives", images=len(source_images)):
+        for source_path in source_images:
+            signature = list(get_file_signature(source_path))
+            entry = images.get(source_path.name)
+
+            if entry is not None and is_entry_current(entry, output_dir):
+                if entry.get('signature') == signature:
+                    continue
+
+                source_hash = hash_file(source_path)
+                if entry.get('source_hash') == source_hash:
+                    entry['signature'] = signature
+                    continue
+            else:
+                source_hash = hash_file(source_path)
+
+            if source_hash in entries_by_hash:
+                images[source_path.name] = {
+                    **entries_by_hash[source_hash], 'signature': signature
+                }
+                continue
+
+            pending.setdefault(source_hash, []).append(
+                (source_path, signature)
+            )
+
+    queued_count = sum(len(sources) for sources in pending.values())
+    processed_count = 0
+    failed_count = 0
+
+    if pending:
+        workers = max(1, min(workers or os.cpu_count() or 1, len(pending)))
+
+        with span("render image derivatives", images=len(pending),
+                  workers=workers):
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = {
+                    executor.submit(
+                        render_derivatives, str(sources[0][0]), source_hash,
+                        output_dir
+                    ): sources
+                    for source_hash, sources in pending.items()
+                }
+
+                for future in as_completed(futures):
+                    sources = futures[future]
+                    try:
+                        entry = future.result()
+                    except Exception as e:
+                        print(f"✗ Could not resize {sources[0][0]}: {e}")
+                        failed_count += 1
+                        continue
+
+                    for source_path, signature in sources:
+                        images[source_path.name] = {
+                            **entry, 'signature': signature
+                        }
+                    processed_count += 1
+
+    current_names = {path.name for path in source_images}
+    for name in list(images):
+        if name not in current_names:
+            del images[name]
+
+    _prune_derivatives(images, output_dir)
+    save_derivatives_manifest(manifest)
+
+    summary = (
+        f"✓ Resized {processed_count} image(s), "
+        f"skipped {len(source_images) - queued_count} unchanged"
+    )
+    if failed_count:
+        summary += f", {failed_count} failed"
+    print(summary)
+
+    return processed_count
+
+
+def _prune_derivatives(images, output_dir):
+    """Delete derivative files not referenced by any manifest entry."""
+    output_path = Path(output_dir)
+    if not output_path.exists():
+        return
+
+    referenced = {
+        variant['file']
+        for entry in images.values()
+        for variant in entry.get('variants', ())
+    }
+
+    for path in output_path.iterdir():
+        if is_derivative_file(path.name) and path.name not in referenced:
+            path.unlink()
+
+
+def get_responsive_attributes(entry, derived_prefix):
+    """Return the attributes that make an <img> responsive.
+
+    WebP derivatives are offered when available, otherwise the
+    derivatives in the original format.
+
+    Args:
+        entry: Manifest entry from render_derivatives().
+        derived_prefix: URL prefix of the derivatives directory, relative
+                        to the page (e.g. "../static/media/derived/").
+
+    Returns:
+        List of (name, value) tuples.
+    """
+    variants = entry['variants']
+    webp_variants = [v for v in variants if v['format'] == 'webp']
+    srcset_variants = webp_variants or variants
+
+    srcset = ", ".join(
+        f"{derived_prefix}{variant['file']} {variant['width']}w"
+        for variant in srcset_variants
+    )
+
+    return [
+        ('srcset', srcset),
+        ('sizes', IMAGE_SIZES),
+        ('width', str(entry['width'])),
+        ('height', str(entry['height'])),
+        ('loading', 'lazy'),
+        ('decoding', 'async')
+    ]
+
+
+def rewrite_img_tag(tag, images):
+    """Add responsive attributes to an <img> tag that shows a media image.
+
+    Attributes from a previous rewrite are replaced, so rewriting is
+    idempotent. The original src is kept as the fallback.
+
+    Args:
+        tag: Full <img ...> tag text.
+        images: Manifest 'images' mapping.
+
+    Returns:
+        The rewritten tag, or the original tag if it does not show an
+        image with derivatives.
+    """
+    self_closing = tag.rstrip('>').rstrip().endswith('/')
+    inner = tag[len('<img'):].rstrip('>').rstrip().rstrip('/')
+
+    attributes = []
+    src = None
+    for match in ATTRIBUTE_PATTERN.finditer(inner):
+        name, value = match.group(1), match.group(2)
+        if name.lower() == 'src' and value:
+            src = value.strip('"\'')
+        attributes.append((name, value))
+
+    src_match = MEDIA_SRC_PATTERN.match(src or '')
+    if src_match is None:
+        return tag
+
+    entry = images.get(src_match.group('filename'))
+    if entry is None or not entry.get('variants'):
+        return tag
+
+    kept = [
+        f"{name}={value}" if value is not None else name
+        for name, value in attributes
+        if name.lower() not in RESPONSIVE_ATTRIBUTES
+    ]
+    added = [
+        f'{name}="{value}"'
+        for name, value in get_responsive_attributes(
+            entry, f"{src_match.group('prefix')}derived/"
+        )
+    ]
+
+    closing = " />" if self_closing else ">"
+    return f"<img {' '.join(kept + added)}{closing}"
+
+
+def apply_responsive_images(pages_dir=PAGES_DIR):
+    """Rewrite the <img> tags of built pages to use the derivatives.
+
+    Pages are only written when their content changes.
+
+    Args:
+        pages_dir: Directory of built HTML pages.
+
+    Returns:
+        Number of pages rewritten.
+    """
+    images = load_derivatives_manifest()['images']
+    if not images:
+        return 0
+
+    rewritten_count = 0
+
+    with span("rewrite img tags", "io") as args:
+        for page_path in sorted(Path(pages_dir).rglob('*.html')):
+            html_text = page_path.read_text(encoding='utf-8')
+            updated = IMG_TAG_PATTERN.sub(
+                lambda match: rewrite_img_tag(match.group(0), images),
+                html_text
+            )
+
+            if updated != html_text:
+                temp_path = page_path.with_name(f".{page_path.name}.tmp")
+                temp_path.write_text(updated, encoding='utf-8')
+                os.replace(temp_path, page_path)
+                rewritten_count += 1
+
+        args['pages'] = rewritten_count
+
+    return rewritten_count
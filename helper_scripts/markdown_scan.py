@@ -0,0 +1,183 @@
+"""Single-Pass Markdown Scanner.
+
+Splits a note into the parts the publishing steps care about in one
+linear pass: YAML front matter, code (fenced blocks and inline code
+spans), images (markdown syntax and <img> tags) and links. Image
+discovery, usage counting and path rewriting all work from these nodes,
+so references shown as examples inside code are left alone.
+
+Fence lines are found with one precompiled pattern and the text between
+code blocks is scanned with another. Each branch of the inline pattern
+starts with a literal character, so the regex engine skips ahead to
+candidate positions instead of trying every branch at every character.
+"""
+
+import re
+from dataclasses import dataclass
+
+
+# Opening or closing line of a fenced code block (``` or ~~~)
+FENCE_PATTERN = re.compile(r'^ {0,3}(`{3,}|~{3,})(.*)$', re.MULTILINE)
+
+# Inline nodes, tried left to right; a code span consumes anything that
+# looks like an image or link inside it
+INLINE_PATTERN = re.compile(
+    r'`(?P<code>(?P<ticks>`*)(?!`).+?(?<!`)`(?P=ticks)(?!`))'
+    r'|!(?P<image>\[(?P<alt>.*?)\]\((?P<image_target>.*?)\))'
+    r'|<(?P<html_image>img\s[^>]*?(?<![\w-])src='
+    r'(?P<quote>["\'])(?P<src>[^"\']+)(?P=quote))'
+    r'|\[(?P<link>(?P<link_text>[^\[\]\n]*)\]'
+    r'\((?P<link_target>[^)\n]*)\))'
+)
+
+IMAGE_NODE_KINDS = ('image', 'html_image')
+
+
+@dataclass(frozen=True)
+class MarkdownNode:
+    """A part of a markdown note found by scan_markdown().
+
+    Attributes:
+        kind: 'front_matter', 'code', 'image', 'html_image' or 'link'.
+        start: Index in the text where the node starts.
+        end: Index in the text just after the node.
+        text: Alt text of an image or text of a link.
+        target: Image path or link URL.
+        target_start: Index where target starts (-1 if no target).
+        target_end: Index just after target (-1 if no target).
+    """
+
+    kind: str
+    start: int
+    end: int
+    text: str = ''
+    target: str = ''
+    target_start: int = -1
+    target_end: int = -1
+
+
+def get_front_matter_end(content):
+    """Return the index just after a note's YAML front matter.
+
+    Follows split_yaml_front_matter(): front matter starts at the very
+    beginning with --- and ends at the next ---.
+
+    Args:
+        content: Markdown text.
+
+    Returns:
+        Index where the body starts, or 0 if there is no front matter.
+    """
+    if not content.startswith('---'):
+        return 0
+
+    closing = content.find('---', 3)
+    return 0 if closing == -1 else closing + 3
+
+
+def _scan_inline(content, start, end, nodes):
+    """Append the inline nodes between start and end to nodes."""
+    for match in INLINE_PATTERN.finditer(content, start, end):
+        if match.group('code') is not None:
+            nodes.append(MarkdownNode('code', match.start(), match.end()))
+        elif match.group('image') is not None:
+            nodes.append(MarkdownNode(
+                'image', match.start(), match.end(),
+                text=match.group('alt'),
+                target=match.group('image_target'),
+                target_start=match.start('image_target'),
+                target_end=match.end('image_target')
+            ))
+        elif match.group('html_image') is not None:
+            nodes.append(MarkdownNode(
+                'html_image', match.start(), match.end(),
+                target=match.group('src'),
+                target_start=match.start('src'),
+                target_end=match.end('src')
+            ))
+        else:
+            nodes.append(MarkdownNode(
+                'link', match.start(), match.end(),
+                text=match.group('link_text'),
+                target=match.group('link_target'),
+                target_start=match.start('link_target'),
+                target_end=match.end('link_target')
+            ))
+
+
+def scan_markdown(content):
+    """Scan a note into front matter, code, image and link nodes.
+
+    Args:
+        content: Markdown text.
+
+    Returns:
+        List of MarkdownNode in document order. Images and links inside
+        code are not reported.
+    """
+    nodes = []
+    body_start = get_front_matter_end(content)
+    if body_start:
+        nodes.append(MarkdownNode('front_matter', 0, body_start))
+
+    text_start = body_start
+    fence = None
+    fence_start = 0
+
+    if '```' in content or '~~~' in content:
+        for match in FENCE_PATTERN.finditer(content, body_start):
+            if fence is None:
+                _scan_inline(content, text_start, match.start(), nodes)
+                fence = match.group(1)
+                fence_start = match.start()
+            elif (match.group(1)[0] == fence[0]
+                    and len(match.group(1)) >= len(fence)
+                    and not match.group(2).strip()):
+                text_start = min(match.end() + 1, len(content))
+                nodes.append(MarkdownNode('code', fence_start, text_start))
+                fence = None
+
+    if fence is None:
+        _scan_inline(content, text_start, len(content), nodes)
+    else:
+        nodes.append(MarkdownNode('code', fence_start, len(content)))
+
+    return nodes
+
+
+def get_image_references(nodes):
+    """Return the (alt_text, image_path) of each image node.
+
+    Args:
+        nodes: List from scan_markdown().
+
+    Returns:
+        List of tuples in document order.
+    """
+    return [
+        (node.text, node.target)
+        for node in nodes if node.kind in IMAGE_NODE_KINDS
+    ]
+
+
+def replace_targets(content, replacements):
+    """Replace the targets of some nodes in one pass over the text.
+
+    Args:
+        content: Markdown text the nodes were scanned from.
+        replacements: Iterable of (node, new target) pairs in document
+                      order.
+
+    Returns:
+        Updated text.
+    """
+    pieces = []
+    position = 0
+
+    for node, new_target in replacements:
+        pieces.append(content[position:node.target_start])
+        pieces.append(new_target)
+        position = node.target_end
+
+    pieces.append(content[position:])
+    return ''.join(pieces)
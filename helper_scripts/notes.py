@@ -0,0 +1,209 @@
+"""Markdown Note Loading.
+
+Loads each markdown note once and caches it per path, so the preview,
+publish and front matter steps share a single read. Cached notes are
+invalidated when the file's mtime or size changes.
+"""
+
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from helper_scripts.markdown_scan import get_image_references, scan_markdown
+from helper_scripts.tracing import span
+
+
+# Loaded notes keyed by path, with the (mtime, size) they were read at
+_note_cache = {}
+
+
+@dataclass
+class Note:
+    """A markdown note read from disk.
+
+    Attributes:
+        path: Path to the markdown file.
+        text: Full raw file contents.
+        front_matter: Dict of parsed YAML front matter fields.
+        body_offset: Index in text where the body after the front matter
+                     starts.
+        image_references: List of (alt_text, image_path) tuples.
+        nodes: MarkdownNode list from the note's single scan, with
+               offsets into text.
+        signature: (mtime_ns, size) of the file when it was read.
+    """
+
+    path: Path
+    text: str
+    front_matter: dict
+    body_offset: int
+    image_references: list = field(default_factory=list)
+    nodes: list = field(default_factory=list)
+    signature: tuple = (0, 0)
+
+    @property
+    def body(self):
+        """Return the note text after the front matter."""
+        return self.text[self.body_offset:]
+
+
+def split_yaml_front_matter(content):
+    """Split markdown content into parsed YAML front matter and body.
+
+    Args:
+        content: Markdown text.
+
+    Returns:
+        Tuple of (dict with YAML fields, body text). The dict is empty and
+        the body is the whole content if no YAML is found.
+    """
+    if not content.startswith('---'):
+        return {}, content
+
+    parts = content.split('---', 2)
+    if len(parts) < 3:
+        return {}, content
+
+    yaml_content = parts[1].strip()
+
+    yaml_data = {}
+    for line in yaml_content.split('\n'):
+        line = line.strip()
+        if ':' in line:
+            key, value = line.split(':', 1)
+            key = key.strip()
+            value = value.strip().strip('"').strip("'")
+
+            if value.startswith('[') and value.endswith(']'):
+                value = [
+                    item.strip().strip('"').strip("'")
+                    for item in value[1:-1].split(',')
+                ]
+
+            yaml_data[key] = value
+
+    return yaml_data, parts[2]
+
+
+def find_image_references(markdown_content):
+    """Find all image references in markdown content.
+
+    Covers markdown images and <img> tags; examples inside code blocks
+    and code spans are ignored.
+
+    Args:
+        markdown_content: String containing markdown text.
+
+    Returns:
+        List of tuples: (alt_text, image_path).
+    """
+    return get_image_references(scan_markdown(markdown_content))
+
+
+def get_file_signature(file_path):
+    """Return the (mtime_ns, size) signature used to invalidate caches.
+
+    Args:
+        file_path: Path to the file.
+
+    Returns:
+        Tuple of (mtime in nanoseconds, size in bytes).
+    """
+    stat = os.stat(file_path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def get_cached_note(file_path):
+    """Return the cached note for a path if it is still current.
+
+    Args:
+        file_path: Path to the markdown file.
+
+    Returns:
+        Note, or None if the note is not cached or the file changed.
+    """
+    note = _note_cache.get(str(file_path))
+
+    if note is None or note.signature != get_file_signature(file_path):
+        return None
+
+    return note
+
+
+def clear_note_cache():
+    """Drop all cached notes so the next loads read from disk."""
+    _note_cache.clear()
+
+
+def load_note(file_path):
+    """Load a markdown note, reusing the cached copy if unchanged.
+
+    Args:
+        file_path: Path to the markdown file (str or Path).
+
+    Returns:
+        Note for the file.
+
+    Raises:
+        OSError: If the file cannot be read.
+    """
+    file_path = Path(file_path)
+
+    note = get_cached_note(file_path)
+    if note is not None:
+        return note
+
+    signature = get_file_signature(file_path)
+
+    with span("load note", "io", file=file_path, bytes_read=signature[1]):
+        with open(file_path, 'r', encoding='utf-8') as f:
+            text = f.read()
+
+        front_matter, body = split_yaml_front_matter(text)
+        nodes = scan_markdown(text)
+
+    note = Note(
+        path=file_path,
+        text=text,
+        front_matter=front_matter,
+        body_offset=len(text) - len(body),
+        image_references=get_image_references(nodes),
+        nodes=nodes,
+        signature=signature
+    )
+    _note_cache[str(file_path)] = note
+
+    return note
+
+
+def read_front_matter(file_path):
+    """Read only the YAML front matter of a markdown file.
+
+    Uses the cached note when available; otherwise reads line by line and
+    stops at the closing `---`, so note bodies are not read.
+
+    Args:
+        file_path: Path to the markdown file.
+
+    Returns:
+        Dict with YAML fields, or empty dict if no YAML found.
+
+    Raises:
+        OSError: If the file cannot be read.
+    """
+    note = get_cached_note(file_path)
+    if note is not None:
+        return note.front_matter
+
+    with open(file_path, 'r', encoding='utf-8') as f:
+        header = f.read(3)
+        if header != '---':
+            return {}
+
+        for line in f:
+            header += line
+            if '---' in header[3:]:
+                break
+
+    front_matter, _ = split_yaml_front_matter(header)
+    return front_matter
@@ -0,0 +1,108 @@
+"""Published Notes Metadata Index.
+
+Keeps a compact JSON index of published pages, keyed by HTML output path,
+so the index page can be generated without re-reading every page. Entries
+for converted notes come from their YAML front matter; hand-written pages
+are recorded from their HTML together with the file's mtime and size.
+"""
+
+import json
+import os
+from pathlib import Path
+
+from helper_scripts.publish_note import parse_yaml_front_matter
+
+
+NOTES_INDEX_FILE = ".build/notes_index.json"
+
+
+def load_notes_index(index_file=NOTES_INDEX_FILE):
+    """Load the notes metadata index from disk.
+
+    Args:
+        index_file: Path to the index JSON file.
+
+    Returns:
+        Dict mapping HTML output path to note metadata. Empty if the file
+        is missing or unreadable.
+    """
+    index_path = Path(index_file)
+
+    if not index_path.exists():
+        return {}
+
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Warning: Could not read notes index {index_file}: {e}")
+        return {}
+
+
+def save_notes_index(index, index_file=NOTES_INDEX_FILE):
+    """Write the notes metadata index to disk atomically.
+
+    Args:
+        index: Dict as returned by load_notes_index().
+        index_file: Path to the index JSON file.
+    """
+    index_path = Path(index_file)
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+
+    temp_path = index_path.with_suffix(index_path.suffix + '.tmp')
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=1, sort_keys=True)
+    os.replace(temp_path, index_path)
+
+
+def build_note_entry(markdown_file, html_output_path, source_hash):
+    """Build an index entry from a note's YAML front matter.
+
+    Args:
+        markdown_file: Path to the source markdown file.
+        html_output_path: Path to the converted HTML file.
+        source_hash: Content hash of the source markdown.
+
+    Returns:
+        Dict with title, date, tags, description, output, source and
+        source_hash keys.
+    """
+    yaml_data = parse_yaml_front_matter(markdown_file)
+
+    tags = yaml_data.get('tags') or []
+    if isinstance(tags, str):
+        tags = [tags]
+
+    return {
+        'title': yaml_data.get('title') or Path(html_output_path).stem,
+        'date': yaml_data.get('date') or 'No date',
+        'tags': tags,
+        'description': yaml_data.get('description', ''),
+        'output': str(html_output_path),
+        'source': str(markdown_file),
+        'source_hash': source_hash
+    }
+
+
+def update_note_entry(index, markdown_file, html_output_path, source_hash):
+    """Add or refresh a converted note's entry in the index.
+
+    The front matter is only re-read when the source hash has changed.
+
+    Args:
+        index: Index dict to update in place.
+        markdown_file: Path to the source markdown file.
+        html_output_path: Path to the converted HTML file.
+        source_hash: Content hash of the source markdown.
+
+    Returns:
+        True if the entry was added or changed.
+    """
+    key = str(html_output_path)
+    entry = index.get(key)
+
+    if entry is not None and entry.get('source_hash') == source_hash:
+        return False
+
+    index[key] = build_note_entry(markdown_file, html_output_path, source_hash)
+    return True
@@ -0,0 +1,50 @@
+-- Long-lived Pandoc worker for the pandoc-batch renderer.
+--
+-- Usage: pandoc lua pandoc_batch.lua <template_file>
+--
+-- Reads one "<markdown_file>\t<output_file>" job per line on stdin,
+-- converts it with the compiled template and reports one result line:
+--     ok\t<markdown_file>
+--     error\t<markdown_file>\t<message>
+--
+-- renderers.py passes a parts template (see get_parts_template()), so
+-- each output holds the note's metadata and body for the page to be
+-- filled in Python.
+
+local template_file = arg[1]
+
+local handle = assert(io.open(template_file, 'r'))
+local template_text = handle:read('a')
+handle:close()
+
+local template = pandoc.template.compile(template_text, template_file)
+
+local function convert(markdown_file, html_output_file)
+  local input = assert(io.open(markdown_file, 'r'))
+  local text = input:read('a')
+  input:close()
+
+  local doc = pandoc.read(text, 'markdown')
+  local html = pandoc.write(doc, 'html', {template = template})
+
+  local output = assert(io.open(html_output_file, 'w'))
+  output:write(html)
+  output:close()
+end
+
+for line in io.lines() do
+  local markdown_file, html_output_file = line:match('^(.-)\t(.*)$')
+
+  if markdown_file then
+    local ok, err = pcall(convert, markdown_file, html_output_file)
+
+    if ok then
+      io.stdout:write('ok\t', markdown_file, '\n')
+    else
+      local message = tostring(err):gsub('%s+', ' ')
+      io.stdout:write('error\t', markdown_file, '\t', message, '\n')
+    end
+
+    io.stdout:flush()
+  end
+end
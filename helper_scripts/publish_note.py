@@ -2,18 +2,45 @@
 
 This module provides functions to publish markdown files from the working/
 directory to the markdown/ directory, handling image references and path updates.
+
+Batches are published as a transaction: every note's file and image
+operations are planned first, then applied with temp-file-and-rename
+writes that are rolled back if any step fails.
+
+Published images are content-addressed: each is stored in
+docs/static/media under a name derived from its SHA-256 hash, so
+identical images are stored once, different images can never overwrite
+each other, and the names are safe to cache forever.
 """
 
-import re
-import shutil
+import os
 from pathlib import Path
 
+from helper_scripts.asset_names import (
+    MEDIA_HASH_LENGTH,
+    is_content_addressed_media
+)
+from helper_scripts.file_utils import hash_file, link_or_copy
+from helper_scripts.markdown_scan import (
+    IMAGE_NODE_KINDS,
+    replace_targets,
+    scan_markdown
+)
+from helper_scripts.notes import load_note, read_front_matter
+from helper_scripts.tracing import record_file_io, span
+
 
 # Configuration
 WORKING_STAGED_DIR = "working/pages_markdown_staged"
+WORKING_DRAFTS_DIR = "working/pages_markdown"
+WORKING_MEDIA_DIR = "working/static/media"
 MARKDOWN_DIR = "docs/pages_markdown"
 STATIC_MEDIA_DIR = "docs/static/media"
 
+# Image paths in drafts that are rewritten to the published media folder
+DRAFT_MEDIA_PREFIXES = ('./media/', 'media/', '../media/')
+PUBLISHED_MEDIA_PREFIX = '../static/media/'
+
 
 def find_markdown_files(working_dir=WORKING_STAGED_DIR):
     """Find all markdown files in the working directory.
@@ -40,6 +67,8 @@ def find_markdown_files(working_dir=WORKING_STAGED_DIR):
 def parse_yaml_front_matter(file_path):
     """Parse YAML front matter from a markdown file.
 
+    Only the front matter is read; the note body is skipped.
+
     Args:
         file_path: Path to markdown file.
 
@@ -48,144 +77,178 @@ def parse_yaml_front_matter(file_path):
         no YAML found.
     """
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        if not content.startswith('---'):
-            return {}
-
-        parts = content.split('---', 2)
-        if len(parts) < 3:
-            return {}
-
-        yaml_content = parts[1].strip()
-
-        yaml_data = {}
-        for line in yaml_content.split('\n'):
-            line = line.strip()
-            if ':' in line:
-                key, value = line.split(':', 1)
-                key = key.strip()
-                value = value.strip().strip('"').strip("'")
-
-                if value.startswith('[') and value.endswith(']'):
-                    value = [
-                        item.strip().strip('"').strip("'")
-                        for item in value[1:-1].split(',')
-                    ]
-
-                yaml_data[key] = value
-
-        return yaml_data
+        return read_front_matter(file_path)
 
     except Exception as e:
         print(f"Warning: Could not parse YAML from {file_path}: {e}")
         return {}
 
 
-def find_image_references(markdown_content):
-    """Find all image references in markdown content.
+def extract_image_filename(image_path):
+    """Extract just the filename from an image path.
 
     Args:
-        markdown_content: String containing markdown text.
+        image_path: Path string (e.g., "./media/image.jpg").
 
     Returns:
-        List of tuples: (alt_text, image_path).
+        Filename string (e.g., "image.jpg").
     """
-    pattern = r'!\[(.*?)\]\((.*?)\)'
-    matches = re.findall(pattern, markdown_content)
+    return Path(image_path).name
 
-    html_pattern = r'<img\s+[^>]*src=["\']([^"\']+)["\']'
-    html_matches = re.findall(html_pattern, markdown_content)
 
-    image_refs = []
+def get_media_store_name(image_path):
+    """Return the content-addressed filename for an image.
 
-    for alt_text, path in matches:
-        image_refs.append((alt_text, path))
+    Args:
+        image_path: Path to the image file.
 
-    for path in html_matches:
-        image_refs.append(('', path))
+    Returns:
+        Filename made of the content hash and the lowercased suffix
+        (e.g. "3f2a9c1b7d4e8a60.png").
+    """
+    digest = hash_file(image_path)[:MEDIA_HASH_LENGTH]
+    return f"{digest}{Path(image_path).suffix.lower()}"
 
-    return image_refs
 
+def get_referenced_image_filenames(md_file):
+    """Return the image filenames referenced by a markdown file.
 
-def extract_image_filename(image_path):
-    """Extract just the filename from an image path.
+    Uses the shared note cache, so unchanged files are not re-read.
 
     Args:
-        image_path: Path string (e.g., "./media/image.jpg").
+        md_file: Path to markdown file.
 
     Returns:
-        Filename string (e.g., "image.jpg").
+        Frozenset of image filenames (e.g. {"image.jpg"}).
     """
-    return Path(image_path).name
+    note = load_note(md_file)
 
+    return frozenset(
+        extract_image_filename(image_path)
+        for _, image_path in note.image_references
+    )
 
-def count_image_usage(image_filename, working_dir=WORKING_STAGED_DIR):
-    """Count how many markdown files reference a specific image.
+
+def build_image_usage_index(
+    working_dirs=(WORKING_STAGED_DIR, WORKING_DRAFTS_DIR)
+):
+    """Build a reverse index from image filename to referencing notes.
+
+    Each markdown file is read at most once, and not at all if it is
+    unchanged since a previous scan.
 
     Args:
-        image_filename: Image filename to search for (e.g., "image.jpg").
-        working_dir: Path to working directory.
+        working_dirs: Directories whose markdown files are scanned.
 
     Returns:
-        Integer count of files that reference this image.
+        Dict mapping image filename to a set of markdown file paths.
     """
-    working_path = Path(working_dir)
-    count = 0
+    index = {}
 
-    for md_file in working_path.rglob('*.md'):
-        try:
-            with open(md_file, 'r', encoding='utf-8') as f:
-                content = f.read()
+    with span("image usage index", "scan") as args:
+        _scan_image_usage(working_dirs, index)
+        args['images'] = len(index)
 
-            if image_filename in content:
-                count += 1
+    return index
 
-        except Exception as e:
-            print(f"Warning: Could not read {md_file}: {e}")
+
+def _scan_image_usage(working_dirs, index):
+    """Add each markdown file's image references to index in place."""
+    for working_dir in working_dirs:
+        working_path = Path(working_dir)
+        if not working_path.exists():
             continue
 
-    return count
+        for md_file in working_path.rglob('*.md'):
+            try:
+                filenames = get_referenced_image_filenames(md_file)
+            except Exception as e:
+                print(f"Warning: Could not read {md_file}: {e}")
+                continue
 
+            for filename in filenames:
+                index.setdefault(filename, set()).add(str(md_file))
 
-def replace_markdown_image_path(match):
-    """Helper function to replace markdown image paths.
+
+def count_image_usage(image_filename, working_dir=WORKING_STAGED_DIR):
+    """Count how many markdown files reference a specific image.
 
     Args:
-        match: Regex match object.
+        image_filename: Image filename to search for (e.g., "image.jpg").
+        working_dir: Path to working directory.
 
     Returns:
-        Replacement string with updated path.
+        Integer count of files that reference this image.
     """
-    alt_text = match.group(1)
-    old_path = match.group(2) + match.group(3)
+    index = build_image_usage_index([working_dir])
+    return len(index.get(image_filename, ()))
+
+
+def get_published_image_path(image_path, media_names=None):
+    """Return the path a published note uses for an image.
 
-    filename = extract_image_filename(old_path)
-    new_path = f"../static/media/{filename}"
+    Args:
+        image_path: Path as written in the draft (e.g. "./media/a.jpg").
+        media_names: Optional dict mapping image filename to its published
+                     (content-addressed) filename.
 
-    return f"![{alt_text}]({new_path})"
+    Returns:
+        Path string under ../static/media/.
+    """
+    filename = extract_image_filename(image_path)
+    filename = (media_names or {}).get(filename, filename)
+    return f"{PUBLISHED_MEDIA_PREFIX}{filename}"
 
 
-def replace_html_image_path(match):
-    """Helper function to replace HTML image paths.
+def get_previous_media_names(note, published_path):
+    """Return the stored names a note's images were last published under.
+
+    Staged notes stay in working/ after publishing, but moved images do
+    not, so a note published again can no longer hash them. Its images
+    are matched to those of its previously published version by
+    position; a pair is used only if both have the same alt text and
+    the stored image exists.
 
     Args:
-        match: Regex match object.
+        note: Note of the staged markdown file.
+        published_path: Path of its previously published markdown.
 
     Returns:
-        Replacement string with updated path.
+        Dict mapping image filename to its content-addressed filename.
+        Empty if the note was not published before or its images no
+        longer line up.
     """
-    attributes = match.group(1)
-    old_path = match.group(2)
+    if not Path(published_path).exists():
+        return {}
 
-    filename = extract_image_filename(old_path)
-    new_path = f"../static/media/{filename}"
+    draft_images = [
+        node for node in note.nodes
+        if node.kind in IMAGE_NODE_KINDS
+        and node.target.startswith(DRAFT_MEDIA_PREFIXES)
+    ]
+    published_images = [
+        node for node in load_note(published_path).nodes
+        if node.kind in IMAGE_NODE_KINDS
+        and node.target.startswith(PUBLISHED_MEDIA_PREFIX)
+    ]
+
+    if len(draft_images) != len(published_images):
+        return {}
+
+    media_names = {}
+    for draft, published in zip(draft_images, published_images):
+        store_name = extract_image_filename(published.target)
+        if (draft.text == published.text
+                and is_content_addressed_media(store_name)
+                and (Path(STATIC_MEDIA_DIR) / store_name).exists()):
+            media_names.setdefault(
+                extract_image_filename(draft.target), store_name
+            )
 
-    return f'<img {attributes}src="{new_path}"'
+    return media_names
 
 
-def update_image_paths(content):
+def update_image_paths(content, media_names=None, nodes=None):
     """Update image paths in markdown content for publishing.
 
     Changes:
@@ -193,160 +256,385 @@ def update_image_paths(content):
         - media/image.jpg → ../static/media/image.jpg
         - ../media/image.jpg → ../static/media/image.jpg
 
+    Filenames found in media_names are replaced by their published names
+    (e.g. ../static/media/3f2a9c1b7d4e8a60.jpg). Markdown images and
+    <img> tags are rewritten; examples inside code are left as written.
+
     Args:
         content: Markdown content string.
+        media_names: Optional dict mapping image filename to its published
+                     filename.
+        nodes: Optional MarkdownNode list already scanned from content
+               (e.g. Note.nodes), to avoid scanning it again.
 
     Returns:
         Updated content string with rewritten paths.
     """
-    content = re.sub(
-        r'!\[(.*?)\]\((\.\/media\/|media\/|\.\.\/media\/)(.*?)\)',
-        replace_markdown_image_path,
-        content
-    )
-
-    content = re.sub(
-        r'<img\s+([^>]*)src=["\'](?:\.\/media\/|media\/|\.\.\/media\/)(.*?)["\']',
-        replace_html_image_path,
-        content
-    )
-
-    return content
+    if nodes is None:
+        nodes = scan_markdown(content)
 
+    return replace_targets(content, (
+        (node, get_published_image_path(node.target, media_names))
+        for node in nodes
+        if node.kind in IMAGE_NODE_KINDS
+        and node.target.startswith(DRAFT_MEDIA_PREFIXES)
+    ))
 
-def publish_note(source_path, dry_run=False):
-    """Publish a single markdown file from working/ to markdown/.
 
-    Process:
-        1. Validate source file exists and is in working/
-        2. Read markdown content
-        3. Parse YAML front matter
-        4. Find image references
-        5. Copy markdown to markdown/ directory
-        6. Handle images (move if unique, copy if shared)
-        7. Update image paths in copied markdown
-
-    Args:
-        source_path: Path to markdown file in working/ (str or Path).
-        dry_run: If True, show what would happen without making changes.
-
-    Returns:
-        Dict with results containing the following keys:
-            success: Whether the operation succeeded.
-            source_path: Original source file path.
-            destination_path: Published destination path or None.
-            images_moved: List of filenames that were moved.
-            images_copied: List of (filename, usage_count) tuples.
-            images_missing: List of filenames that could not be found.
-            paths_updated: Number of image paths updated.
-            warnings: List of warning messages.
-            error: Error message or None.
-    """
-    result = {
+def _new_publish_result(source_path):
+    """Return an empty publish result dict for a source file."""
+    return {
         'success': False,
         'source_path': str(source_path),
         'destination_path': None,
         'images_moved': [],
         'images_copied': [],
         'images_missing': [],
+        'media_names': {},
         'paths_updated': 0,
         'warnings': [],
         'error': None
     }
 
-    try:
-        source_path = Path(source_path)
 
-        if not source_path.exists():
-            result['error'] = f"Source file not found: {source_path}"
-            return result
+def plan_publish(source_paths, image_index=None):
+    """Plan the file and image operations for publishing a batch of notes.
 
-        if not str(source_path).startswith(WORKING_STAGED_DIR):
-            result['error'] = (
-                f"Source file must be in {WORKING_STAGED_DIR}/ directory"
-            )
-            return result
+    Nothing is written. Every note is read once and image usage comes from
+    a single shared scan of the working directories. Images are planned
+    under their content-addressed names; an image whose content is already
+    stored (or planned earlier in the batch) is not written again.
 
-        with open(source_path, 'r', encoding='utf-8') as f:
-            original_content = f.read()
+    Args:
+        source_paths: Markdown files in working/ (str or Path).
+        image_index: Optional index from build_image_usage_index(); built
+                     once for the whole batch if not given.
 
-        yaml_data = parse_yaml_front_matter(source_path)
+    Returns:
+        Tuple of (results, operations). results has one dict per source
+        path (see publish_note()); success means the note was planned.
+        operations is a list of dicts with 'action' ('write', 'copy' or
+        'move'), 'destination' and either 'source' or 'content'. Moves of
+        already stored images have 'stored' set and only remove the
+        source.
+    """
+    results = []
+    operations = []
+    planned_images = {}
+    planned_store_names = set()
 
-        if 'title' not in yaml_data or not yaml_data['title']:
-            result['warnings'].append("Missing 'title' in YAML front matter")
-        if 'date' not in yaml_data or not yaml_data['date']:
-            result['warnings'].append("Missing 'date' in YAML front matter")
+    for source_path in source_paths:
+        result = _new_publish_result(source_path)
+        results.append(result)
 
-        image_refs = find_image_references(original_content)
+        try:
+            source_path = Path(source_path)
 
-        filename = source_path.name
-        dest_path = Path(MARKDOWN_DIR) / filename
-        result['destination_path'] = str(dest_path)
+            if not source_path.exists():
+                result['error'] = f"Source file not found: {source_path}"
+                continue
 
-        if dry_run:
-            print(f"[DRY RUN] Would copy: {source_path} → {dest_path}")
-        else:
-            dest_path.parent.mkdir(parents=True, exist_ok=True)
+            if not str(source_path).startswith(WORKING_STAGED_DIR):
+                result['error'] = (
+                    f"Source file must be in {WORKING_STAGED_DIR}/ directory"
+                )
+                continue
 
-        for alt_text, image_path in image_refs:
-            filename = extract_image_filename(image_path)
+            note = load_note(source_path)
+            yaml_data = note.front_matter
 
-            source_image = Path("working/static/media") / filename
+            if 'title' not in yaml_data or not yaml_data['title']:
+                result['warnings'].append(
+                    "Missing 'title' in YAML front matter"
+                )
+            if 'date' not in yaml_data or not yaml_data['date']:
+                result['warnings'].append(
+                    "Missing 'date' in YAML front matter"
+                )
 
-            if not source_image.exists():
-                result['images_missing'].append(filename)
-                result['warnings'].append(f"Image not found: {source_image}")
-                continue
+            image_refs = note.image_references
 
-            staged_count = count_image_usage(filename, WORKING_STAGED_DIR)
-            working_count = count_image_usage(
-                filename, "working/pages_markdown"
-            )
-            usage_count = staged_count + working_count
+            if image_refs and image_index is None:
+                image_index = build_image_usage_index()
+
+            dest_path = Path(MARKDOWN_DIR) / source_path.name
+            result['destination_path'] = str(dest_path)
 
-            dest_image = Path(STATIC_MEDIA_DIR) / filename
+            note_operations = []
+            note_images = set()
+            previous_names = None
 
-            if dry_run:
-                if usage_count == 1:
-                    print(
-                        f"[DRY RUN] Would move: {source_image} → {dest_image}"
+            for alt_text, image_path in image_refs:
+                filename = extract_image_filename(image_path)
+
+                if filename in note_images:
+                    continue
+                note_images.add(filename)
+
+                if filename in planned_images:
+                    action, usage_count, store_name = (
+                        planned_images[filename]
                     )
-                    result['images_moved'].append(filename)
                 else:
-                    print(
-                        f"[DRY RUN] Would copy: {source_image} → "
-                        f"{dest_image} (used in {usage_count} files)"
+                    source_image = Path(WORKING_MEDIA_DIR) / filename
+
+                    if not source_image.exists():
+                        # Moved away by an earlier publish of this note
+                        if previous_names is None:
+                            previous_names = get_previous_media_names(
+                                note, dest_path
+                            )
+                        if filename in previous_names:
+                            result['media_names'][filename] = (
+                                previous_names[filename]
+                            )
+                            continue
+
+                        result['images_missing'].append(filename)
+                        result['warnings'].append(
+                            f"Image not found: {source_image}"
+                        )
+                        continue
+
+                    usage_count = len(image_index.get(filename, ()))
+                    action = 'move' if usage_count == 1 else 'copy'
+
+                    store_name = get_media_store_name(source_image)
+                    destination = Path(STATIC_MEDIA_DIR) / store_name
+                    stored = (
+                        store_name in planned_store_names
+                        or destination.exists()
                     )
-                    result['images_copied'].append((filename, usage_count))
-            else:
-                dest_image.parent.mkdir(parents=True, exist_ok=True)
 
-                if usage_count == 1:
-                    shutil.move(str(source_image), str(dest_image))
+                    if action == 'move' or not stored:
+                        note_operations.append({
+                            'action': action,
+                            'source': source_image,
+                            'destination': destination,
+                            'usage_count': usage_count,
+                            'stored': stored
+                        })
+                    planned_images[filename] = (action, usage_count, store_name)
+                    planned_store_names.add(store_name)
+
+                result['media_names'][filename] = store_name
+
+                if action == 'move':
                     result['images_moved'].append(filename)
                 else:
-                    shutil.copy2(str(source_image), str(dest_image))
                     result['images_copied'].append((filename, usage_count))
 
-        updated_content = update_image_paths(original_content)
+            result['paths_updated'] = len(image_refs)
+
+            note_operations.append({
+                'action': 'write',
+                'source': source_path,
+                'destination': dest_path,
+                'content': update_image_paths(
+                    note.text, result['media_names'], note.nodes
+                ),
+                'paths_updated': len(image_refs)
+            })
+
+            operations.extend(note_operations)
+            result['success'] = True
+
+        except Exception as e:
+            result['error'] = str(e)
+
+    return results, operations
 
-        result['paths_updated'] = len(image_refs)
 
-        if dry_run:
+def _get_backup_path(path):
+    """Return the hidden path used to back up a file being replaced."""
+    return path.with_name(f".{path.name}.publish-backup")
+
+
+def _place_file(operation, temp_path):
+    """Write an operation's new content to temp_path.
+
+    Moved images are reflinked or hard-linked when possible, so no bytes
+    are copied; the source of a move is only removed at commit. Copied
+    images are reflinked or copied but never hard-linked, since the
+    working copy stays editable while the published one is immutable.
+    """
+    if operation['action'] == 'write':
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(operation['content'])
+        return
+
+    link_or_copy(
+        operation['source'], temp_path,
+        hardlink=operation['action'] == 'move'
+    )
+
+
+def apply_publish_operations(operations):
+    """Apply planned publish operations as one transaction.
+
+    Each destination is written to a temporary file and renamed into
+    place. Files that get replaced are backed up first. If any step
+    fails, every destination is restored and no source is removed.
+    Sources of moved images are deleted only after all writes succeed.
+
+    Args:
+        operations: Operations list from plan_publish().
+
+    Raises:
+        Exception: Whatever caused the failure, after rolling back.
+    """
+    journal = []
+    replaced = set()
+    temp_path = None
+
+    try:
+        for operation in operations:
+            if operation.get('stored'):
+                continue
+
+            destination = Path(operation['destination'])
+            destination.parent.mkdir(parents=True, exist_ok=True)
+
+            temp_path = destination.with_name(
+                f".{destination.name}.publish-tmp"
+            )
+            backup_path = None
+
+            with span(f"{operation['action']} file", "io",
+                      file=destination) as args:
+                _place_file(operation, temp_path)
+
+                # Only back up the pre-transaction version of a file
+                if destination.exists() and destination not in replaced:
+                    backup_path = _get_backup_path(destination)
+                    os.replace(destination, backup_path)
+
+                journal.append((destination, backup_path))
+                replaced.add(destination)
+                os.replace(temp_path, destination)
+                record_file_io(
+                    args,
+                    read_path=(
+                        operation['source']
+                        if operation['action'] != 'write' else None
+                    ),
+                    written_path=destination
+                )
+
+    except Exception:
+        if temp_path is not None and temp_path.exists():
+            temp_path.unlink()
+
+        for destination, backup_path in reversed(journal):
+            if backup_path is not None:
+                os.replace(backup_path, destination)
+            elif destination.exists():
+                destination.unlink()
+        raise
+
+    for destination, backup_path in journal:
+        if backup_path is not None:
+            backup_path.unlink()
+
+    for operation in operations:
+        if operation['action'] == 'move':
+            Path(operation['source']).unlink(missing_ok=True)
+
+
+def _print_dry_run(operations):
+    """Print what applying the planned operations would do."""
+    for operation in operations:
+        source = operation['source']
+        destination = operation['destination']
+
+        if operation.get('stored'):
             print(
-                f"[DRY RUN] Would update {result['paths_updated']} "
-                f"image path(s)"
+                f"[DRY RUN] Would remove: {source} "
+                f"(already stored as {destination})"
+            )
+        elif operation['action'] == 'move':
+            print(f"[DRY RUN] Would move: {source} → {destination}")
+        elif operation['action'] == 'copy':
+            print(
+                f"[DRY RUN] Would copy: {source} → {destination} "
+                f"(used in {operation['usage_count']} files)"
             )
         else:
-            with open(dest_path, 'w', encoding='utf-8') as f:
-                f.write(updated_content)
+            print(f"[DRY RUN] Would copy: {source} → {destination}")
+            print(
+                f"[DRY RUN] Would update {operation['paths_updated']} "
+                f"image path(s)"
+            )
+
+
+def publish_notes(source_paths, dry_run=False, image_index=None):
+    """Publish a batch of markdown files from working/ as one transaction.
+
+    All notes are planned up front with a single shared image scan, then
+    their markdown and images are written atomically: if any write fails,
+    everything already written is rolled back and no image is removed
+    from working/.
+
+    Args:
+        source_paths: Markdown files in working/ (str or Path).
+        dry_run: If True, show what would happen without making changes.
+        image_index: Optional index from build_image_usage_index().
+
+    Returns:
+        List of result dicts, one per source path (see publish_note()).
+    """
+    with span("plan publish", files=len(source_paths)):
+        results, operations = plan_publish(source_paths, image_index)
 
-        result['success'] = True
-        return result
+    if dry_run:
+        _print_dry_run(operations)
+        return results
 
+    try:
+        apply_publish_operations(operations)
     except Exception as e:
-        result['error'] = str(e)
-        return result
+        for result in results:
+            if result['success']:
+                result['success'] = False
+                result['error'] = f"Publish rolled back: {e}"
+
+    return results
+
+
+def publish_note(source_path, dry_run=False, image_index=None):
+    """Publish a single markdown file from working/ to markdown/.
+
+    Process:
+        1. Validate source file exists and is in working/
+        2. Read markdown content
+        3. Parse YAML front matter
+        4. Find image references
+        5. Copy markdown to markdown/ directory
+        6. Handle images (move if unique, copy if shared)
+        7. Update image paths in copied markdown
+
+    Args:
+        source_path: Path to markdown file in working/ (str or Path).
+        dry_run: If True, show what would happen without making changes.
+        image_index: Optional index from build_image_usage_index(). Pass
+                     one index when publishing a batch to avoid rescanning
+                     the working directories for every note.
+
+    Returns:
+        Dict with results containing the following keys:
+            success: Whether the operation succeeded.
+            source_path: Original source file path.
+            destination_path: Published destination path or None.
+            images_moved: List of filenames that were moved.
+            images_copied: List of (filename, usage_count) tuples.
+            images_missing: List of filenames that could not be found.
+            media_names: Dict mapping image filename to its published
+                         content-addressed filename.
+            paths_updated: Number of image paths updated.
+            warnings: List of warning messages.
+            error: Error message or None.
+    """
+    return publish_notes([source_path], dry_run, image_index)[0]
 
 
 if __name__ == "__main__":
@@ -0,0 +1,303 @@
+"""Atomic Site Releases.
+
+The build writes into docs/ (the GitHub Pages tree), so a page read
+mid-build can be half-written or missing. Instead of serving docs/
+directly, each finished build is snapshotted into a release:
+
+    .build/releases/<id>/site/         copy of docs/
+    .build/releases/<id>/compressed/   copy of .build/compressed/
+    .build/current -> releases/<id>    release being served
+
+A release is assembled in a staging directory. Files unchanged since the
+previous release (same size and mtime) are hard links to it, so a
+release only costs the bytes that changed; other files are reflinked or
+copied from docs/, never hard linked, since the build may rewrite them
+in place. The staging directory is then renamed into place and the
+current symlink is swapped with an atomic rename, so the server sees
+either the old release or the new one. The last RELEASES_TO_KEEP
+releases are kept for instant rollback.
+"""
+
+import os
+import shutil
+from datetime import datetime, timezone
+from pathlib import Path
+
+from helper_scripts.file_utils import link_or_copy
+from helper_scripts.static_cache import COMPRESSED_DIR, DOCS_DIR
+from helper_scripts.tracing import span
+
+
+RELEASES_DIR = ".build/releases"
+CURRENT_RELEASE_LINK = ".build/current"
+RELEASES_TO_KEEP = 5
+STAGING_PREFIX = ".staging-"
+
+# Release subdirectory for each tree that is snapshotted
+RELEASE_TREES = {'site': DOCS_DIR, 'compressed': COMPRESSED_DIR}
+
+
+def list_releases(releases_dir=RELEASES_DIR):
+    """Return the ids of finished releases, oldest first.
+
+    Args:
+        releases_dir: Directory holding the releases.
+
+    Returns:
+        List of release id strings.
+    """
+    releases_path = Path(releases_dir)
+    if not releases_path.is_dir():
+        return []
+
+    return sorted(
+        path.name for path in releases_path.iterdir()
+        if path.is_dir() and not path.name.startswith(STAGING_PREFIX)
+    )
+
+
+def get_current_release(current_link=CURRENT_RELEASE_LINK):
+    """Return the id of the release being served, or None.
+
+    Args:
+        current_link: Path of the current release symlink.
+
+    Returns:
+        Release id string, or None if there is no release yet.
+    """
+    try:
+        return Path(os.readlink(current_link)).name
+    except OSError:
+        return None
+
+
+def get_serving_dirs(current_link=CURRENT_RELEASE_LINK):
+    """Return the directories the server should read from.
+
+    The symlink is resolved once, so callers that use the returned paths
+    for a whole request keep reading one release even if a swap happens
+    meanwhile.
+
+    Args:
+        current_link: Path of the current release symlink.
+
+    Returns:
+        Tuple of (site directory, compressed variants directory). Falls
+        back to docs/ and .build/compressed/ when there is no release.
+    """
+    release_path = os.path.realpath(current_link)
+
+    if not os.path.isdir(release_path):
+        return DOCS_DIR, COMPRESSED_DIR
+
+    return (
+        os.path.join(release_path, 'site'),
+        os.path.join(release_path, 'compressed')
+    )
+
+
+def _copy_tree(source_dir, destination_dir, previous_dir, counts):
+    """Snapshot source_dir, hard linking files unchanged since previous_dir.
+
+    Args:
+        source_dir: Tree to snapshot.
+        destination_dir: Staging directory to fill.
+        previous_dir: Same tree in the previous release, or None.
+        counts: Dict of 'linked' and 'copied' counts, updated in place.
+    """
+    for root, dirs, files in os.walk(source_dir):
+        relative_root = os.path.relpath(root, source_dir)
+        target_root = os.path.join(destination_dir, relative_root)
+        os.makedirs(target_root, exist_ok=True)
+
+        for name in files:
+            if name.endswith('.tmp'):
+                continue
+
+            source = os.path.join(root, name)
+            destination = os.path.join(target_root, name)
+            stat = os.stat(source)
+
+            if previous_dir is not None:
+                previous = os.path.join(previous_dir, relative_root, name)
+                try:
+                    previous_stat = os.stat(previous)
+                except OSError:
+                    previous_stat = None
+
+                if (previous_stat is not None
+                        and previous_stat.st_size == stat.st_size
+                        and previous_stat.st_mtime_ns == stat.st_mtime_ns):
+                    try:
+                        os.link(previous, destination)
+                        counts['linked'] += 1
+                        continue
+                    except OSError:
+                        pass
+
+            link_or_copy(source, destination, hardlink=False)
+            counts['copied'] += 1
+
+
+def activate_release(release_id, releases_dir=RELEASES_DIR,
+                     current_link=CURRENT_RELEASE_LINK):
+    """Atomically point the current release symlink at a release.
+
+    Args:
+        release_id: Id of a finished release.
+        releases_dir: Directory holding the releases.
+        current_link: Path of the current release symlink.
+
+    Raises:
+        ValueError: If the release does not exist.
+    """
+    if release_id not in list_releases(releases_dir):
+        raise ValueError(f"Unknown release: {release_id}")
+
+    link_path = Path(current_link)
+    temp_link = link_path.with_name(link_path.name + '.tmp')
+    target = os.path.relpath(
+        Path(releases_dir) / release_id, link_path.parent
+    )
+
+    temp_link.unlink(missing_ok=True)
+    os.symlink(target, temp_link)
+    os.replace(temp_link, link_path)
+
+
+def prune_releases(keep=RELEASES_TO_KEEP, releases_dir=RELEASES_DIR,
+                   current_link=CURRENT_RELEASE_LINK):
+    """Delete old releases and abandoned staging directories.
+
+    The current release is never deleted.
+
+    Args:
+        keep: Number of newest releases to keep.
+        releases_dir: Directory holding the releases.
+        current_link: Path of the current release symlink.
+
+    Returns:
+        List of deleted release ids.
+    """
+    releases_path = Path(releases_dir)
+    current = get_current_release(current_link)
+    releases = list_releases(releases_dir)
+    removed = []
+
+    for release_id in releases[:max(0, len(releases) - keep)]:
+        if release_id == current:
+            continue
+        shutil.rmtree(releases_path / release_id)
+        removed.append(release_id)
+
+    for staging in releases_path.glob(STAGING_PREFIX + '*'):
+        shutil.rmtree(staging, ignore_errors=True)
+
+    return removed
+
+
+def create_release(releases_dir=RELEASES_DIR,
+                   current_link=CURRENT_RELEASE_LINK, trees=None,
+                   keep=RELEASES_TO_KEEP):
+    """Snapshot the built site into a new release and start serving it.
+
+    Args:
+        releases_dir: Directory holding the releases.
+        current_link: Path of the current release symlink.
+        trees: Dict mapping release subdirectory to the directory it is
+               copied from. Defaults to RELEASE_TREES.
+        keep: Number of newest releases to keep.
+
+    Returns:
+        Dict with the release id, linked and copied file counts and the
+        ids of pruned releases.
+    """
+    trees = trees or RELEASE_TREES
+    releases_path = Path(releases_dir)
+    releases_path.mkdir(parents=True, exist_ok=True)
+
+    release_id = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%fZ')
+    staging_path = releases_path / (STAGING_PREFIX + release_id)
+    previous = get_current_release(current_link)
+    counts = {'linked': 0, 'copied': 0}
+
+    with span("create release", release=release_id) as args:
+        for name, source_dir in trees.items():
+            destination_dir = staging_path / name
+            destination_dir.mkdir(parents=True)
+
+            if not Path(source_dir).is_dir():
+                continue
+
+            previous_dir = (
+                releases_path / previous / name if previous else None
+            )
+            _copy_tree(source_dir, destination_dir, previous_dir, counts)
+
+        os.rename(staging_path, releases_path / release_id)
+        activate_release(release_id, releases_dir, current_link)
+        args.update(counts)
+
+    return {
+        'release': release_id,
+        **counts,
+        'pruned': prune_releases(keep, releases_dir, current_link)
+    }
+
+
+def rollback_release(releases_dir=RELEASES_DIR,
+                     current_link=CURRENT_RELEASE_LINK):
+    """Serve the release before the current one.
+
+    Args:
+        releases_dir: Directory holding the releases.
+        current_link: Path of the current release symlink.
+
+    Returns:
+        Id of the release now being served.
+
+    Raises:
+        ValueError: If there is no earlier release.
+    """
+    releases = list_releases(releases_dir)
+    current = get_current_release(current_link)
+    earlier = [
+        release_id for release_id in releases
+        if current is None or release_id < current
+    ]
+
+    if not earlier:
+        raise ValueError("No earlier release to roll back to")
+
+    activate_release(earlier[-1], releases_dir, current_link)
+    return earlier[-1]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Manage site releases")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument(
+        "--rollback", action="store_true",
+        help="serve the release before the current one"
+    )
+    group.add_argument(
+        "--activate", metavar="ID", help="serve the given release"
+    )
+    args = parser.parse_args()
+
+    try:
+        if args.rollback:
+            print(f"✓ Now serving release {rollback_release()}")
+        elif args.activate:
+            activate_release(args.activate)
+            print(f"✓ Now serving release {args.activate}")
+    except ValueError as e:
+        print(f"✗ {e}")
+        raise SystemExit(1)
+
+    current = get_current_release()
+    for release_id in list_releases():
+        marker = "*" if release_id == current else " "
+        print(f"{marker} {release_id}")
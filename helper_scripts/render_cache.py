@@ -0,0 +1,291 @@
+"""Persistent Render Cache.
+
+Keeps rendered HTML pages outside the repository, so a fresh clone, a
+branch switch or a wiped docs/pages/ gets its notes back with a file
+copy instead of another renderer run:
+
+    ~/.cache/field_notes/renders/<key[:2]>/<key>.html
+    ~/.cache/field_notes/renders/<key[:2]>/<key>.json
+
+The .json file is the page's fragment artifact (see renderers.py), kept
+so a restored page can still be re-wrapped when only the template
+changes. It is restored, counted and evicted together with the page.
+Entries are content addressed: the key hashes the note's markdown, the
+template, the renderer version and the renderer options, so an entry is
+never stale, only unused. Entries are written to a temporary file and
+renamed into place, so builders sharing the cache (several checkouts,
+or parallel conversions in one build) see either a whole entry or none.
+A hit touches the entry's mtime; once the cache grows past its size cap
+the least recently used entries are evicted, with trims serialized by a
+lock file.
+
+FIELD_NOTES_RENDER_CACHE sets the cache directory (an empty value turns
+the cache off) and FIELD_NOTES_RENDER_CACHE_MB sets the size cap.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from helper_scripts.file_utils import link_or_copy
+
+
+CACHE_HOME = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser(
+    "~/.cache"
+)
+RENDER_CACHE_DIR = os.environ.get(
+    "FIELD_NOTES_RENDER_CACHE",
+    os.path.join(CACHE_HOME, "field_notes", "renders")
+)
+RENDER_CACHE_MAX_BYTES = (
+    int(os.environ.get("FIELD_NOTES_RENDER_CACHE_MB", "256")) * 1024 * 1024
+)
+RENDER_CACHE_LOCK_FILE = ".lock"
+
+# Temporary files older than this were left by a builder that crashed
+STALE_TEMP_SECONDS = 3600
+
+
+def get_render_key(build_inputs, renderer_options):
+    """Return the cache key for a rendered page.
+
+    Args:
+        build_inputs: Dict of source_hash, template_hash and
+                      renderer_version (see get_build_inputs()).
+        renderer_options: String from renderers.get_renderer_options().
+
+    Returns:
+        Hex digest string.
+    """
+    key_data = json.dumps(
+        {**build_inputs, 'renderer_options': renderer_options},
+        sort_keys=True
+    )
+    return hashlib.sha256(key_data.encode('utf-8')).hexdigest()
+
+
+def get_entry_path(key, cache_dir=RENDER_CACHE_DIR):
+    """Return the path of a cache entry.
+
+    Args:
+        key: Key from get_render_key().
+        cache_dir: Render cache directory.
+
+    Returns:
+        Path of the cached HTML page.
+    """
+    return Path(cache_dir) / key[:2] / f"{key}.html"
+
+
+def _place_entry_file(entry_file, output_path):
+    """Copy a cache file over an output through a temporary file.
+
+    Args:
+        entry_file: Path of the file in the cache.
+        output_path: Path it is restored to.
+
+    Returns:
+        True if the file was placed, False if the cache has no such file.
+    """
+    temp_path = Path(str(output_path) + '.tmp')
+    temp_path.unlink(missing_ok=True)
+
+    try:
+        link_or_copy(entry_file, temp_path, hardlink=False)
+    except OSError:
+        # No entry, or it was evicted while we were reading it
+        temp_path.unlink(missing_ok=True)
+        return False
+
+    os.utime(temp_path)
+    os.replace(temp_path, output_path)
+    return True
+
+
+def _write_entry_file(source_path, entry_file):
+    """Copy a file into the cache through a temporary file."""
+    fd, temp_name = tempfile.mkstemp(dir=entry_file.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f, open(source_path, 'rb') as source:
+            shutil.copyfileobj(source, f)
+        os.replace(temp_name, entry_file)
+    except OSError:
+        os.unlink(temp_name)
+        raise
+
+
+def restore_rendered_page(key, html_output_path, fragment_path=None,
+                          cache_dir=RENDER_CACHE_DIR):
+    """Restore a page from the cache if it holds an entry for the key.
+
+    The page is reflinked or copied (never hard linked, since renderers
+    write their output in place) and renamed over the output, and gets a
+    fresh mtime like a newly rendered page would. The entry's fragment,
+    if any, is restored to fragment_path; without one, a fragment left
+    at fragment_path no longer matches the page and is deleted.
+
+    Args:
+        key: Key from get_render_key().
+        html_output_path: Path where the HTML page belongs.
+        fragment_path: Optional path where the page's fragment belongs.
+        cache_dir: Render cache directory, or '' if the cache is off.
+
+    Returns:
+        True if the page was restored, False on a miss.
+    """
+    if not cache_dir:
+        return False
+
+    entry_path = get_entry_path(key, cache_dir)
+    if not _place_entry_file(entry_path, html_output_path):
+        return False
+
+    if fragment_path is not None:
+        fragment_path = Path(fragment_path)
+        fragment_path.parent.mkdir(parents=True, exist_ok=True)
+        if not _place_entry_file(entry_path.with_suffix('.json'),
+                                 fragment_path):
+            fragment_path.unlink(missing_ok=True)
+
+    try:
+        os.utime(entry_path)
+    except OSError:
+        pass
+
+    return True
+
+
+def store_rendered_page(key, html_output_path, fragment_path=None,
+                        cache_dir=RENDER_CACHE_DIR):
+    """Add a freshly rendered page, and its fragment, to the cache.
+
+    The fragment is written before the page, so a builder that finds
+    the page also finds its fragment. A cache that cannot be written
+    never fails the build; a warning is printed instead.
+
+    Args:
+        key: Key from get_render_key().
+        html_output_path: Path of the rendered HTML page.
+        fragment_path: Optional path of the page's fragment artifact;
+                       skipped if the renderer did not write one.
+        cache_dir: Render cache directory, or '' if the cache is off.
+
+    Returns:
+        True if the page was stored.
+    """
+    if not cache_dir:
+        return False
+
+    entry_path = get_entry_path(key, cache_dir)
+
+    try:
+        entry_path.parent.mkdir(parents=True, exist_ok=True)
+        if fragment_path is not None and Path(fragment_path).exists():
+            _write_entry_file(fragment_path, entry_path.with_suffix('.json'))
+        _write_entry_file(html_output_path, entry_path)
+    except OSError as e:
+        print(f"⚠ Could not write render cache entry for "
+              f"{html_output_path}: {e}")
+        return False
+
+    return True
+
+
+def trim_render_cache(max_bytes=RENDER_CACHE_MAX_BYTES,
+                      cache_dir=RENDER_CACHE_DIR):
+    """Evict least recently used entries until the cache fits its cap.
+
+    An entry's size includes its fragment, which is evicted with it.
+    Also removes temporary files abandoned by crashed builders and
+    fragments whose page is gone. Trims from concurrent builders take
+    turns on an exclusive lock file where the platform supports it.
+
+    Args:
+        max_bytes: Size cap for the cache.
+        cache_dir: Render cache directory, or '' if the cache is off.
+
+    Returns:
+        Dict with the number of entries and bytes kept, the number of
+        entries evicted and the size cap.
+    """
+    result = {
+        'entries': 0, 'bytes': 0, 'evicted': 0, 'max_bytes': max_bytes
+    }
+    cache_path = Path(cache_dir) if cache_dir else None
+
+    if cache_path is None or not cache_path.is_dir():
+        return result
+
+    try:
+        import fcntl
+    except ImportError:
+        fcntl = None
+
+    with open(cache_path / RENDER_CACHE_LOCK_FILE, 'a') as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+
+        stale_before = time.time() - STALE_TEMP_SECONDS
+        for temp_path in cache_path.glob('*/*.tmp'):
+            try:
+                if temp_path.stat().st_mtime < stale_before:
+                    temp_path.unlink()
+            except OSError:
+                pass
+
+        for fragment_path in cache_path.glob('*/*.json'):
+            if not fragment_path.with_suffix('.html').exists():
+                fragment_path.unlink(missing_ok=True)
+
+        entries = []
+        for entry_path in cache_path.glob('*/*.html'):
+            try:
+                stat = entry_path.stat()
+            except OSError:
+                continue
+            size = stat.st_size
+            try:
+                size += entry_path.with_suffix('.json').stat().st_size
+            except OSError:
+                pass
+            entries.append((stat.st_mtime, size, entry_path))
+
+        total = sum(size for _, size, _ in entries)
+        entries.sort()
+
+        for _, size, entry_path in entries:
+            if total <= max_bytes:
+                break
+            entry_path.unlink(missing_ok=True)
+            entry_path.with_suffix('.json').unlink(missing_ok=True)
+            total -= size
+            result['evicted'] += 1
+
+    result['entries'] = len(entries) - result['evicted']
+    result['bytes'] = total
+    return result
+
+
+def format_cache_stats(hits, misses, trim=None):
+    """Return a one-line summary of render cache use for a build.
+
+    Args:
+        hits: Pages restored from the cache.
+        misses: Pages that had to be rendered.
+        trim: Optional dict from trim_render_cache().
+
+    Returns:
+        Summary string.
+    """
+    line = f"Render cache: {hits} hit(s), {misses} miss(es)"
+    if trim is not None:
+        line += (
+            f", {trim['evicted']} evicted "
+            f"({trim['bytes'] / (1024 * 1024):.1f} of "
+            f"{trim['max_bytes'] / (1024 * 1024):.0f} MB used)"
+        )
+    return line
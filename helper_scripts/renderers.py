@@ -0,0 +1,680 @@
+"""Markdown Renderer Backends.
+
+Renders markdown notes to standalone HTML pages using one of three
+backends:
+    pandoc:       One Pandoc subprocess per file (default).
+    pandoc-batch: Long-lived `pandoc lua` workers that each convert many
+                  files, so Pandoc's startup cost is paid once per worker.
+    python:       In-process rendering with the Python-Markdown package,
+                  filling the same template variables without Pandoc.
+
+The backend is chosen by name, either passed explicitly or read from the
+FIELD_NOTES_RENDERER environment variable.
+
+Every backend splits rendering in two. The renderer produces a note's
+body fragment and front matter variables, which are saved as a fragment
+artifact under .build/fragments/; the page is then produced in-process
+by filling the HTML template with them. Pandoc is run with a template
+that prints only `$meta-json$` and `$body$` (at the body's indentation
+in the real template, so the body is laid out the same way). When only
+the template changes, pages are re-wrapped from their fragments without
+rendering.
+"""
+
+import hashlib
+import html
+import json
+import os
+import re
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from helper_scripts.file_utils import hash_file
+from helper_scripts.notes import split_yaml_front_matter
+from helper_scripts.tracing import record_file_io, span
+
+
+RENDERER_PANDOC = "pandoc"
+RENDERER_PANDOC_BATCH = "pandoc-batch"
+RENDERER_PYTHON = "python"
+RENDERERS = (RENDERER_PANDOC, RENDERER_PANDOC_BATCH, RENDERER_PYTHON)
+DEFAULT_RENDERER = os.environ.get("FIELD_NOTES_RENDERER", RENDERER_PANDOC)
+
+PANDOC_BATCH_SCRIPT = Path(__file__).with_name("pandoc_batch.lua")
+FRAGMENTS_DIR = ".build/fragments"
+
+# Stands in for a Pandoc-laid-out body while the template is filled
+BODY_PLACEHOLDER = "\0body\0"
+PYTHON_MARKDOWN_EXTENSIONS = ['extra', 'toc', 'sane_lists']
+TEMPLATE_VARIABLES = ('title', 'date', 'author', 'description')
+
+TEMPLATE_TAG_PATTERN = re.compile(
+    r'\$\$|\$(?:if\((?P<condition>[\w.-]+)\)|(?P<keyword>else|endif)'
+    r'|(?P<variable>[\w.-]+))\$'
+)
+
+
+def get_pandoc_version():
+    """Return the installed Pandoc version string.
+
+    Returns:
+        First line of `pandoc --version`, or None if Pandoc is unavailable.
+    """
+    try:
+        output = subprocess.run(
+            ["pandoc", "--version"],
+            check=True,
+            capture_output=True,
+            text=True
+        ).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+    return output.splitlines()[0] if output else None
+
+
+def get_python_markdown_version():
+    """Return the installed Python-Markdown version string.
+
+    Returns:
+        Version string (e.g. "python-markdown 3.5"), or None if the
+        markdown package is not installed.
+    """
+    try:
+        import markdown
+    except ImportError:
+        return None
+
+    return f"python-markdown {markdown.__version__}"
+
+
+def get_renderer_version(renderer):
+    """Return the version string recorded in the build manifest.
+
+    Both Pandoc backends produce identical output, so they share the
+    Pandoc version and switching between them does not force a rebuild.
+
+    Args:
+        renderer: Renderer name.
+
+    Returns:
+        Version string, or None if the renderer is unavailable.
+    """
+    if renderer == RENDERER_PYTHON:
+        return get_python_markdown_version()
+
+    return get_pandoc_version()
+
+
+def get_renderer_options(renderer):
+    """Return the options a renderer runs with, for the render cache key.
+
+    Both Pandoc backends fill the template the same way, so they share
+    their options and their cache entries.
+
+    Args:
+        renderer: Renderer name.
+
+    Returns:
+        Options string.
+    """
+    if renderer == RENDERER_PYTHON:
+        return 'extensions=' + ','.join(PYTHON_MARKDOWN_EXTENSIONS)
+
+    return '--standalone'
+
+
+def resolve_renderer(renderer=None):
+    """Validate a renderer name and fall back when Pandoc is missing.
+
+    Args:
+        renderer: Renderer name, or None for DEFAULT_RENDERER.
+
+    Returns:
+        Tuple of (renderer name, renderer version string or None).
+
+    Raises:
+        ValueError: If the renderer name is unknown.
+    """
+    renderer = renderer or DEFAULT_RENDERER
+
+    if renderer not in RENDERERS:
+        raise ValueError(
+            f"Unknown renderer '{renderer}' "
+            f"(choose from: {', '.join(RENDERERS)})"
+        )
+
+    version = get_renderer_version(renderer)
+
+    if version is None and renderer != RENDERER_PYTHON:
+        python_version = get_python_markdown_version()
+        if python_version is not None:
+            print(
+                f"Warning: Pandoc not found, falling back to the "
+                f"'{RENDERER_PYTHON}' renderer"
+            )
+            return RENDERER_PYTHON, python_version
+
+    return renderer, version
+
+
+def fill_template(template_text, variables):
+    """Fill a Pandoc-style HTML template in-process.
+
+    Supports `$variable$`, `$if(variable)$ ... $else$ ... $endif$` and
+    `$$`, following Pandoc's layout rules: a conditional keyword alone on
+    its line swallows the following newline, and a multi-line value
+    interpolated after indentation has each line indented to match.
+
+    Args:
+        template_text: Template source (e.g. docs/static/template.html).
+        variables: Dict of variable name to already-escaped string value.
+
+    Returns:
+        Filled template string.
+    """
+    output = []
+    stack = []
+    active = True
+    position = 0
+
+    for match in TEMPLATE_TAG_PATTERN.finditer(template_text):
+        if active:
+            output.append(template_text[position:match.start()])
+        position = match.end()
+
+        line_start = template_text.rfind('\n', 0, match.start()) + 1
+        indent = template_text[line_start:match.start()]
+        alone_on_line = not indent.strip()
+
+        if match.group(0) == '$$':
+            if active:
+                output.append('$')
+            continue
+
+        if match.group('variable'):
+            if active:
+                value = str(variables.get(match.group('variable')) or '')
+                if alone_on_line and indent:
+                    value = '\n'.join(
+                        indent + line if line and i else line
+                        for i, line in enumerate(value.split('\n'))
+                    )
+                output.append(value)
+            continue
+
+        if match.group('condition'):
+            condition = bool(variables.get(match.group('condition')))
+            stack.append((active, condition))
+            active = active and condition
+        elif match.group('keyword') == 'else':
+            parent_active, condition = stack[-1]
+            active = parent_active and not condition
+        else:
+            active = stack.pop()[0]
+
+        if alone_on_line and template_text.startswith('\n', position):
+            position += 1
+
+    if active:
+        output.append(template_text[position:])
+
+    return ''.join(output)
+
+
+def get_template_variables(fields):
+    """Build escaped template variables from front matter fields.
+
+    Args:
+        fields: Dict of front matter fields.
+
+    Returns:
+        Dict of template variable name to HTML-escaped string.
+    """
+    variables = {}
+
+    for name in TEMPLATE_VARIABLES:
+        value = fields.get(name)
+        if isinstance(value, list):
+            value = ', '.join(value)
+        if value:
+            variables[name] = html.escape(value)
+
+    return variables
+
+
+def _format_pandoc_value(value):
+    """Format a meta-json value the way Pandoc interpolates it."""
+    if isinstance(value, list):
+        return ''.join(_format_pandoc_value(item) for item in value)
+    if value is True:
+        return 'true'
+    if isinstance(value, str):
+        return value
+    return ''
+
+
+def get_body_indent(template_text):
+    """Return the indentation of `$body$` in a template.
+
+    Pandoc wraps the body to fit the column it is interpolated at, so a
+    fragment rendered by Pandoc only fits templates with the same body
+    indentation.
+
+    Args:
+        template_text: Contents of the HTML template.
+
+    Returns:
+        Whitespace before `$body$` if it is alone on its line, else ''.
+    """
+    for match in TEMPLATE_TAG_PATTERN.finditer(template_text):
+        if match.group('variable') == 'body':
+            line_start = template_text.rfind('\n', 0, match.start()) + 1
+            indent = template_text[line_start:match.start()]
+            line_end = template_text.find('\n', match.end())
+            if line_end == -1:
+                line_end = len(template_text)
+            rest = template_text[match.end():line_end]
+            if not indent.strip() and not rest.strip():
+                return indent
+            return ''
+
+    return ''
+
+
+def get_parts_template(template_text):
+    """Return a Pandoc template that prints only a note's parts.
+
+    The template prints `$meta-json$` on the first line and `$body$` at
+    the same indentation as in the HTML template, so Pandoc lays out the
+    body exactly as it would inside the real page.
+
+    Args:
+        template_text: Contents of the HTML template.
+
+    Returns:
+        Path of the parts template, written under FRAGMENTS_DIR.
+    """
+    indent = get_body_indent(template_text)
+    parts_text = f"$meta-json$\n{indent}$body$\n"
+    parts_path = Path(FRAGMENTS_DIR) / (
+        f"parts-{hashlib.sha256(parts_text.encode()).hexdigest()[:12]}"
+        ".template"
+    )
+
+    if not parts_path.exists():
+        parts_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_name = tempfile.mkstemp(
+            dir=parts_path.parent, suffix='.tmp'
+        )
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(parts_text)
+        os.replace(temp_name, parts_path)
+
+    return parts_path
+
+
+def parse_pandoc_parts(output, body_indent):
+    """Split Pandoc output of a parts template into a fragment.
+
+    Args:
+        output: Text with the meta-json line followed by the body.
+        body_indent: Indentation the body was laid out at.
+
+    Returns:
+        Dict with the template variables, the body and its indentation.
+    """
+    meta_json, _, body = output.partition('\n')
+    meta = json.loads(meta_json)
+
+    variables = {}
+    for name in TEMPLATE_VARIABLES:
+        value = _format_pandoc_value(meta.get(name))
+        if value:
+            variables[name] = value
+
+    if body.startswith(body_indent):
+        body = body[len(body_indent):]
+
+    return {
+        'variables': variables,
+        'body': body[:-1] if body.endswith('\n') else body,
+        'body_indent': body_indent
+    }
+
+
+def get_fragment_path(html_output_file):
+    """Return the path of a page's fragment artifact.
+
+    Args:
+        html_output_file: Path to the HTML page.
+
+    Returns:
+        Path under FRAGMENTS_DIR.
+    """
+    return Path(FRAGMENTS_DIR) / f"{Path(html_output_file).stem}.json"
+
+
+def load_fragment(html_output_file):
+    """Load a page's fragment artifact.
+
+    Args:
+        html_output_file: Path to the HTML page.
+
+    Returns:
+        Fragment dict (see save_rendered_note()), or None if there is
+        no readable fragment.
+    """
+    try:
+        with open(get_fragment_path(html_output_file), 'r',
+                  encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def can_wrap_fragment(fragment, template_text):
+    """Check whether a fragment can be wrapped in a template.
+
+    Args:
+        fragment: Fragment dict.
+        template_text: Contents of the HTML template.
+
+    Returns:
+        True unless Pandoc laid the body out for a different indentation.
+    """
+    return (
+        fragment['body_indent'] is None
+        or fragment['body_indent'] == get_body_indent(template_text)
+    )
+
+
+def write_page(html_output_file, template_text, fragment):
+    """Fill the template with a fragment and write the page atomically.
+
+    A body laid out by Pandoc is inserted as is; other bodies are
+    indented by fill_template().
+
+    Args:
+        html_output_file: Path where the HTML page will be saved.
+        template_text: Contents of the HTML template.
+        fragment: Fragment dict.
+    """
+    variables = dict(fragment['variables'])
+
+    if fragment['body_indent'] is None:
+        variables['body'] = fragment['body']
+        page = fill_template(template_text, variables)
+    else:
+        variables['body'] = BODY_PLACEHOLDER
+        page = fill_template(template_text, variables).replace(
+            BODY_PLACEHOLDER, fragment['body']
+        )
+
+    temp_path = Path(str(html_output_file) + '.tmp')
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.write(page)
+    os.replace(temp_path, html_output_file)
+
+
+def save_rendered_note(markdown_file, html_output_file, template_text,
+                       fragment, renderer, source_hash):
+    """Save a note's fragment artifact and write its page.
+
+    The artifact records the markdown it was rendered from, so later
+    builds can tell whether it is still current.
+
+    Args:
+        markdown_file: Path to the markdown file that was rendered.
+        html_output_file: Path where the HTML page will be saved.
+        template_text: Contents of the HTML template.
+        fragment: Dict with variables, body and body_indent (None if
+                  fill_template() should indent the body).
+        renderer: Renderer name.
+        source_hash: Content hash of the markdown that was rendered.
+    """
+    fragment = {
+        'source': str(markdown_file),
+        'source_hash': source_hash,
+        'renderer_options': get_renderer_options(renderer),
+        **fragment
+    }
+
+    fragment_path = get_fragment_path(html_output_file)
+    fragment_path.parent.mkdir(parents=True, exist_ok=True)
+
+    temp_path = fragment_path.with_suffix('.json.tmp')
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(fragment, f)
+    os.replace(temp_path, fragment_path)
+
+    write_page(html_output_file, template_text, fragment)
+
+
+def render_with_pandoc(markdown_file, html_output_file, template_file):
+    """Render a single markdown file with a Pandoc subprocess.
+
+    Args:
+        markdown_file: Path to the input markdown file.
+        html_output_file: Path where the output HTML file will be saved.
+        template_file: Path to the HTML template.
+
+    Returns:
+        True if the conversion succeeded, False otherwise.
+    """
+    try:
+        with span("pandoc", "subprocess", file=markdown_file) as args:
+            with open(template_file, 'r', encoding='utf-8') as f:
+                template_text = f.read()
+            source_hash = hash_file(markdown_file)
+
+            completed = subprocess.run(
+                [
+                    "pandoc",
+                    str(markdown_file),
+                    f"--template={get_parts_template(template_text)}",
+                    "--standalone"
+                ],
+                check=True, capture_output=True, text=True,
+                encoding='utf-8'
+            )
+            save_rendered_note(
+                markdown_file, html_output_file, template_text,
+                parse_pandoc_parts(
+                    completed.stdout, get_body_indent(template_text)
+                ),
+                RENDERER_PANDOC, source_hash
+            )
+            record_file_io(args, markdown_file, html_output_file)
+        return True
+    except subprocess.CalledProcessError as e:
+        print(f"Error: Pandoc command failed with error: {e}")
+        if e.stderr:
+            print(e.stderr.rstrip())
+    except OSError as e:
+        print(f"Error: Could not run Pandoc: {e}")
+
+    return False
+
+
+def render_batch_with_pandoc(jobs, template_file):
+    """Render many markdown files in one long-lived Pandoc process.
+
+    The workers write each note's parts (see get_parts_template()) next
+    to its page, and the pages are then filled in-process.
+
+    Args:
+        jobs: List of (markdown_file, html_output_file) tuples.
+        template_file: Path to the HTML template.
+
+    Returns:
+        List of booleans, one per job, True where conversion succeeded.
+    """
+    with open(template_file, 'r', encoding='utf-8') as f:
+        template_text = f.read()
+    body_indent = get_body_indent(template_text)
+
+    command = [
+        "pandoc", "lua", str(PANDOC_BATCH_SCRIPT),
+        str(get_parts_template(template_text))
+    ]
+    job_input = ''.join(
+        f"{markdown_file}\t{html_output_file}.parts\n"
+        for markdown_file, html_output_file in jobs
+    )
+    source_hashes = [hash_file(markdown_file) for markdown_file, _ in jobs]
+
+    try:
+        with span("pandoc batch", "subprocess", files=len(jobs)) as args:
+            completed = subprocess.run(
+                command, input=job_input, capture_output=True, text=True
+            )
+            for markdown_file, html_output_file in jobs:
+                record_file_io(args, markdown_file, html_output_file)
+    except OSError as e:
+        print(f"Error: Could not run Pandoc: {e}")
+        return [False] * len(jobs)
+
+    results = {}
+    for line in completed.stdout.splitlines():
+        status, markdown_file, *message = line.split('\t')
+        results[markdown_file] = status == 'ok'
+        if status != 'ok':
+            print(f"Error: Pandoc failed on {markdown_file}: {message[0]}")
+
+    if completed.returncode != 0 and completed.stderr:
+        print(
+            f"Error: Pandoc batch worker failed: {completed.stderr.rstrip()}"
+        )
+
+    successes = []
+    for (markdown_file, html_output_file), source_hash in zip(
+        jobs, source_hashes
+    ):
+        parts_path = Path(f"{html_output_file}.parts")
+        success = results.get(str(markdown_file), False)
+
+        if success:
+            try:
+                save_rendered_note(
+                    markdown_file, html_output_file, template_text,
+                    parse_pandoc_parts(
+                        parts_path.read_text(encoding='utf-8'), body_indent
+                    ),
+                    RENDERER_PANDOC_BATCH, source_hash
+                )
+            except (OSError, ValueError) as e:
+                print(f"Error: Could not write {html_output_file}: {e}")
+                success = False
+
+        parts_path.unlink(missing_ok=True)
+        successes.append(success)
+
+    return successes
+
+
+def render_with_python_markdown(markdown_file, html_output_file,
+                                template_text):
+    """Render a single markdown file in-process with Python-Markdown.
+
+    Args:
+        markdown_file: Path to the input markdown file.
+        html_output_file: Path where the output HTML file will be saved.
+        template_text: Contents of the HTML template.
+
+    Returns:
+        True if the conversion succeeded, False otherwise.
+    """
+    try:
+        import markdown
+    except ImportError:
+        print("Error: The 'markdown' package is required for the python "
+              "renderer (pip install markdown)")
+        return False
+
+    try:
+        with span("python-markdown", "render", file=markdown_file) as args:
+            source_hash = hash_file(markdown_file)
+            with open(markdown_file, 'r', encoding='utf-8') as f:
+                content = f.read()
+
+            fields, body = split_yaml_front_matter(content)
+
+            fragment = {
+                'variables': get_template_variables(fields),
+                'body': markdown.markdown(
+                    body, extensions=PYTHON_MARKDOWN_EXTENSIONS
+                ),
+                'body_indent': None
+            }
+
+            save_rendered_note(
+                markdown_file, html_output_file, template_text, fragment,
+                RENDERER_PYTHON, source_hash
+            )
+
+            record_file_io(args, markdown_file, html_output_file)
+
+        return True
+
+    except Exception as e:
+        print(f"Error: Could not render {markdown_file}: {e}")
+        return False
+
+
+def render_files(jobs, renderer, template_file, workers=1):
+    """Render markdown files with the chosen backend.
+
+    Pandoc backends spread jobs over up to `workers` concurrent
+    processes; the python backend renders in-process one file at a time.
+
+    Args:
+        jobs: List of (markdown_file, html_output_file) tuples.
+        renderer: Renderer name from RENDERERS.
+        template_file: Path to the HTML template.
+        workers: Maximum number of concurrent Pandoc processes.
+
+    Yields:
+        (markdown_file, html_output_file, success) tuples as each job
+        finishes.
+    """
+    if renderer == RENDERER_PYTHON:
+        with open(template_file, 'r', encoding='utf-8') as f:
+            template_text = f.read()
+
+        for markdown_file, html_output_file in jobs:
+            success = render_with_python_markdown(
+                markdown_file, html_output_file, template_text
+            )
+            yield markdown_file, html_output_file, success
+        return
+
+    workers = max(1, min(workers, len(jobs) or 1))
+
+    # Threads are enough here: each worker just waits on a Pandoc process.
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        if renderer == RENDERER_PANDOC_BATCH:
+            chunks = [jobs[i::workers] for i in range(workers)]
+            futures = {
+                executor.submit(render_batch_with_pandoc, chunk,
+                                template_file): chunk
+                for chunk in chunks if chunk
+            }
+
+            for future in as_completed(futures):
+                for job, success in zip(futures[future], future.result()):
+                    yield job[0], job[1], success
+
+        else:
+            futures = {
+                executor.submit(render_with_pandoc, markdown_file,
+                                html_output_file, template_file):
+                    (markdown_file, html_output_file)
+                for markdown_file, html_output_file in jobs
+            }
+
+            for future in as_completed(futures):
+                markdown_file, html_output_file = futures[future]
+                yield markdown_file, html_output_file, future.result()
@@ -0,0 +1,612 @@
+"""Full-Text Search Index.
+
+Builds an inverted index over the titles, tags, descriptions and body
+text of published pages, and answers queries against it. The index is
+written as static JSON under docs/static/search/ so it can be queried by
+the Flask /search route and by docs/static/search.js on the static site:
+
+    meta.json            Shard counts, document count and the tokenizer
+                         settings (stop words, stemming rules) the client
+                         must mirror.
+    terms/<shard>.json   {term: [[doc_id, ...], [weight, ...]]} with
+                         sorted doc ids, one file per FNV-1a hash bucket
+                         of the term.
+    docs/<n>.json        {doc_id: [url, title, date]} for doc ids
+                         n * DOCUMENT_SHARD_SIZE and up.
+
+Each page's terms are cached in .build/search_index.json by source hash
+(or mtime and size for hand-written pages), so a build only re-tokenizes
+changed pages and only rewrites the shards their terms fall into. Doc
+ids are stable: a page keeps its id while it exists, and new pages take
+the ids of removed ones before new ids are appended. The shards of an
+incrementally updated index can therefore number pages differently
+from a clean build's, but they answer every query the same way.
+"""
+
+import heapq
+import json
+import math
+import os
+import re
+import shutil
+import unicodedata
+from collections import Counter
+from functools import lru_cache
+from html import unescape
+from pathlib import Path
+
+from helper_scripts.notes import load_note
+from helper_scripts.notes_index import load_notes_index
+from helper_scripts.tracing import span
+
+
+DOCS_DIR = "docs"
+SEARCH_DIR = "docs/static/search"
+SEARCH_STATE_FILE = ".build/search_index.json"
+SEARCH_INDEX_VERSION = 1
+
+TERM_SHARD_COUNT = 64
+DOCUMENT_SHARD_SIZE = 1000
+
+# Term weight per occurrence in each field
+FIELD_WEIGHTS = {'title': 5, 'tags': 3, 'description': 2, 'body': 1}
+
+# Term frequency saturation used when scoring (as in BM25)
+SCORE_K1 = 1.2
+
+MIN_TOKEN_LENGTH = 2
+MIN_STEM_LENGTH = 3
+
+STOP_WORDS = frozenset((
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'but', 'by', 'for', 'from',
+    'has', 'have', 'he', 'her', 'his', 'i', 'if', 'in', 'into', 'is', 'it',
+    'its', 'me', 'my', 'no', 'not', 'of', 'on', 'or', 'our', 'she', 'so',
+    'than', 'that', 'the', 'their', 'them', 'then', 'there', 'these',
+    'they', 'this', 'to', 'was', 'we', 'were', 'what', 'when', 'which',
+    'who', 'will', 'with', 'you', 'your'
+))
+
+# Suffix stripping steps: the first matching suffix of each step is
+# replaced, if at least MIN_STEM_LENGTH characters remain
+STEM_STEPS = (
+    (('sses', 'ss'), ('ies', 'y'), ('ss', 'ss'), ('us', 'us'), ('is', 'is'),
+     ('s', '')),
+    (('ingly', ''), ('edly', ''), ('ing', ''), ('ed', ''), ('ly', ''))
+)
+
+TOKEN_PATTERN = re.compile(r'[^\W_]+')
+MARKDOWN_URL_PATTERN = re.compile(r'\]\([^)]*\)')
+HTML_SKIP_PATTERN = re.compile(
+    r'<(script|style)\b.*?</\1\s*>', re.IGNORECASE | re.DOTALL
+)
+HTML_TAG_PATTERN = re.compile(r'<[^>]+>')
+
+# Loaded shard files keyed by path, with the (mtime, size) they were read at
+_shard_cache = {}
+
+# Per-term {doc_id: score} dicts keyed by term, with the shard signature
+# and document count they were computed from
+_term_score_cache = {}
+
+
+def tokenize(text):
+    """Split text into lowercase word tokens, dropping stop words.
+
+    Args:
+        text: Text to tokenize.
+
+    Returns:
+        List of tokens.
+    """
+    text = unicodedata.normalize('NFKC', text).lower()
+
+    return [
+        token for token in TOKEN_PATTERN.findall(text)
+        if len(token) >= MIN_TOKEN_LENGTH and token not in STOP_WORDS
+    ]
+
+
+@lru_cache(maxsize=65536)
+def stem(token):
+    """Reduce a token to its stem with light suffix stripping.
+
+    Args:
+        token: Lowercase token.
+
+    Returns:
+        Stemmed token.
+    """
+    for rules in STEM_STEPS:
+        for suffix, replacement in rules:
+            if token.endswith(suffix):
+                candidate = token[:-len(suffix)] + replacement
+                if len(candidate) >= MIN_STEM_LENGTH:
+                    token = candidate
+                break
+
+    return token
+
+
+def get_terms(text):
+    """Return the stemmed search terms of a text, in order.
+
+    Args:
+        text: Text to analyze.
+
+    Returns:
+        List of terms.
+    """
+    return [stem(token) for token in tokenize(text)]
+
+
+def get_term_shard(term, shard_count=TERM_SHARD_COUNT):
+    """Return the shard number for a term (FNV-1a hash of its UTF-8).
+
+    Args:
+        term: Search term.
+        shard_count: Number of term shards.
+
+    Returns:
+        Integer in range(shard_count).
+    """
+    value = 0x811c9dc5
+    for byte in term.encode('utf-8'):
+        value ^= byte
+        value = (value * 0x01000193) & 0xffffffff
+    return value % shard_count
+
+
+def get_term_shard_path(shard, search_dir=SEARCH_DIR):
+    """Return the file path of a term shard."""
+    return Path(search_dir) / "terms" / f"{shard:02x}.json"
+
+
+def get_document_shard_path(doc_id, search_dir=SEARCH_DIR):
+    """Return the file path of the document shard holding a doc id."""
+    return Path(search_dir) / "docs" / f"{doc_id // DOCUMENT_SHARD_SIZE}.json"
+
+
+def get_page_url(output_path):
+    """Return a page's URL path relative to the site root.
+
+    Args:
+        output_path: Path of the HTML page under DOCS_DIR.
+
+    Returns:
+        URL path without a leading slash (e.g. "pages/note.html").
+    """
+    return Path(output_path).relative_to(DOCS_DIR).as_posix()
+
+
+def get_page_fields(entry):
+    """Return the searchable text fields of a page.
+
+    Converted notes are read from their markdown source; hand-written
+    pages from their HTML.
+
+    Args:
+        entry: Notes index entry (see notes_index.build_note_entry()).
+
+    Returns:
+        Dict mapping FIELD_WEIGHTS keys to text.
+    """
+    fields = {
+        'title': entry.get('title', ''),
+        'tags': ' '.join(entry.get('tags') or []),
+        'description': entry.get('description', '')
+    }
+
+    if entry.get('source'):
+        body = load_note(entry['source']).body
+        fields['body'] = MARKDOWN_URL_PATTERN.sub('] ', body)
+    else:
+        with open(entry['output'], 'r', encoding='utf-8') as f:
+            page = f.read()
+        page = HTML_SKIP_PATTERN.sub(' ', page)
+        fields['body'] = unescape(HTML_TAG_PATTERN.sub(' ', page))
+
+    return fields
+
+
+def get_document_terms(entry):
+    """Return the weighted terms of a page.
+
+    Args:
+        entry: Notes index entry.
+
+    Returns:
+        Dict mapping term to its summed field weight.
+    """
+    terms = {}
+
+    for field_name, text in get_page_fields(entry).items():
+        weight = FIELD_WEIGHTS[field_name]
+        for token, count in Counter(tokenize(text)).items():
+            term = stem(token)
+            terms[term] = terms.get(term, 0) + weight * count
+
+    return terms
+
+
+def get_entry_version(entry):
+    """Return the value that changes whenever a page's content changes."""
+    if entry.get('source_hash'):
+        return entry['source_hash']
+    return entry.get('signature')
+
+
+def _write_json(path, data):
+    """Atomically write compact JSON to path."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    temp_path = path.with_name(f".{path.name}.tmp")
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps(data, ensure_ascii=False, separators=(',', ':'),
+                           sort_keys=True))
+    os.replace(temp_path, path)
+
+
+def _read_json(path, default):
+    """Read JSON from path, returning default if missing or unreadable."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def load_search_state(state_file=SEARCH_STATE_FILE, search_dir=SEARCH_DIR):
+    """Load the per-page search terms recorded by the last build.
+
+    The state is discarded (forcing a full rebuild) if it is missing, from
+    another index version, or if the published meta.json is missing.
+
+    Args:
+        state_file: Path to the state JSON file.
+        search_dir: Directory of the published index.
+
+    Returns:
+        Dict with version, next_id, free_ids (ids of removed pages, for
+        reuse) and a documents mapping of output path to {id, version,
+        url, title, date, terms}.
+    """
+    state = _read_json(state_file, None)
+    meta_exists = (Path(search_dir) / "meta.json").exists()
+
+    if (not isinstance(state, dict) or not meta_exists
+            or state.get('version') != SEARCH_INDEX_VERSION):
+        return {'version': SEARCH_INDEX_VERSION, 'next_id': 0,
+                'free_ids': [], 'documents': {}}
+
+    state.setdefault('free_ids', [])
+    return state
+
+
+def get_search_meta(document_count):
+    """Return the meta.json contents the client needs to query the index.
+
+    Args:
+        document_count: Number of indexed pages.
+
+    Returns:
+        Dict.
+    """
+    return {
+        'version': SEARCH_INDEX_VERSION,
+        'document_count': document_count,
+        'term_shard_count': TERM_SHARD_COUNT,
+        'document_shard_size': DOCUMENT_SHARD_SIZE,
+        'min_token_length': MIN_TOKEN_LENGTH,
+        'min_stem_length': MIN_STEM_LENGTH,
+        'stop_words': sorted(STOP_WORDS),
+        'stem_steps': STEM_STEPS,
+        'k1': SCORE_K1
+    }
+
+
+def build_search_index(search_dir=SEARCH_DIR, state_file=SEARCH_STATE_FILE):
+    """Update the search index for pages added, changed or removed.
+
+    Pages come from the notes index, so this runs after generate_index.
+    Only changed pages are re-tokenized, and only the term and document
+    shards they touch are rewritten. Removed pages free their doc ids,
+    which added pages reuse (lowest first) before new ids are appended.
+
+    Args:
+        search_dir: Directory of the published index.
+        state_file: Path to the state JSON file.
+
+    Returns:
+        Number of pages added, updated or removed.
+    """
+    state = load_search_state(state_file, search_dir)
+    documents = state['documents']
+
+    if not documents:
+        _clear_search_shards(search_dir)
+    notes_index = load_notes_index()
+
+    changes = []
+    free_ids = state['free_ids']
+
+    with span("tokenize pages") as args:
+        # Removals first, so pages added in the same build reuse their ids
+        for key in sorted(documents):
+            if key not in notes_index or not Path(key).exists():
+                document = documents.pop(key)
+                changes.append((document['id'], document['terms'], {}))
+                free_ids.append(document['id'])
+        free_ids.sort()
+
+        for key, entry in sorted(notes_index.items()):
+            if not Path(key).exists():
+                continue
+
+            version = get_entry_version(entry)
+            document = documents.get(key)
+            if document is not None and document['version'] == version:
+                continue
+
+            try:
+                terms = get_document_terms(entry)
+            except Exception as e:
+                print(f"Warning: Could not index {key}: {e}")
+                continue
+
+            if document is None:
+                if free_ids:
+                    document = {'id': free_ids.pop(0), 'terms': {}}
+                else:
+                    document = {'id': state['next_id'], 'terms': {}}
+                    state['next_id'] += 1
+
+            changes.append((document['id'], document['terms'], terms))
+            documents[key] = {
+                'id': document['id'],
+                'version': version,
+                'url': get_page_url(key),
+                'title': entry.get('title', ''),
+                'date': entry.get('date', ''),
+                'terms': terms
+            }
+
+        args['pages'] = len(changes)
+
+    if not changes and (Path(search_dir) / "meta.json").exists():
+        return 0
+
+    with span("write search shards", "io") as args:
+        term_shards = _update_term_shards(changes, search_dir)
+        document_shards = _update_document_shards(
+            documents, {doc_id for doc_id, _, _ in changes}, search_dir
+        )
+        _write_json(Path(search_dir) / "meta.json",
+                    get_search_meta(len(documents)))
+        _write_json(state_file, state)
+        args['term_shards'] = term_shards
+        args['document_shards'] = document_shards
+
+    return len(changes)
+
+
+def _clear_search_shards(search_dir):
+    """Remove shards left over from an index the state no longer covers."""
+    for subdirectory in ("terms", "docs"):
+        shutil.rmtree(Path(search_dir) / subdirectory, ignore_errors=True)
+
+
+def _update_term_shards(changes, search_dir):
+    """Patch the postings of changed pages into their term shards.
+
+    Returns:
+        Number of term shards written.
+    """
+    by_shard = {}
+    for doc_id, old_terms, new_terms in changes:
+        for term in old_terms:
+            by_shard.setdefault(get_term_shard(term), {}).setdefault(
+                term, {})[doc_id] = None
+        for term, weight in new_terms.items():
+            by_shard.setdefault(get_term_shard(term), {}).setdefault(
+                term, {})[doc_id] = weight
+
+    for shard, term_updates in by_shard.items():
+        shard_path = get_term_shard_path(shard, search_dir)
+        postings = _read_json(shard_path, {})
+
+        for term, updates in term_updates.items():
+            doc_ids, weights = postings.get(term, ([], []))
+            merged = {
+                doc_id: weight for doc_id, weight in zip(doc_ids, weights)
+                if doc_id not in updates
+            }
+            merged.update(
+                (doc_id, weight) for doc_id, weight in updates.items()
+                if weight is not None
+            )
+
+            if merged:
+                doc_ids = sorted(merged)
+                postings[term] = [doc_ids, [merged[i] for i in doc_ids]]
+            else:
+                postings.pop(term, None)
+
+        # A clean build writes no shard without terms; readers treat a
+        # missing shard as empty
+        if postings:
+            _write_json(shard_path, postings)
+        else:
+            shard_path.unlink(missing_ok=True)
+
+    return len(by_shard)
+
+
+def _update_document_shards(documents, changed_ids, search_dir):
+    """Rewrite the document shards holding changed doc ids.
+
+    Returns:
+        Number of document shards written.
+    """
+    shard_numbers = {doc_id // DOCUMENT_SHARD_SIZE for doc_id in changed_ids}
+
+    for shard_number in shard_numbers:
+        records = {
+            str(document['id']): [
+                document['url'], document['title'], document['date']
+            ]
+            for document in documents.values()
+            if document['id'] // DOCUMENT_SHARD_SIZE == shard_number
+        }
+        shard_path = get_document_shard_path(
+            shard_number * DOCUMENT_SHARD_SIZE, search_dir
+        )
+        if records:
+            _write_json(shard_path, records)
+        else:
+            shard_path.unlink(missing_ok=True)
+
+    return len(shard_numbers)
+
+
+def load_search_shard(shard_path):
+    """Load a shard file, reusing the cached copy if it is unchanged.
+
+    Args:
+        shard_path: Path to a shard or meta JSON file.
+
+    Returns:
+        Tuple of (parsed JSON dict, (mtime_ns, size) signature). The dict
+        is empty and the signature None if the file does not exist.
+    """
+    key = str(shard_path)
+
+    try:
+        stat = os.stat(shard_path)
+    except OSError:
+        _shard_cache.pop(key, None)
+        return {}, None
+
+    signature = (stat.st_mtime_ns, stat.st_size)
+    cached = _shard_cache.get(key)
+    if cached is not None and cached[0] == signature:
+        return cached[1], signature
+
+    data = _read_json(shard_path, {})
+    _shard_cache[key] = (signature, data)
+    return data, signature
+
+
+def get_term_scores(term, meta, search_dir=SEARCH_DIR):
+    """Return the score of every page containing a term.
+
+    A page's score is idf * weight * (k1 + 1) / (weight + k1). Results
+    are cached until the term's shard or the document count changes.
+
+    Args:
+        term: Search term.
+        meta: Parsed meta.json.
+        search_dir: Directory of the published index.
+
+    Returns:
+        Dict mapping doc id to score; empty if no page has the term.
+    """
+    shard_path = get_term_shard_path(
+        get_term_shard(term, meta['term_shard_count']), search_dir
+    )
+    shard, signature = load_search_shard(shard_path)
+    document_count = meta['document_count']
+
+    cached = _term_score_cache.get(term)
+    if cached is not None and cached[0] == (signature, document_count):
+        return cached[1]
+
+    doc_ids, weights = shard.get(term, ([], []))
+    frequency = len(doc_ids)
+    idf = math.log(1 + (document_count - frequency + 0.5) / (frequency + 0.5))
+
+    scores = {
+        doc_id: idf * weight * (SCORE_K1 + 1) / (weight + SCORE_K1)
+        for doc_id, weight in zip(doc_ids, weights)
+    }
+    _term_score_cache[term] = ((signature, document_count), scores)
+    return scores
+
+
+def search_notes(query, limit=20, search_dir=SEARCH_DIR):
+    """Find the pages matching every term of a query.
+
+    Pages are ranked by the sum of their term scores (see
+    get_term_scores()). Only the shards holding the query's terms and top
+    results are loaded, and they stay cached.
+
+    Args:
+        query: Free-text query.
+        limit: Maximum number of results.
+        search_dir: Directory of the published index.
+
+    Returns:
+        List of dicts with url, title, date and score, best first, ties by url.
+    """
+    terms = set(get_terms(query))
+    meta, _ = load_search_shard(Path(search_dir) / "meta.json")
+
+    if not terms or not meta:
+        return []
+
+    term_scores = sorted(
+        (get_term_scores(term, meta, search_dir) for term in terms), key=len
+    )
+    if not term_scores[0]:
+        return []
+
+    smallest, others = term_scores[0], term_scores[1:]
+    scores = {}
+
+    for doc_id, score in smallest.items():
+        for other in others:
+            other_score = other.get(doc_id)
+            if other_score is None:
+                break
+            score += other_score
+        else:
+            scores[doc_id] = score
+
+    # Doc ids depend on the order pages were added, so pages tied with the
+    # last one kept are all loaded and the tie is broken by url instead
+    best = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+    if best and len(scores) > limit:
+        cutoff = best[-1][1]
+        best = [item for item in scores.items() if item[1] >= cutoff]
+
+    results = []
+    for doc_id, score in best:
+        records, _ = load_search_shard(
+            get_document_shard_path(doc_id, search_dir)
+        )
+        record = records.get(str(doc_id))
+        if record is None:
+            continue
+
+        url, title, date = record
+        results.append({
+            'url': url,
+            'title': title,
+            'date': date,
+            'score': round(score, 4)
+        })
+
+    results.sort(key=lambda result: (-result['score'], result['url']))
+    return results[:limit]
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 2:
+        print("Usage: python -m helper_scripts.search_index <query>")
+        sys.exit(1)
+
+    for result in search_notes(' '.join(sys.argv[1:])):
+        print(f"{result['score']:8.3f}  {result['title']} "
+              f"({result['date']}) - {result['url']}")
@@ -0,0 +1,255 @@
+"""Static File Cache and Pre-Compression.
+
+Serves built pages and media as static files. File bytes are kept in a
+size-bounded in-memory LRU, ETags are content hashes cached per file and
+invalidated by mtime and size. A build stage writes gzip (and brotli, if
+the brotli package is installed) variants of text assets to
+.build/compressed so the server can send them without compressing per
+request.
+"""
+
+import gzip
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+
+DOCS_DIR = "docs"
+COMPRESSED_DIR = ".build/compressed"
+COMPRESSIBLE_SUFFIXES = ('.html', '.css', '.js', '.json', '.svg', '.txt')
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+CACHE_MAX_FILE_BYTES = 8 * 1024 * 1024
+
+# Preferred order when a client accepts several encodings
+ENCODING_SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+_cache_lock = threading.Lock()
+_bytes_cache = OrderedDict()
+_bytes_cache_size = 0
+_etag_cache = {}
+
+
+def get_file_signature(file_path):
+    """Return the (mtime_ns, size) of a file.
+
+    Args:
+        file_path: Path to the file.
+
+    Returns:
+        Tuple of (mtime in nanoseconds, size in bytes).
+    """
+    stat = os.stat(file_path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def get_file_etag(file_path, signature=None):
+    """Return a strong ETag (content hash) for a file.
+
+    Args:
+        file_path: Path to the file.
+        signature: Optional (mtime_ns, size) already read by the caller.
+
+    Returns:
+        Hex digest string, recomputed only when the file changes.
+    """
+    key = str(file_path)
+    signature = signature or get_file_signature(file_path)
+
+    with _cache_lock:
+        cached = _etag_cache.get(key)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            digest.update(chunk)
+    etag = digest.hexdigest()[:32]
+
+    with _cache_lock:
+        _etag_cache[key] = (signature, etag)
+
+    return etag
+
+
+def read_cached_bytes(file_path, signature=None):
+    """Return a file's bytes from the LRU cache, reading it if needed.
+
+    Args:
+        file_path: Path to the file.
+        signature: Optional (mtime_ns, size) already read by the caller.
+
+    Returns:
+        File contents as bytes, or None if the file is larger than
+        CACHE_MAX_FILE_BYTES (callers should stream it instead).
+    """
+    global _bytes_cache_size
+
+    key = str(file_path)
+    signature = signature or get_file_signature(file_path)
+
+    if signature[1] > CACHE_MAX_FILE_BYTES:
+        return None
+
+    with _cache_lock:
+        cached = _bytes_cache.get(key)
+        if cached is not None and cached[0] == signature:
+            _bytes_cache.move_to_end(key)
+            return cached[1]
+
+    with open(file_path, 'rb') as f:
+        data = f.read()
+
+    with _cache_lock:
+        previous = _bytes_cache.pop(key, None)
+        if previous is not None:
+            _bytes_cache_size -= len(previous[1])
+
+        _bytes_cache[key] = (signature, data)
+        _bytes_cache_size += len(data)
+
+        while _bytes_cache_size > CACHE_MAX_BYTES and len(_bytes_cache) > 1:
+            _, (_, evicted) = _bytes_cache.popitem(last=False)
+            _bytes_cache_size -= len(evicted)
+
+    return data
+
+
+def get_compressed_variant_path(file_path, encoding, docs_dir=DOCS_DIR,
+                                compressed_dir=COMPRESSED_DIR):
+    """Return where the pre-compressed variant of a file is stored.
+
+    Args:
+        file_path: Path to a file under docs_dir.
+        encoding: Content encoding name ('gzip' or 'br').
+        docs_dir: Root of the built site.
+        compressed_dir: Root of the compressed variants.
+
+    Returns:
+        Path under compressed_dir.
+    """
+    relative_path = Path(file_path).relative_to(docs_dir)
+    return Path(compressed_dir) / (
+        str(relative_path) + ENCODING_SUFFIXES[encoding]
+    )
+
+
+def find_compressed_variant(file_path, accepted_encodings,
+                            docs_dir=DOCS_DIR, compressed_dir=COMPRESSED_DIR):
+    """Pick a fresh pre-compressed variant the client accepts.
+
+    Variants carry their source's mtime, so a variant whose mtime differs
+    from the source is stale and ignored.
+
+    Args:
+        file_path: Path to a file under docs_dir.
+        accepted_encodings: Collection of encodings the client accepts.
+        docs_dir: Root of the built site.
+        compressed_dir: Root of the compressed variants.
+
+    Returns:
+        Tuple of (encoding, variant path), or (None, None).
+    """
+    if Path(file_path).suffix not in COMPRESSIBLE_SUFFIXES:
+        return None, None
+
+    source_mtime = os.stat(file_path).st_mtime_ns
+
+    for encoding in ENCODING_SUFFIXES:
+        if encoding not in accepted_encodings:
+            continue
+
+        variant_path = get_compressed_variant_path(
+            file_path, encoding, docs_dir, compressed_dir
+        )
+        try:
+            if os.stat(variant_path).st_mtime_ns == source_mtime:
+                return encoding, variant_path
+        except OSError:
+            continue
+
+    return None, None
+
+
+def _get_compressors():
+    """Return the available compressors keyed by encoding name."""
+    compressors = {
+        'gzip': lambda data: gzip.compress(data, compresslevel=9, mtime=0)
+    }
+
+    try:
+        import brotli
+    except ImportError:
+        return compressors
+
+    compressors['br'] = brotli.compress
+    return compressors
+
+
+def compress_static_files(docs_dir=DOCS_DIR):
+    """Write pre-compressed variants of the site's text assets.
+
+    Only files whose variant is missing or stale are compressed, and
+    variants of files that no longer exist are deleted.
+
+    Args:
+        docs_dir: Root of the built site.
+
+    Returns:
+        Number of variant files written.
+    """
+    docs_path = Path(docs_dir)
+    if not docs_path.exists():
+        return 0
+
+    compressors = _get_compressors()
+    written_count = 0
+
+    for file_path in docs_path.rglob('*'):
+        if file_path.suffix not in COMPRESSIBLE_SUFFIXES:
+            continue
+        if not file_path.is_file():
+            continue
+
+        stat = file_path.stat()
+        data = None
+
+        for encoding, compress in compressors.items():
+            variant_path = get_compressed_variant_path(
+                file_path, encoding, docs_dir
+            )
+
+            if (variant_path.exists()
+                    and variant_path.stat().st_mtime_ns == stat.st_mtime_ns):
+                continue
+
+            if data is None:
+                data = file_path.read_bytes()
+
+            variant_path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = variant_path.with_name(variant_path.name + '.tmp')
+            temp_path.write_bytes(compress(data))
+            os.utime(temp_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+            os.replace(temp_path, variant_path)
+            written_count += 1
+
+    _prune_compressed_variants(docs_path)
+
+    return written_count
+
+
+def _prune_compressed_variants(docs_path):
+    """Delete compressed variants whose source file is gone."""
+    compressed_path = Path(COMPRESSED_DIR)
+    if not compressed_path.exists():
+        return
+
+    for variant_path in compressed_path.rglob('*'):
+        if variant_path.suffix not in ENCODING_SUFFIXES.values():
+            continue
+
+        relative_path = variant_path.relative_to(compressed_path)
+        if not (docs_path / relative_path.with_suffix('')).exists():
+            variant_path.unlink()
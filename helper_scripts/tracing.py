@@ -0,0 +1,188 @@
+"""Build Tracing and Profiling.
+
+Records timed spans around build stages and per-file operations and
+writes them in the Chrome trace event format (load the JSON file in
+chrome://tracing or https://ui.perfetto.dev). Stages and build tasks
+can also be profiled with cProfile, one .prof file per stage or task
+category. Each thread profiles the work it runs, and profiles of the
+same name in one run (e.g. every convert task) are merged into one file.
+On Python 3.12+, where only one profiler can be active at a time, work
+that overlaps another profiled task is left out; use --workers 1 for
+complete task profiles there.
+
+Both are off by default; span() then costs a flag check, so the helper
+scripts can be instrumented unconditionally.
+"""
+
+import cProfile
+import json
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+
+_trace_lock = threading.Lock()
+_trace_events = []
+_trace_enabled = False
+_trace_start_ns = 0
+_profile_dir = None
+_profile_lock = threading.Lock()
+_profiled_names = set()
+
+
+def enable_tracing():
+    """Start recording spans, discarding any previously recorded ones."""
+    global _trace_enabled, _trace_start_ns
+
+    with _trace_lock:
+        _trace_events.clear()
+        _trace_start_ns = time.perf_counter_ns()
+        _trace_enabled = True
+
+
+def enable_profiling(profile_dir):
+    """Profile each stage() with cProfile, writing stats to profile_dir.
+
+    Args:
+        profile_dir: Directory for the <stage>.prof files.
+    """
+    global _profile_dir
+
+    Path(profile_dir).mkdir(parents=True, exist_ok=True)
+    with _profile_lock:
+        _profile_dir = Path(profile_dir)
+        _profiled_names.clear()
+
+
+def is_tracing():
+    """Return True if spans are being recorded."""
+    return _trace_enabled
+
+
+@contextmanager
+def span(name, category="build", **args):
+    """Time a block of work as a trace span.
+
+    Args:
+        name: Span name shown in the trace viewer.
+        category: Span category (e.g. "stage", "io", "subprocess").
+        **args: Extra details recorded with the span.
+
+    Yields:
+        The args dict, so callers can add details such as byte counts
+        while the span is open.
+    """
+    if not _trace_enabled:
+        yield args
+        return
+
+    start_ns = time.perf_counter_ns()
+    try:
+        yield args
+    finally:
+        end_ns = time.perf_counter_ns()
+        event = {
+            'name': name,
+            'cat': category,
+            'ph': 'X',
+            'ts': (start_ns - _trace_start_ns) / 1000,
+            'dur': (end_ns - start_ns) / 1000,
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+            'args': {key: str(value) if isinstance(value, Path) else value
+                     for key, value in args.items()}
+        }
+        with _trace_lock:
+            _trace_events.append(event)
+
+
+@contextmanager
+def profile(name):
+    """Profile the calling thread's work in a block if profiling is on.
+
+    Stats are written to <name>.prof, merged with any written under the
+    same name since profiling was enabled.
+
+    Args:
+        name: Profile name (a stage or task category).
+    """
+    profiler = None
+    if _profile_dir is not None:
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another thread's profiler is active (Python 3.12+)
+            profiler = None
+
+    try:
+        yield
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            with _profile_lock:
+                profile_path = _profile_dir / f"{name}.prof"
+                stats = pstats.Stats(profiler)
+                if name in _profiled_names:
+                    stats.add(str(profile_path))
+                stats.dump_stats(str(profile_path))
+                _profiled_names.add(name)
+
+
+@contextmanager
+def stage(name):
+    """Trace a top-level build stage and profile it if enabled.
+
+    Args:
+        name: Stage name, also used for the .prof filename.
+
+    Yields:
+        The span's args dict.
+    """
+    with profile(name), span(name, category="stage") as args:
+        yield args
+
+
+def record_file_io(args, read_path=None, written_path=None):
+    """Add bytes read and written to a span's args while tracing.
+
+    Args:
+        args: Dict yielded by span().
+        read_path: Optional path of a file that was read.
+        written_path: Optional path of a file that was written.
+    """
+    if not _trace_enabled:
+        return
+
+    for key, path in (('bytes_read', read_path),
+                      ('bytes_written', written_path)):
+        if path is None:
+            continue
+        try:
+            args[key] = args.get(key, 0) + os.path.getsize(path)
+        except OSError:
+            pass
+
+
+def write_trace(trace_file):
+    """Write recorded spans as a Chrome trace JSON file.
+
+    Args:
+        trace_file: Output path.
+
+    Returns:
+        Number of events written.
+    """
+    with _trace_lock:
+        events = list(_trace_events)
+
+    trace_path = Path(trace_file)
+    trace_path.parent.mkdir(parents=True, exist_ok=True)
+
+    with open(trace_path, 'w', encoding='utf-8') as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+    return len(events)
@@ -0,0 +1,251 @@
+"""Watch Mode for Incremental Republishing.
+
+Monitors staged notes, published markdown and the HTML template. Bursts
+of saves are debounced into one rebuild that republishes the affected
+notes, runs the build graph's dirty tasks and notifies live-reload
+listeners (see the /__livereload route in server.py).
+
+Changes are detected by comparing (mtime, size) snapshots. If the optional
+watchdog package is installed, file system events (inotify on Linux) wake
+the watcher immediately; otherwise it polls every POLL_INTERVAL seconds.
+"""
+
+import threading
+import time
+from pathlib import Path
+
+from helper_scripts.build_graph import run_build
+from helper_scripts.convert_markdown import HTML_TEMPLATE_FILE, MARKDOWN_DIR
+from helper_scripts.publish_note import WORKING_STAGED_DIR, publish_notes
+
+
+WATCH_PATHS = (WORKING_STAGED_DIR, MARKDOWN_DIR, HTML_TEMPLATE_FILE)
+POLL_INTERVAL = 0.5
+DEBOUNCE_DELAY = 0.3
+
+# Build counter that live-reload listeners wait on
+_reload_condition = threading.Condition()
+_reload_version = 0
+
+
+def notify_reload():
+    """Bump the build version and wake all live-reload listeners."""
+    global _reload_version
+
+    with _reload_condition:
+        _reload_version += 1
+        _reload_condition.notify_all()
+
+
+def wait_for_reload(last_version, timeout=None):
+    """Block until a build newer than last_version finishes.
+
+    Args:
+        last_version: Build version the caller has already seen.
+        timeout: Maximum seconds to wait, or None to wait forever.
+
+    Returns:
+        The current build version (unchanged if the wait timed out).
+    """
+    with _reload_condition:
+        _reload_condition.wait_for(
+            lambda: _reload_version != last_version, timeout
+        )
+        return _reload_version
+
+
+def get_reload_version():
+    """Return the current build version."""
+    with _reload_condition:
+        return _reload_version
+
+
+def snapshot_files(paths=WATCH_PATHS):
+    """Record the (mtime, size) of every watched file.
+
+    Args:
+        paths: Directories (scanned for *.md) and individual files.
+
+    Returns:
+        Dict mapping file path string to (mtime_ns, size).
+    """
+    snapshot = {}
+
+    for path in map(Path, paths):
+        if path.is_dir():
+            files = path.rglob('*.md')
+        elif path.exists():
+            files = [path]
+        else:
+            continue
+
+        for file_path in files:
+            try:
+                stat = file_path.stat()
+            except OSError:
+                continue
+            snapshot[str(file_path)] = (stat.st_mtime_ns, stat.st_size)
+
+    return snapshot
+
+
+def diff_snapshots(old, new):
+    """Return the paths that were added, changed or removed.
+
+    Args:
+        old: Previous snapshot from snapshot_files().
+        new: Current snapshot from snapshot_files().
+
+    Returns:
+        Set of path strings.
+    """
+    return {
+        path for path in old.keys() | new.keys()
+        if old.get(path) != new.get(path)
+    }
+
+
+def rebuild_changed(changed_paths):
+    """Republish changed staged notes and rebuild what they affect.
+
+    The build graph (see build_graph.py) decides which notes to convert
+    and which site-wide steps to rerun; removed notes have their pages
+    pruned.
+
+    Args:
+        changed_paths: Set of changed path strings from diff_snapshots().
+
+    Returns:
+        Number of HTML files rebuilt.
+    """
+    changed_paths = set(changed_paths)
+    staged = sorted(
+        path for path in changed_paths
+        if path.startswith(WORKING_STAGED_DIR) and Path(path).exists()
+    )
+
+    if staged:
+        for file_path, result in zip(staged, publish_notes(staged)):
+            if result['success']:
+                print(f"  ✓ Republished: {file_path}")
+                changed_paths.add(str(result['destination_path']))
+            else:
+                print(f"  ✗ Error: {result['error']}")
+
+    summary = run_build(changed_paths)
+
+    if summary['ran']:
+        notify_reload()
+
+    return summary['converted']
+
+
+def _start_event_observer(paths, wake_event):
+    """Start a watchdog observer that sets wake_event on any change.
+
+    Args:
+        paths: Paths to watch.
+        wake_event: threading.Event to set when something changes.
+
+    Returns:
+        The started observer, or None if watchdog is not installed.
+    """
+    try:
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+    except ImportError:
+        return None
+
+    class WakeHandler(FileSystemEventHandler):
+        def on_any_event(self, event):
+            wake_event.set()
+
+    observer = Observer()
+    handler = WakeHandler()
+
+    for path in map(Path, paths):
+        if path.is_dir():
+            observer.schedule(handler, str(path), recursive=True)
+        elif path.parent.is_dir():
+            observer.schedule(handler, str(path.parent), recursive=False)
+
+    observer.daemon = True
+    observer.start()
+    return observer
+
+
+def watch(paths=WATCH_PATHS, interval=POLL_INTERVAL, debounce=DEBOUNCE_DELAY,
+          stop_event=None):
+    """Watch for changes and rebuild affected notes until stopped.
+
+    Args:
+        paths: Directories and files to watch.
+        interval: Seconds between polls when no events arrive.
+        debounce: Quiet period in seconds that ends a burst of saves.
+        stop_event: Optional threading.Event that stops the watcher.
+    """
+    stop_event = stop_event or threading.Event()
+    wake_event = threading.Event()
+    observer = _start_event_observer(paths, wake_event)
+
+    mode = "file system events" if observer else f"polling every {interval}s"
+    print(f"Watching {', '.join(map(str, paths))} ({mode})")
+
+    baseline = snapshot_files(paths)
+
+    try:
+        while not stop_event.is_set():
+            wake_event.wait(interval)
+            wake_event.clear()
+
+            current = snapshot_files(paths)
+            changed = diff_snapshots(baseline, current)
+            if not changed:
+                continue
+
+            # Wait for the burst of saves to settle before rebuilding
+            while True:
+                time.sleep(debounce)
+                latest = snapshot_files(paths)
+                if latest == current:
+                    break
+                current = latest
+
+            changed = diff_snapshots(baseline, current)
+            baseline = current
+
+            print(f"\nDetected {len(changed)} changed file(s)")
+            start_time = time.perf_counter()
+
+            try:
+                rebuilt = rebuild_changed(changed)
+            except Exception as e:
+                print(f"  ✗ Rebuild failed: {e}")
+                continue
+
+            elapsed = time.perf_counter() - start_time
+            print(f"✓ Rebuilt {rebuilt} file(s) in {elapsed:.2f}s")
+
+    finally:
+        if observer is not None:
+            observer.stop()
+
+
+def start_watch_thread(**kwargs):
+    """Run watch() in a daemon thread.
+
+    Args:
+        **kwargs: Passed through to watch().
+
+    Returns:
+        Tuple of (thread, stop_event).
+    """
+    stop_event = threading.Event()
+    thread = threading.Thread(
+        target=watch,
+        kwargs={**kwargs, 'stop_event': stop_event},
+        name="field-notes-watch",
+        daemon=True
+    )
+    thread.start()
+    return thread, stop_event
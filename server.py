@@ -0,0 +1,255 @@
+"""Field Notes - Development Server.
+
+Flask app that serves the built site from the current release (see
+helper_scripts/releases.py), answers /search queries and streams
+live-reload events in watch mode. It never builds anything itself; run
+`python app.py build` (or `python app.py all`) for that.
+"""
+
+import mimetypes
+import os
+import time
+from datetime import datetime, timezone
+
+from flask import Flask, Response, abort, jsonify, request, send_file
+from werkzeug.security import safe_join
+
+from helper_scripts.asset_names import (
+    is_content_addressed_media,
+    is_derivative_file,
+    is_fingerprinted_asset
+)
+from helper_scripts.releases import get_serving_dirs
+from helper_scripts.static_cache import (
+    find_compressed_variant,
+    get_file_etag,
+    get_file_signature,
+    read_cached_bytes
+)
+
+# Initialize the Flask application
+app = Flask(
+    __name__,
+    template_folder='docs',
+    static_folder='docs/static',
+    static_url_path='/static'
+)
+
+# Built pages are revalidated on every visit; other assets for an hour.
+# Content-addressed media, image derivatives and fingerprinted styles and
+# scripts never change under the same name.
+HTML_CACHE_CONTROL = 'no-cache'
+ASSET_CACHE_CONTROL = 'public, max-age=3600'
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# Injected into served pages in watch mode to reload on each rebuild
+LIVE_RELOAD_SCRIPT = (
+    "<script>new EventSource('/__livereload')"
+    ".onmessage = () => location.reload();</script>"
+)
+
+
+@app.after_request
+def inject_live_reload(response):
+    """Add the live-reload script to HTML pages in watch mode.
+
+    Args:
+        response: Outgoing response.
+
+    Returns:
+        The response, with the script injected before </body> if enabled.
+    """
+    if (not app.config.get('LIVE_RELOAD')
+            or response.mimetype != 'text/html'
+            or response.content_encoding
+            or response.direct_passthrough):
+        return response
+
+    page = response.get_data(as_text=True)
+    if '</body>' in page:
+        page = page.replace('</body>', LIVE_RELOAD_SCRIPT + '</body>', 1)
+        response.set_data(page)
+
+    return response
+
+
+@app.route("/__livereload")
+def live_reload():
+    """Stream a server-sent event each time watch mode finishes a rebuild.
+
+    Returns:
+        text/event-stream response that stays open.
+    """
+    from helper_scripts.watch import get_reload_version, wait_for_reload
+
+    def stream():
+        version = get_reload_version()
+        while True:
+            new_version = wait_for_reload(version, timeout=15)
+            if new_version == version:
+                # Keep the connection alive through proxies and browsers
+                yield ": keepalive\n\n"
+            else:
+                version = new_version
+                yield f"data: {version}\n\n"
+
+    return Response(stream(), mimetype='text/event-stream')
+
+
+def send_built_file(relative_path, cache_control):
+    """Send a file from the built site with caching headers.
+
+    Files are read from the current release (see releases.py), so pages
+    stay whole while a rebuild is running. Small files are served from
+    the in-memory cache, larger ones are streamed. Responses carry a
+    strong ETag and Last-Modified, answer conditional requests with 304,
+    and use a pre-compressed variant when the client accepts one (except
+    for pages in watch mode, which get the live-reload script injected).
+
+    Args:
+        relative_path: Path relative to the site root.
+        cache_control: Cache-Control header value.
+
+    Returns:
+        Flask response.
+    """
+    site_dir, compressed_dir = get_serving_dirs()
+    file_path = safe_join(site_dir, relative_path)
+
+    if file_path is None or not os.path.isfile(file_path):
+        abort(404)
+
+    mimetype = mimetypes.guess_type(file_path)[0] or 'application/octet-stream'
+
+    if app.config.get('LIVE_RELOAD') and mimetype == 'text/html':
+        encoding, variant_path = None, None
+    else:
+        encoding, variant_path = find_compressed_variant(
+            file_path, request.accept_encodings, site_dir, compressed_dir
+        )
+    served_path = variant_path or file_path
+
+    signature = get_file_signature(served_path)
+    data = read_cached_bytes(served_path, signature)
+
+    if data is None:
+        response = send_file(served_path, conditional=False, etag=False)
+    else:
+        response = app.response_class(data)
+
+    response.mimetype = mimetype
+    response.set_etag(get_file_etag(served_path, signature))
+    response.last_modified = datetime.fromtimestamp(
+        os.stat(file_path).st_mtime, timezone.utc
+    )
+    response.headers['Cache-Control'] = cache_control
+    response.vary.add('Accept-Encoding')
+
+    if encoding:
+        response.content_encoding = encoding
+
+    return response.make_conditional(request)
+
+
+@app.route("/")
+def home():
+    """Serve the homepage/index page.
+
+    Returns:
+        Contents of docs/index.html.
+    """
+    return send_built_file('index.html', HTML_CACHE_CONTROL)
+
+
+@app.route("/<path:year>/<path:filename>")
+def serve_note(year, filename):
+    """Serve individual field note HTML files.
+
+    Args:
+        year: Directory path (e.g., 'pages').
+        filename: HTML filename to serve.
+
+    Returns:
+        Contents of the requested note's HTML file.
+    """
+    return send_built_file(f'{year}/{filename}', HTML_CACHE_CONTROL)
+
+
+@app.route("/search")
+def search():
+    """Search published notes.
+
+    Query parameters:
+        q: Free-text query; every term must match.
+        limit: Maximum number of results (default 20).
+
+    Returns:
+        JSON with the query, results (url, title, date, score) and the
+        time taken in milliseconds.
+    """
+    from helper_scripts.search_index import search_notes
+
+    query = request.args.get('q', '')
+    limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+
+    site_dir, _ = get_serving_dirs()
+    search_dir = os.path.join(site_dir, 'static', 'search')
+
+    start_time = time.perf_counter()
+    results = search_notes(query, limit=limit, search_dir=search_dir)
+    elapsed_ms = (time.perf_counter() - start_time) * 1000
+
+    for result in results:
+        result['url'] = '/' + result['url']
+
+    return jsonify({
+        'query': query,
+        'results': results,
+        'took_ms': round(elapsed_ms, 3)
+    })
+
+
+@app.endpoint('static')
+def serve_static(filename):
+    """Serve styles, templates and media from docs/static.
+
+    Args:
+        filename: Path relative to docs/static.
+
+    Returns:
+        Contents of the requested static file.
+    """
+    name = os.path.basename(filename)
+    if filename.startswith('media/') and (
+            is_content_addressed_media(name) or is_derivative_file(name)):
+        return send_built_file(f'static/{filename}', IMMUTABLE_CACHE_CONTROL)
+    if is_fingerprinted_asset(name):
+        return send_built_file(f'static/{filename}', IMMUTABLE_CACHE_CONTROL)
+
+    return send_built_file(f'static/{filename}', ASSET_CACHE_CONTROL)
+
+
+def run_server(host="127.0.0.1", port=5000, watch=False):
+    """Start the Flask development server on the current build.
+
+    Args:
+        host: Interface to listen on.
+        port: Port to listen on.
+        watch: If True, rebuild on changes and live-reload open pages.
+    """
+    if watch:
+        from helper_scripts.watch import start_watch_thread
+
+        app.config['LIVE_RELOAD'] = True
+        start_watch_thread()
+
+    print(f"Server starting at http://{host}:{port}/")
+    print("Press CTRL+C to stop the server\n")
+    print("=" * 70 + "\n")
+
+    try:
+        app.run(host=host, port=port, debug=True, use_reloader=False)
+    except KeyboardInterrupt:
+        print("\n\n" + "=" * 70)
+        print("Server stopped")
+        print("=" * 70 + "\n")
@@ -0,0 +1,75 @@
+"""Tests for publishing staged notes (helper_scripts/publish_note.py)."""
+
+from pathlib import Path
+
+import pytest
+
+from helper_scripts.notes import clear_note_cache
+from helper_scripts.publish_note import (
+    MARKDOWN_DIR,
+    STATIC_MEDIA_DIR,
+    WORKING_MEDIA_DIR,
+    WORKING_STAGED_DIR,
+    get_media_store_name,
+    publish_note
+)
+
+
+NOTE_TEXT = """---
+title: Bear
+date: 2026-01-01
+---
+
+![A bear](./media/new_bear.png)
+"""
+
+
+@pytest.fixture
+def site(tmp_path, monkeypatch):
+    """Run in an empty site with one staged note and its image."""
+    monkeypatch.chdir(tmp_path)
+    clear_note_cache()
+
+    Path(WORKING_STAGED_DIR).mkdir(parents=True)
+    Path(WORKING_MEDIA_DIR).mkdir(parents=True)
+
+    note_path = Path(WORKING_STAGED_DIR) / "bear.md"
+    note_path.write_text(NOTE_TEXT, encoding='utf-8')
+    image_path = Path(WORKING_MEDIA_DIR) / "new_bear.png"
+    image_path.write_bytes(b"\x89PNG\r\n\x1a\n not really a bear")
+
+    yield note_path, get_media_store_name(image_path)
+    clear_note_cache()
+
+
+def test_publishing_twice_keeps_the_stored_image_path(site):
+    note_path, store_name = site
+    published_path = Path(MARKDOWN_DIR) / "bear.md"
+    expected = f"![A bear](../static/media/{store_name})"
+
+    first = publish_note(note_path)
+    assert first['success']
+    assert first['images_moved'] == ["new_bear.png"]
+    assert not (Path(WORKING_MEDIA_DIR) / "new_bear.png").exists()
+    assert expected in published_path.read_text(encoding='utf-8')
+
+    # The staged note stays in working/, so every run publishes it again
+    second = publish_note(note_path)
+    assert second['success']
+    assert second['images_missing'] == []
+    assert second['media_names'] == {"new_bear.png": store_name}
+    assert expected in published_path.read_text(encoding='utf-8')
+    assert (Path(STATIC_MEDIA_DIR) / store_name).exists()
+
+
+def test_missing_image_never_published_is_reported(site):
+    note_path, _ = site
+    (Path(WORKING_MEDIA_DIR) / "new_bear.png").unlink()
+
+    result = publish_note(note_path)
+
+    assert result['success']
+    assert result['images_missing'] == ["new_bear.png"]
+    assert "../static/media/new_bear.png" in (
+        Path(MARKDOWN_DIR) / "bear.md"
+    ).read_text(encoding='utf-8')
@@ -0,0 +1,107 @@
+"""Tests for the static search index (helper_scripts/search_index.py)."""
+
+from pathlib import Path
+
+import pytest
+
+from helper_scripts.notes_index import save_notes_index
+from helper_scripts.search_index import (
+    SEARCH_DIR,
+    build_search_index,
+    load_search_state,
+    search_notes
+)
+
+
+PAGES = {
+    'alpine': "Alpine glacier survey",
+    'beech': "Beech forest survey",
+    'cedar': "Cedar ridge survey",
+    'delta': "Delta marsh survey"
+}
+
+
+def write_pages(names):
+    """Write hand-written pages and a notes index listing exactly them."""
+    index = {}
+
+    for name in names:
+        output_path = Path("docs/pages") / f"{name}.html"
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        output_path.write_text(f"<p>{PAGES[name]}</p>", encoding='utf-8')
+        index[str(output_path)] = {
+            'title': PAGES[name],
+            'date': '2026-01-01',
+            'output': str(output_path),
+            'signature': name
+        }
+
+    for stale_path in Path("docs/pages").glob("*.html"):
+        if str(stale_path) not in index:
+            stale_path.unlink()
+
+    save_notes_index(index)
+
+
+def get_shard_inodes(search_dir=SEARCH_DIR):
+    """Map each shard file to its inode; atomic writes replace the inode."""
+    return {
+        path.relative_to(search_dir).as_posix(): path.stat().st_ino
+        for path in Path(search_dir).rglob("*.json")
+    }
+
+
+@pytest.fixture
+def site(tmp_path, monkeypatch):
+    """Run in an empty site."""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def test_removed_page_frees_its_id_for_the_next_added_page(site):
+    write_pages(['alpine', 'beech', 'cedar'])
+    build_search_index()
+    ids = {key: document['id']
+           for key, document in load_search_state()['documents'].items()}
+
+    write_pages(['alpine', 'cedar', 'delta'])
+    assert build_search_index() == 2
+
+    documents = load_search_state()['documents']
+    assert documents["docs/pages/alpine.html"]['id'] == ids[
+        "docs/pages/alpine.html"]
+    assert documents["docs/pages/cedar.html"]['id'] == ids[
+        "docs/pages/cedar.html"]
+    assert documents["docs/pages/delta.html"]['id'] == ids[
+        "docs/pages/beech.html"]
+
+
+def test_adding_a_page_rewrites_only_the_shards_it_touches(site):
+    write_pages(['alpine', 'beech'])
+    build_search_index()
+    before = get_shard_inodes()
+
+    write_pages(['alpine', 'beech', 'delta'])
+    build_search_index()
+    after = get_shard_inodes()
+
+    rewritten = {name for name in after if before.get(name) != after[name]}
+    assert "meta.json" in rewritten
+    assert 0 < len(rewritten) < len(after)
+
+
+def test_incremental_index_answers_like_a_clean_build(site):
+    write_pages(['alpine', 'beech', 'cedar'])
+    build_search_index()
+    write_pages(['beech', 'cedar', 'delta'])
+    build_search_index()
+
+    clean_dir = "clean/search"
+    build_search_index(search_dir=clean_dir, state_file="clean/state.json")
+
+    for query in ("survey", "marsh", "alpine glacier", "beech forest"):
+        assert search_notes(query) == search_notes(
+            query, search_dir=clean_dir)
+    assert [result['url'] for result in search_notes("survey")] == [
+        "pages/beech.html", "pages/cedar.html", "pages/delta.html"
+    ]